@@ -0,0 +1,244 @@
+"""
+The benchmarks of the game: combat, inventory, rendering and full-run throughput.
+
+Every step does a batch of roughly `BATCH` operations so the timer overhead stays negligible,
+and everything is seeded so two runs do the same work.
+"""
+
+import asyncio
+
+from dungeon_crawler import ai, config
+from dungeon_crawler.character import Character
+from dungeon_crawler.combat import Combat
+from dungeon_crawler.console import Console, flush, set_console
+from dungeon_crawler.content import create_enemy, create_item
+from dungeon_crawler.engine import AggressivePolicy, Engine
+from dungeon_crawler.game import Game
+from dungeon_crawler.inventory import Inventory
+from dungeon_crawler.item import Item
+from dungeon_crawler.player import Player
+from dungeon_crawler.playback import play_chunk, record_chunk
+from dungeon_crawler.rng import GameRandom
+from dungeon_crawler.solver import OptimalPolicy
+
+from harness import benchmark
+
+BATCH = 10000
+SEED = 1234
+COMBAT_TURNS = 20
+IMMORTAL = 10 ** 9
+
+
+class BenchConsole(Console):
+    """
+    A console that discards the output and attacks whenever it's asked for input.
+    """
+
+    async def read_line(self) -> str:
+        return "attack"
+
+
+class StopCombat(Exception):
+    """Raised by the checkpoint of a benchmarked game to end a combat after a few turns."""
+
+
+def headless() -> None:
+    """
+    Sets the game up for benchmarking: no pauses and output rendered into a null sink.
+    """
+    config.GAME_SPEED = 0
+    set_console(BenchConsole())
+
+
+@benchmark("character_attack", unit="attacks")
+def character_attack(_):
+    rng = GameRandom(SEED)
+    attacker = Player(rng=rng)
+    target = Character(name="Dummy", health=IMMORTAL, rng=rng)
+
+    def step() -> int:
+        attack = attacker.attack
+        for _ in range(BATCH):
+            attack(target)
+        flush()
+        return BATCH
+
+    return step
+
+
+@benchmark("combat_turns", params=(1, 10, 100), unit="turns")
+def combat_turns(group_size: int):
+    game = Game(seed=SEED)
+
+    def checkpoint(_) -> None:
+        if game.combat.turn > COMBAT_TURNS:
+            raise StopCombat()
+
+    game.checkpoint = checkpoint
+
+    def prepare() -> None:
+        game.hero.health_max = game.hero.health = IMMORTAL
+        enemies = [create_enemy("goblin", game.rng) for _ in range(group_size)]
+        for enemy in enemies:
+            enemy.health_max = enemy.health = IMMORTAL
+        game.combat = Combat(game, game.hero, enemies)
+
+    def step() -> int:
+        try:
+            asyncio.run(game.combat.fight())
+        except StopCombat:
+            pass
+        return game.combat.turn - 1
+
+    return prepare, step
+
+
+def _items(size: int):
+    """
+    Builds `size` distinct unstackable items.
+    """
+    return [Item(f"item-{index}", {"name": f"Item {index}"}) for index in range(size)]
+
+
+def _copies(size: int) -> int:
+    """
+    Gets how many inventories of a size a step goes through to do about `BATCH` operations.
+    """
+    return max(1, BATCH // size)
+
+
+@benchmark("enemy_decisions", params=("attack", "utility", "tree"), unit="decisions")
+def enemy_decisions(policy: str):
+    rng = GameRandom(SEED)
+    hero = Player(rng=rng)
+    enemies = [create_enemy("goblin", rng) for _ in range(BATCH // 10)]
+    for enemy in enemies:
+        enemy.policy = ai.get_policy(policy)
+        enemy.health = rng.randint(1, enemy.health_max)
+        enemy.potions = rng.randint(0, 2)
+
+    def step() -> int:
+        ai.decide_all(enemies, hero)
+        return len(enemies)
+
+    return step
+
+
+@benchmark("inventory_add", params=(10, 1000, 100000), unit="items")
+def inventory_add(size: int):
+    items = _items(size)
+    inventories = []
+
+    def prepare() -> None:
+        inventories[:] = [Inventory(capacity=size) for _ in range(_copies(size))]
+
+    def step() -> int:
+        for inventory in inventories:
+            add = inventory.add_item
+            for item in items:
+                add(item)
+        return len(inventories) * size
+
+    return prepare, step
+
+
+@benchmark("inventory_find", params=(10, 1000, 100000), unit="lookups")
+def inventory_find(size: int):
+    items = _items(size)
+    uuids = [item.uuid for item in items]
+    inventories = [Inventory(capacity=size) for _ in range(_copies(size))]
+    for inventory in inventories:
+        for item in items:
+            inventory.add_item(item)
+
+    def step() -> int:
+        for inventory in inventories:
+            find = inventory.find_item
+            for uuid in uuids:
+                find(uuid)
+        return len(inventories) * size
+
+    return step
+
+
+@benchmark("inventory_remove", params=(10, 1000, 100000), unit="items")
+def inventory_remove(size: int):
+    items = _items(size)
+    uuids = [item.uuid for item in items]
+    inventories = []
+
+    def prepare() -> None:
+        inventories[:] = [Inventory(capacity=size) for _ in range(_copies(size))]
+        for inventory in inventories:
+            for item in items:
+                inventory.add_item(item)
+
+    def step() -> int:
+        for inventory in inventories:
+            remove = inventory.remove_item
+            for uuid in uuids:
+                remove(uuid)
+        return len(inventories) * size
+
+    return prepare, step
+
+
+@benchmark("player_str", params=("cached", "changed"), unit="panels")
+def player_str(mode: str):
+    hero = Player(rng=GameRandom(SEED))
+    hero.inventory.add_item(create_item("spellbook"))
+    hero.inventory.add_item(create_item("spotion"))
+    health = hero.health
+
+    def step() -> int:
+        for index in range(BATCH):
+            if mode == "changed":
+                hero.health = health - (index & 1)
+            str(hero)
+        return BATCH
+
+    return step
+
+
+@benchmark("inventory_str", params=("cached", "changed"), unit="panels")
+def inventory_str(mode: str):
+    inventory = Inventory()
+    items = _items(inventory.capacity)
+    for item in items:
+        inventory.add_item(item)
+    last = items[-1]
+
+    def step() -> int:
+        for _ in range(BATCH):
+            if mode == "changed":
+                inventory.remove_item(last.uuid)
+                inventory.add_item(last)
+            str(inventory)
+        return BATCH
+
+    return step
+
+
+@benchmark("full_run", params=("aggressive", "optimal"), unit="runs")
+def full_run(policy: str):
+    policy = {"aggressive": AggressivePolicy, "optimal": OptimalPolicy}[policy]()
+    engine = Engine(policy, rng=GameRandom(SEED))
+    runs = 100
+
+    def step() -> int:
+        for _ in range(runs):
+            engine.run()
+        return runs
+
+    return step
+
+
+@benchmark("transcript_playback", unit="transcripts")
+def transcript_playback(_):
+    transcripts = record_chunk(SEED, 0, 20)
+
+    def step() -> int:
+        play_chunk(transcripts)
+        return len(transcripts)
+
+    return step
@@ -0,0 +1,221 @@
+"""
+A small timing harness in the spirit of pytest-benchmark and asv, with no dependency besides the
+standard library.
+
+A benchmark is a setup function registered with `@benchmark`. It's called once per parameter
+and returns a step: a callable doing a batch of operations and returning how many it did. A
+setup function may also return a `(prepare, step)` pair, `prepare` then runs before every step
+and isn't timed. Results are reported in operations per second.
+"""
+
+import gc
+import math
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_REPEAT = 5
+DEFAULT_MIN_TIME = 0.2
+
+
+@dataclass(frozen=True)
+class Case:
+    """
+    A registered benchmark.
+
+    Attributes:
+        name (str): The name of the benchmark.
+        setup (Callable): Builds the step of a parameter.
+        params (tuple): The parameters the benchmark runs with.
+        unit (str): What an operation is, for the report.
+    """
+    name: str
+    setup: Callable
+    params: Tuple
+    unit: str
+
+
+@dataclass
+class Measurement:
+    """
+    The timings of a benchmark with one parameter.
+
+    Attributes:
+        case (str): The name of the benchmark.
+        param: The parameter, None for benchmarks without parameters.
+        unit (str): What an operation is.
+        ops_per_sec (float): The median throughput over the samples.
+        samples (list): The throughput of every sample.
+    """
+    case: str
+    param: object
+    unit: str
+    ops_per_sec: float
+    samples: List[float]
+
+    @property
+    def key(self) -> str:
+        """
+        Gets the name that identifies the measurement across result files.
+        """
+        return self.case if self.param is None else f"{self.case}[{self.param}]"
+
+    @property
+    def spread(self) -> float:
+        """
+        Gets the relative standard deviation of the samples.
+        """
+        if len(self.samples) < 2 or not self.ops_per_sec:
+            return 0.0
+        return statistics.stdev(self.samples) / self.ops_per_sec
+
+    def to_dict(self) -> dict:
+        """
+        Converts the measurement into a JSON-serializable dict.
+        """
+        return asdict(self)
+
+
+CASES: Dict[str, Case] = {}
+
+
+def benchmark(name: str, params: Sequence = (None,), unit: str = "ops"):
+    """
+    Registers a benchmark.
+
+    Args:
+        name (str): The name of the benchmark.
+        params (Sequence): The parameters to run the benchmark with.
+        unit (str): What an operation is, e.g. "attacks".
+
+    Returns:
+        Callable: The decorator, which registers the setup function and returns it unchanged.
+    """
+    def decorator(setup: Callable) -> Callable:
+        if name in CASES:
+            raise ValueError(f"benchmark {name} is registered twice")
+        CASES[name] = Case(name, setup, tuple(params), unit)
+        return setup
+
+    return decorator
+
+
+def _split(built) -> Tuple[Optional[Callable], Callable]:
+    """
+    Gets the prepare and step callables of what a setup function returned.
+    """
+    if isinstance(built, tuple):
+        return built
+    return None, built
+
+
+def _sample(prepare: Optional[Callable], step: Callable, number: int) -> Tuple[int, float]:
+    """
+    Runs a step `number` times.
+
+    Returns:
+        tuple: The number of operations and the seconds they took, preparation excluded.
+    """
+    ops = 0
+    elapsed = 0.0
+    for _ in range(number):
+        if prepare is not None:
+            prepare()
+        start = time.perf_counter()
+        ops += step()
+        elapsed += time.perf_counter() - start
+
+    return ops, elapsed
+
+
+def measure(case: Case, param, repeat: int = DEFAULT_REPEAT,
+            min_time: float = DEFAULT_MIN_TIME) -> Measurement:
+    """
+    Times a benchmark with one parameter.
+
+    The step runs once to warm up, then enough times per sample for a sample to last at least
+    `min_time` seconds. The garbage collector is disabled while timing, like `timeit` does.
+
+    Args:
+        case (Case): The benchmark.
+        param: The parameter.
+        repeat (int): The number of samples.
+        min_time (float): The minimum duration of a sample in seconds.
+
+    Returns:
+        Measurement: The throughput of every sample.
+    """
+    prepare, step = _split(case.setup(param))
+    _sample(prepare, step, 1)
+
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        number = 1
+        while True:
+            ops, elapsed = _sample(prepare, step, number)
+            if elapsed >= min_time:
+                break
+            number *= max(2, min(10, math.ceil(min_time / max(elapsed, 1e-9))))
+
+        samples = [ops / elapsed]
+        for _ in range(repeat - 1):
+            ops, elapsed = _sample(prepare, step, number)
+            samples.append(ops / elapsed)
+    finally:
+        if enabled:
+            gc.enable()
+
+    return Measurement(case.name, param, case.unit, statistics.median(samples), samples)
+
+
+def run(pattern: str = "", repeat: int = DEFAULT_REPEAT, min_time: float = DEFAULT_MIN_TIME,
+        report: Callable[[Measurement], None] = None) -> List[Measurement]:
+    """
+    Times every registered benchmark whose name contains `pattern`.
+
+    Args:
+        pattern (str): Filter on the benchmark names, all benchmarks by default.
+        repeat (int): The number of samples per parameter.
+        min_time (float): The minimum duration of a sample in seconds.
+        report (Callable): Called with every measurement as soon as it's done.
+
+    Returns:
+        list: The measurements, in registration order.
+    """
+    measurements = []
+    for case in CASES.values():
+        if pattern not in case.name:
+            continue
+        for param in case.params:
+            measurement = measure(case, param, repeat, min_time)
+            measurements.append(measurement)
+            if report is not None:
+                report(measurement)
+
+    return measurements
+
+
+def compare(old: Dict[str, dict], new: Dict[str, dict],
+            threshold: float) -> List[Tuple[str, Optional[float], Optional[float], bool]]:
+    """
+    Compares two sets of results.
+
+    Args:
+        old (dict): The baseline measurements by key, as stored in a result file.
+        new (dict): The new measurements by key.
+        threshold (float): The relative slowdown above which a change is a regression.
+
+    Returns:
+        list: (key, old ops/sec, new ops/sec, regressed) for every key of either set, a missing
+            side is None.
+    """
+    rows = []
+    for key in list(old) + [key for key in new if key not in old]:
+        before = old[key]["ops_per_sec"] if key in old else None
+        after = new[key]["ops_per_sec"] if key in new else None
+        regressed = bool(before and after is not None and after < before * (1 - threshold))
+        rows.append((key, before, after, regressed))
+
+    return rows
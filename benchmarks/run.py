@@ -0,0 +1,147 @@
+"""
+Runs the benchmarks and compares results across commits.
+
+Every run is saved as JSON in `benchmarks/results/`, named after the commit it ran on, so a
+regression can be found by comparing the files of two commits.
+
+Usage:
+    python benchmarks/run.py                          # run everything, save the results
+    python benchmarks/run.py --filter inventory       # only the inventory benchmarks
+    python benchmarks/run.py --compare main.json      # run, then compare with a baseline
+    python benchmarks/run.py --compare a.json b.json  # compare two saved runs
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+import cases  # noqa: E402
+from harness import DEFAULT_MIN_TIME, DEFAULT_REPEAT, Measurement, compare, run  # noqa: E402
+
+DEFAULT_THRESHOLD = 0.1
+
+
+def commit() -> str:
+    """
+    Gets the short hash of the checked out commit, with a `-dirty` suffix if the tree has
+    uncommitted changes.
+
+    Returns:
+        str: The commit, "unknown" outside of a git checkout.
+    """
+    try:
+        head = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, check=True,
+                              capture_output=True, text=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                cwd=ROOT, check=True, capture_output=True, text=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+    return head + ("-dirty" if status.strip() else "")
+
+
+def report(measurement: Measurement) -> None:
+    """
+    Prints a measurement.
+    """
+    print(f"{measurement.key:<28} {measurement.ops_per_sec:>14,.1f} {measurement.unit}/s "
+          f"(±{measurement.spread:.1%})", flush=True)
+
+
+def load(path: str) -> dict:
+    """
+    Reads a result file.
+
+    Returns:
+        dict: The measurements by key.
+    """
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)["results"]
+
+
+def show_comparison(old: dict, new: dict, threshold: float) -> bool:
+    """
+    Prints the change of every measurement between two runs.
+
+    Returns:
+        bool: True if a benchmark got slower by more than `threshold`.
+    """
+    regressed = False
+    print(f"\n{'benchmark':<28} {'before':>14} {'after':>14} {'change':>9}")
+
+    for key, before, after, slower in compare(old, new, threshold):
+        if before is None or after is None:
+            change = "new" if before is None else "gone"
+        else:
+            change = f"{after / before - 1:+.1%}"
+
+        before, after = (f"{value:,.1f}" if value is not None else "-" for value in (before, after))
+        flag = "  ⚠️ slower" if slower else ""
+        print(f"{key:<28} {before:>14} {after:>14} {change:>9}{flag}")
+        regressed |= slower
+
+    return regressed
+
+
+def main() -> None:
+    """
+    Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Benchmarks of the dungeon crawler.")
+    parser.add_argument("--filter", default="", help="only run benchmarks containing this")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="samples per benchmark")
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME,
+                        help="minimum seconds per sample")
+    parser.add_argument("--output", default=None,
+                        help="result file, results/<commit>.json by default")
+    parser.add_argument("--compare", nargs="+", metavar="RESULTS",
+                        help="a baseline to compare this run with, or two files to compare "
+                             "without running anything")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown reported as a regression")
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) > 2:
+        parser.error("--compare takes one or two result files")
+
+    if args.compare and len(args.compare) == 2:
+        old, new = (load(path) for path in args.compare)
+        sys.exit(1 if show_comparison(old, new, args.threshold) else 0)
+
+    cases.headless()
+    measurements = run(args.filter, args.repeat, args.min_time, report)
+
+    revision = commit()
+    document = {
+        "commit": revision,
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": {measurement.key: measurement.to_dict() for measurement in measurements},
+    }
+
+    path = args.output or os.path.join(RESULTS_DIR, f"{revision}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(document, file, indent=2)
+    print(f"\n💾 Results saved to {path}")
+
+    if args.compare:
+        # A filtered run is only compared with the benchmarks it ran
+        new = document["results"]
+        old = {key: value for key, value in load(args.compare[0]).items() if key in new}
+        regressed = show_comparison(old, new, args.threshold)
+        sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Dungeon Crawler, a text-based role-playing game where a hero explores a dungeon, fights goblins,
+collects items and levels up.
+
+Importing the package is cheap: the public names below are only imported from their module on
+first access, so a process that only needs the engine never loads the simulation, the server and
+asyncio, the persistence and sqlite, or NumPy.
+
+    from dungeon_crawler import Engine, Game
+
+The game is played with `dungeon-crawler` (or `python -m dungeon_crawler`), the other tools are
+`dungeon-crawler-server`, `dungeon-crawler-simulate`, `dungeon-crawler-sweep` and
+`dungeon-crawler-playback`.
+"""
+
+from importlib import import_module
+
+__version__ = "1.0.0"
+
+_EXPORTS = {
+    "Game": "game",
+    "GameState": "game",
+    "Engine": "engine",
+    "AggressivePolicy": "engine",
+    "OptimalPolicy": "solver",
+    "Character": "character",
+    "Player": "player",
+    "Enemy": "enemy",
+    "Goblin": "enemy",
+    "Item": "item",
+    "Inventory": "inventory",
+    "GameRandom": "rng",
+    "RealClock": "clock",
+    "ZeroClock": "clock",
+    "WarpClock": "clock",
+    "VirtualClock": "clock",
+    "GameServer": "server",
+    "Checkpointer": "snapshot",
+    "SavedGame": "snapshot",
+    "BinaryLogSink": "eventlog",
+    "ScriptedConsole": "playback",
+    "Transcript": "playback",
+    "Dungeon": "dungeon",
+    "create_enemy": "content",
+    "create_item": "content",
+}
+
+__all__ = sorted(_EXPORTS) + ["__version__"]
+
+
+def __getattr__(name: str):
+    """
+    Imports a public name from its module the first time it's accessed.
+    """
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
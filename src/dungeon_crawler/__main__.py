@@ -3,7 +3,9 @@
 @title: Dungeon Crawler
 """
 
-from game import Game
+import asyncio
+
+from .game import Game
 
 
 def main() -> None:
@@ -11,7 +13,8 @@ def main() -> None:
     Main entry point
     """
     game = Game()
-    game.start_game()
+
+    asyncio.run(game.start_game())
 
 
 if __name__ == "__main__":
@@ -3,8 +3,13 @@ Module that defines different actions that can be performed during combat.
 """
 
 from enum import Enum, auto
-from random import randint
-from player import PlayerState
+from .console import read, write
+from .events import NULL_SINK, EventType, emit_attack
+
+
+class PlayerState(Enum):
+    IDLE = auto(),
+    IN_COMBAT = auto(),
 
 
 class ActionResult(Enum):
@@ -15,12 +20,17 @@ class ActionResult(Enum):
 
 
 class Action:
-    """Base class for all actions that can be performed in combat."""
+    """
+    Base class for all actions that can be performed in combat.
+
+    Actions report their outcome to the `sink` passed by the combat, along with the
+    current `turn`.
+    """
 
     def can_perform(self, actor):
         raise NotImplementedError()
 
-    def perform(self, actor, *args, **kwargs) -> ActionResult:
+    async def perform(self, actor, *args, **kwargs) -> ActionResult:
         """Performs the action."""
         raise NotImplementedError()
 
@@ -31,14 +41,16 @@ class AttackAction(Action):
     def can_perform(self, actor):
         return actor.state == PlayerState.IN_COMBAT
 
-    def perform(self, actor, *args, **kwargs) -> ActionResult:
+    async def perform(self, actor, *args, **kwargs) -> ActionResult:
         """Execute the attack action by attacking a target."""
         target = kwargs.get('target')  # Retrieve target from kwargs
         if actor and target:
-            actor.attack(target)
+            result = actor.attack(target)
+            emit_attack(kwargs.get("sink", NULL_SINK), kwargs.get("turn", 0), actor, target,
+                        result)
             return ActionResult.CONTINUE
 
-        print("❌ Attack failed: Invalid actor or target.")
+        write("❌ Attack failed: Invalid actor or target.")
         return ActionResult.NONE
 
 
@@ -48,13 +60,53 @@ class FleeAction(Action):
     def can_perform(self, actor):
         return actor.state == PlayerState.IN_COMBAT
 
-    def perform(self, actor, *args, **kwargs) -> ActionResult:
+    async def perform(self, actor, *args, **kwargs) -> ActionResult:
         """Execute the flee action, attempting to escape combat."""
-        if randint(1, 100) <= actor.flee_chance:
-            print(f"💨 \033[1m{actor.name}\033[0m fled the fight!")
+        fled = actor.attempt_flee()
+        kwargs.get("sink", NULL_SINK).emit(EventType.FLEE, turn=kwargs.get("turn", 0),
+                                           success=fled)
+
+        if fled:
+            write(f"💨 \033[1m{actor.name}\033[0m fled the fight!")
+            return ActionResult.END
+
+        write(f"⚠️ \033[1m{actor.name}\033[0m failed to flee and must continue fighting!")
+        return ActionResult.CONTINUE
+
+
+class DrinkAction(Action):
+    """Action for an enemy drinking one of its potions."""
+
+    def can_perform(self, actor):
+        return actor.potions > 0
+
+    async def perform(self, actor, *args, **kwargs) -> ActionResult:
+        """Execute the drink action, restoring some of the enemy's health."""
+        healed = actor.drink_potion()
+        kwargs.get("sink", NULL_SINK).emit(EventType.ENEMY_HEAL, turn=kwargs.get("turn", 0),
+                                           enemy=actor.position, health=actor.health)
+        write(f"🧪 \033[1m{actor.name}\033[0m drank a potion and recovered "
+              f"\033[1m{healed} health\033[0m!")
+        return ActionResult.CONTINUE
+
+
+class EscapeAction(Action):
+    """Action for an enemy running away from combat."""
+
+    def can_perform(self, actor):
+        return not actor.escaped
+
+    async def perform(self, actor, *args, **kwargs) -> ActionResult:
+        """Execute the escape action, the enemy leaves the fight if it succeeds."""
+        escaped = actor.escape()
+        kwargs.get("sink", NULL_SINK).emit(EventType.ENEMY_ESCAPE, turn=kwargs.get("turn", 0),
+                                           enemy=actor.position, success=escaped)
+
+        if escaped:
+            write(f"💨 \033[1m{actor.name}\033[0m ran away!")
             return ActionResult.END
 
-        print(f"⚠️ \033[1m{actor.name}\033[0m failed to flee and must continue fighting!")
+        write(f"⚠️ \033[1m{actor.name}\033[0m tried to run away but stumbled!")
         return ActionResult.CONTINUE
 
 
@@ -64,22 +116,22 @@ class UseItemAction(Action):
     def can_perform(self, actor):
         return True
 
-    def perform(self, actor, *args, **kwargs) -> ActionResult:
+    async def perform(self, actor, *args, **kwargs) -> ActionResult:
         while True:
-            print(actor.inventory)
+            write(actor.inventory)
 
-            item_uuid = input("\n❔ Which item do you want to use? \033[1m('c' or 'continue' to "
-                              "continue)\033[0m: ")
+            item_uuid = await read("\n❔ Which item do you want to use? \033[1m('c' or "
+                                   "'continue' to continue)\033[0m: ")
             if item_uuid.lower() in ("c", "continue"):
                 break
 
             item = actor.inventory.find_item(item_uuid)
             if item:
                 actor.inventory.use_item(item, actor)
-                print()
+                write()
                 continue
 
-            print(f"\n❌ \033[1m{actor.name}\033[0m doesnt have \033[1m{item_uuid}\033[0m!\n")
+            write(f"\n❌ \033[1m{actor.name}\033[0m doesnt have \033[1m{item_uuid}\033[0m!\n")
 
         return ActionResult.NONE
 
@@ -90,7 +142,16 @@ class ContinueAction(Action):
     def can_perform(self, actor):
         return actor.state == PlayerState.IDLE
 
-    def perform(self, actor, *args, **kwargs) -> ActionResult:
-        print(f"👟 \033[1m{actor.name}\033[0m continues his adventure.")
+    async def perform(self, actor, *args, **kwargs) -> ActionResult:
+        write(f"👟 \033[1m{actor.name}\033[0m continues his adventure.")
 
         return ActionResult.END
+
+
+# Actions keep no state of their own, so every character shares these instances
+ATTACK = AttackAction()
+FLEE = FleeAction()
+USE_ITEM = UseItemAction()
+DRINK = DrinkAction()
+ESCAPE = EscapeAction()
+CONTINUE = ContinueAction()
@@ -0,0 +1,140 @@
+"""
+This module defines the policies that decide what enemies do on their turn.
+
+A policy picks one of the enemy actions (`ATTACK`, `HEAL` or `FLEE`) from the state of the
+enemy and of the hero. Decisions are made for a whole group at once with `decide_batch`, so the
+vectorized policies of `tactics` (`utility` and `tree`) score the actions of a whole horde in a
+single NumPy pass instead of one Python-level evaluation per goblin. Policies are deterministic
+and draw nothing from the game's generator, so deciding a group in one batch or one enemy at a
+time gives the same result.
+
+Policies keep no state of their own, every enemy of a kind shares the instance returned by
+`get_policy` for the name used by the `ai` field of `data/enemies.json`. The default `attack`
+policy doesn't need NumPy, `tactics` is only imported once another policy is asked for.
+"""
+
+from functools import lru_cache
+from typing import List, Optional, Sequence
+
+ATTACK = "attack"
+HEAL = "heal"
+FLEE = "flee"
+
+ACTIONS = (ATTACK, HEAL, FLEE)
+
+POLICY_NAMES = ("attack", "utility", "tree")
+
+
+class EnemyPolicy:
+    """
+    Base class for enemy policies.
+    """
+
+    name = ""
+
+    def decide(self, enemy, hero) -> str:
+        """
+        Picks the action of a single enemy.
+
+        Args:
+            enemy (Enemy): The acting enemy.
+            hero (Character): The hero it fights.
+
+        Returns:
+            str: The name of the action.
+        """
+        return self.decide_batch([enemy], hero)[0]
+
+    def decide_batch(self, enemies: Sequence, hero) -> List[str]:
+        """
+        Picks the actions of a group of enemies.
+
+        Args:
+            enemies (Sequence[Enemy]): The acting enemies.
+            hero (Character): The hero they fight.
+
+        Returns:
+            list: The name of every enemy's action.
+        """
+        raise NotImplementedError()
+
+    @staticmethod
+    def target(enemy, targets: Sequence):
+        """
+        Picks who to attack: the living target with the lowest health, the first one on ties.
+
+        Args:
+            enemy (Enemy): The attacking enemy.
+            targets (Sequence[Character]): The characters it can attack.
+
+        Returns:
+            Character: The target, None if they are all dead.
+        """
+        living = [target for target in targets if target.alive()]
+        return min(living, key=lambda target: target.health) if living else None
+
+
+class AttackPolicy(EnemyPolicy):
+    """
+    Always attacks, the behavior of every enemy before policies existed. Nothing is scored.
+    """
+
+    name = "attack"
+
+    def decide(self, enemy, hero) -> str:
+        return ATTACK
+
+    def decide_batch(self, enemies: Sequence, hero) -> List[str]:
+        return [ATTACK] * len(enemies)
+
+
+DEFAULT_POLICY = AttackPolicy()
+
+
+@lru_cache(maxsize=None)
+def get_policy(name: str) -> EnemyPolicy:
+    """
+    Gets the shared instance of a policy.
+
+    Args:
+        name (str): The name of the policy, one of `POLICY_NAMES`.
+
+    Returns:
+        EnemyPolicy: The policy.
+
+    Raises:
+        KeyError: If no policy has this name.
+    """
+    if name == DEFAULT_POLICY.name:
+        return DEFAULT_POLICY
+
+    from .tactics import BATCHED_POLICIES
+    return BATCHED_POLICIES[name]()
+
+
+def decide_all(enemies: Sequence, hero) -> List[str]:
+    """
+    Picks the actions of a group of enemies, with one batch per policy.
+
+    Args:
+        enemies (Sequence[Enemy]): The acting enemies.
+        hero (Character): The hero they fight.
+
+    Returns:
+        list: The name of every enemy's action, in the order of `enemies`.
+    """
+    groups = {}
+    for position, enemy in enumerate(enemies):
+        groups.setdefault(id(enemy.policy), (enemy.policy, []))[1].append(position)
+
+    if len(groups) == 1:
+        policy = enemies[0].policy
+        return policy.decide_batch(enemies, hero)
+
+    actions: List[Optional[str]] = [None] * len(enemies)
+    for policy, positions in groups.values():
+        for position, name in zip(positions,
+                                  policy.decide_batch([enemies[p] for p in positions], hero)):
+            actions[position] = name
+
+    return actions
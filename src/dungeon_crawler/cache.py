@@ -0,0 +1,226 @@
+"""
+This module defines `ResultCache`, an on-disk cache of simulation results.
+
+The games of a simulation are played in chunks seeded by (seed, chunk index), so the report of
+a chunk only depends on the rules of the game, the seed, the chunk and the policy. The cache
+stores every report under a hash of all of these: a repeated sweep point comes back without
+playing a game, and a longer run only plays the chunks it adds.
+
+The rules are the mechanical `config` constants, the stats of a fresh hero and the content
+files, see `rules_digest`. Changes to the code of the engine aren't part of the key, bump
+`CACHE_VERSION` with any change that alters results.
+
+Reports are stored compressed in a single SQLite file. Every hit refreshes its entry, and the
+least recently used entries are evicted once the reports take more than `max_bytes`.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import zlib
+from typing import Optional
+
+from . import config
+from .content import DATA_DIR
+from .player import Player
+from .rng import GameRandom
+
+CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+EVICTION_BATCH = 256
+
+RULE_CONSTANTS = (
+    "CHARACTER_CRIT_CHANCE",
+    "CHARACTER_FLEE_CHANCE",
+    "HERO_XP_GAIN_RANGE",
+    "HERO_DODGE_CHANCE",
+    "GAME_MAX_DAYS",
+    "GAME_STARTING_DAY",
+    "GAME_SPELLBOOK_DAY",
+    "POTION_EFFECT_RANGE",
+    "POTION_FIND_CHANCE",
+    "POTION_SUPER_FIND_CHANCE",
+    "FIREBALL_XP",
+    "ENEMY_LOW_HEALTH",
+    "ENEMY_POTION_HEALTH",
+    "GOBLIN_NAMES",
+    "GOBLIN_HEALTH",
+    "GOBLIN_DAMAGE",
+    "GOBLIN_CRIT_CHANCE",
+    "GOBLIN_FLEE_CHANCE",
+    "GOBLIN_GROUP_SIZE",
+)
+
+HERO_STATS = ("health_max", "damage", "speed", "flee_chance", "crit_chance", "dodge_chance")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_used ON results (used);
+"""
+
+
+def rules_digest() -> str:
+    """
+    Hashes the current rules of the game: the `RULE_CONSTANTS` of `config`, the stats of a
+    fresh hero and the content files. Pacing and texts don't change results and are left out.
+
+    Returns:
+        str: The digest in hexadecimal.
+    """
+    hero = Player(rng=GameRandom(0))
+    rules = {
+        "config": {name: getattr(config, name) for name in RULE_CONSTANTS},
+        "hero": {stat: getattr(hero, stat) for stat in HERO_STATS},
+    }
+
+    digest = hashlib.sha256(json.dumps(rules, sort_keys=True).encode())
+    for name in sorted(os.listdir(DATA_DIR)):
+        with open(os.path.join(DATA_DIR, name), "rb") as file:
+            digest.update(name.encode())
+            digest.update(file.read())
+
+    return digest.hexdigest()
+
+
+def chunk_key(rules: str, seed: int, index: int, runs: int, policy: str) -> str:
+    """
+    Gets the key of a simulation chunk.
+
+    Args:
+        rules (str): The `rules_digest` the chunk is played with.
+        seed (int): The seed of the simulation.
+        index (int): The index of the chunk.
+        runs (int): The number of games of the chunk.
+        policy (str): The name of the policy.
+
+    Returns:
+        str: The key in hexadecimal.
+    """
+    text = json.dumps([CACHE_VERSION, rules, seed, index, runs, policy])
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    A size-bounded LRU cache of JSON-serializable results in a SQLite file.
+
+    Writes are committed by `flush` and `close`, the cache is meant to be written by a single
+    process, e.g. the parent of a simulation's workers.
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """
+        Args:
+            path (str): The file of the cache, created if it doesn't exist.
+            max_bytes (int): The size of the stored results above which entries are evicted.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(SCHEMA)
+        used, size = self.connection.execute(
+            "SELECT COALESCE(MAX(used), 0), COALESCE(SUM(size), 0) FROM results").fetchone()
+        self._tick = used
+        self.size = size
+
+    def __enter__(self) -> "ResultCache":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def _touch(self) -> int:
+        """
+        Advances the access counter, which orders the entries from least to most recently used.
+        """
+        self._tick += 1
+        return self._tick
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Gets a result and marks it as recently used.
+
+        Args:
+            key (str): The key of the result.
+
+        Returns:
+            dict: The result, None if it isn't cached.
+        """
+        row = self.connection.execute("SELECT value FROM results WHERE key = ?",
+                                      (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.connection.execute("UPDATE results SET used = ? WHERE key = ?",
+                                (self._touch(), key))
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key: str, value: dict) -> None:
+        """
+        Stores a result, then evicts the least recently used ones if the cache is too big.
+
+        Args:
+            key (str): The key of the result.
+            value (dict): The JSON-serializable result.
+        """
+        blob = zlib.compress(json.dumps(value, separators=(",", ":")).encode())
+        row = self.connection.execute("SELECT size FROM results WHERE key = ?",
+                                      (key,)).fetchone()
+        if row is not None:
+            self.size -= row[0]
+
+        self.connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                                (key, blob, len(blob), self._touch()))
+        self.size += len(blob)
+        self.evict()
+
+    def evict(self) -> int:
+        """
+        Removes the least recently used results until the cache fits in `max_bytes`.
+
+        Returns:
+            int: The number of evicted results.
+        """
+        evicted = 0
+        while self.size > self.max_bytes:
+            rows = self.connection.execute("SELECT key, size FROM results ORDER BY used LIMIT ?",
+                                           (EVICTION_BATCH,)).fetchall()
+            if not rows:
+                break
+
+            for key, size in rows:
+                self.connection.execute("DELETE FROM results WHERE key = ?", (key,))
+                self.size -= size
+                evicted += 1
+                if self.size <= self.max_bytes:
+                    break
+
+        return evicted
+
+    def flush(self) -> None:
+        """
+        Commits the pending writes.
+        """
+        self.connection.commit()
+
+    def close(self) -> None:
+        """
+        Commits the pending writes and closes the file.
+        """
+        self.connection.commit()
+        self.connection.close()
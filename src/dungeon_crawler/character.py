@@ -6,35 +6,58 @@ all enemy characters.
 """
 
 from dataclasses import dataclass
-from random import randint
-from typing import Optional
-from inventory import Inventory
-import action
+from typing import NamedTuple, Optional, Tuple
+from .inventory import Inventory
+from .rng import GameRandom, default_rng
+from .console import write
+from . import action
+from . import config
 
 DEFAULT_NAME = "Unnamed"
 DEFAULT_HEALTH = 100
 DEFAULT_DAMAGE = 20
 DEFAULT_ICON = "❌"
+DEFAULT_SPEED = 100
 
 
 @dataclass
 class CharacterAttributes:
+    # Slots are declared by hand, `dataclass(slots=True)` needs Python 3.10, and fields can't
+    # have class-level defaults alongside them
+    __slots__ = ("health", "health_max", "damage", "flee_chance", "crit_chance", "speed")
+
     health: int
     health_max: int
     damage: int
     flee_chance: int
     crit_chance: int
+    speed: int
+
+
+class AttackResult(NamedTuple):
+    """Outcome of a single attack, resolved without any output."""
+    damage: int
+    crit: bool
+    dodged: bool
 
 
 class Character:
     """
         Base class for all characters in the game (heroes and enemies).
         Handles basic attributes like health, damage, and actions like attack and fleeing.
+
+        Characters are slotted and share their (stateless) actions through the class-level
+        `actions` mapping, so large populations stay small in memory.
     """
 
+    __slots__ = ("_name", "_icon", "_attributes", "inventory", "rng", "_version", "_panel")
+
+    actions = {}
+    is_hero = False
+
     def __init__(self, name: str = DEFAULT_NAME, health: int = DEFAULT_HEALTH,
                  damage: int = DEFAULT_DAMAGE,
-                 icon: str = DEFAULT_ICON) -> None:
+                 icon: str = DEFAULT_ICON, rng: Optional[GameRandom] = None) -> None:
         """
         Initializes a character with the given attributes.
 
@@ -43,6 +66,7 @@ class Character:
             health (int): The health points of the character.
             damage (int): The damage the character can inflict.
             icon (str): The visual representation of the character.
+            rng (GameRandom): The generator of the character's rolls, usually the game's.
         """
 
         self._name = name
@@ -51,48 +75,108 @@ class Character:
             health=health,
             health_max=health,
             damage=damage,
-            flee_chance=25,
-            crit_chance=50,
+            flee_chance=config.CHARACTER_FLEE_CHANCE,
+            crit_chance=config.CHARACTER_CRIT_CHANCE,
+            speed=DEFAULT_SPEED,
         )
 
-        self._inventory: Optional[Inventory] = None
+        self.inventory: Optional[Inventory] = None
+        self.rng = rng or default_rng()
 
-        self.actions = {}
+        self._version = 0
+        self._panel: Optional[Tuple[object, str]] = None
 
     def __str__(self) -> str:
         """
         Prints the character's current health and name.
+
+        The text is rendered again only when `version` changed since the last call.
+        """
+        version = self.version
+        if self._panel is None or self._panel[0] != version:
+            self._panel = (version, self.render())
+
+        return self._panel[1]
+
+    def render(self) -> str:
+        """
+        Renders the character's status panel.
+
+        Returns:
+            str: The name, health and damage of the character.
         """
         return (f"\033[1m{self.icon} {self.name}'s\033[0m status:\n"
                 f"    ❤️ Health: {self.health} / {self.health_max}\n"
                 f"    💥 Damage: {self._attributes.damage}")
 
-    def attack(self, target: "Character") -> None:
+    @property
+    def version(self) -> int:
+        """
+        Gets the version of the character's status panel, which changes whenever one of the
+        stats it shows changes.
+
+        Returns:
+            int: The version counter.
+        """
+        return self._version
+
+    def attack(self, target: "Character") -> AttackResult:
         """
         Attacks a target, reducing their health by the character's damage.
 
         Args:
             target (Character): The target character being attacked.
+
+        Returns:
+            AttackResult: The damage dealt and whether it was a crit or was dodged.
+        """
+        result = self.resolve_attack(target)
+
+        if result.dodged:
+            write(f"💨 \033[1m{target.name}\033[0m swiftly dodged the attack!")
+            return result
+
+        crit_text = "\033[1mCRIT!\033[0m " if result.crit else ""
+
+        write(f"🗡️ {crit_text}\033[1m{self.name}\033[0m attacked {target.icon} \033[1"
+              f"m{target.name}\033[0m"
+              f" for \033[1m{result.damage} damage!\033[0m")
+
+        return result
+
+    def resolve_attack(self, target: "Character") -> AttackResult:
+        """
+        Rolls and applies an attack on a target without producing any output.
+
+        Args:
+            target (Character): The target character being attacked.
+
+        Returns:
+            AttackResult: The damage dealt and whether it was a crit or was dodged.
         """
         damage = self._attributes.damage
-        crit_text = ""
+        crit = self.rng.randint(1, 100) <= self._attributes.crit_chance
 
-        if randint(1, 100) <= self._attributes.crit_chance:
+        if crit:
             damage *= 1.5
             damage = round(damage)
-            crit_text = "\033[1mCRIT!\033[0m "
 
         if target.pre_damage():
-            return
+            return AttackResult(0, crit, True)
 
-        new_health = target.health - damage
-        target.health = new_health
+        target.health = target.health - damage
+        return AttackResult(damage, crit, False)
 
-        print(f"🗡️ {crit_text}\033[1m{self.name}\033[0m attacked {target.icon} \033[1"
-              f"m{target.name}\033[0m"
-              f" for \033[1m{damage} damage!\033[0m")
+    def attempt_flee(self) -> bool:
+        """
+        Rolls the character's chance to escape from combat.
 
-    def perform_action(self, action_name: str, *args, **kwargs):
+        Returns:
+            bool: True if the character managed to flee, False otherwise.
+        """
+        return self.rng.randint(1, 100) <= self._attributes.flee_chance
+
+    async def perform_action(self, action_name: str, *args, **kwargs):
         """
         Executes the specified action for the character.
 
@@ -109,9 +193,9 @@ class Character:
         act = self.actions.get(action_name)
 
         if act:
-            return act.perform(self, *args, **kwargs)
+            return await act.perform(self, *args, **kwargs)
 
-        print("❌ Invalid action.")
+        write("❌ Invalid action.")
         return action.ActionResult.NONE
 
     def pre_damage(self):
@@ -119,13 +203,23 @@ class Character:
         Checks if any special conditions or actions should occur before taking damage.
 
         This method can be overridden in subclasses to implement specific behavior,
-        such as blocking or dodging, before damage is applied to the character.
+        such as blocking or dodging, before damage is applied to the character. It must not
+        produce any output, `attack` reports the result.
 
         Returns:
-            bool: Returns False by default, indicating no special pre-damage action is taken.
+            bool: True if the damage is avoided, False by default.
         """
         return False
 
+    def fighting(self) -> bool:
+        """
+        Checks if the character is still taking part in the combat.
+
+        Returns:
+            bool: True while the character is alive, subclasses can leave a fight earlier.
+        """
+        return self._attributes.health > 0
+
     def alive(self) -> bool:
         """
         Checks if the character is dead (health <= 0).
@@ -154,6 +248,7 @@ class Character:
             name (str): The name to assign to the character.
         """
         self._name = name
+        self._version += 1
 
     @property
     def icon(self) -> str:
@@ -174,6 +269,7 @@ class Character:
             icon (str): The icon to represent the character.
         """
         self._icon = icon
+        self._version += 1
 
     @property
     def health(self) -> int:
@@ -195,7 +291,10 @@ class Character:
         Args:
             health (int): The new health value.
         """
-        self._attributes.health = min(health, self.health_max)
+        health = min(health, self.health_max)
+        if health != self._attributes.health:
+            self._attributes.health = health
+            self._version += 1
 
     @property
     def health_max(self) -> int:
@@ -216,3 +315,69 @@ class Character:
             health_max (int): The new maximum health value.
         """
         self._attributes.health_max = health_max
+        self._version += 1
+
+    @property
+    def attributes(self) -> CharacterAttributes:
+        """
+        Gets the character's combat attributes.
+
+        Changes made directly to the record don't update `version`, stats shown in the status
+        panel should be changed through their properties.
+
+        Returns:
+            CharacterAttributes: The mutable attributes record of the character.
+        """
+        return self._attributes
+
+    @property
+    def damage(self) -> int:
+        """
+        Gets the character's base damage.
+
+        Returns:
+            int: The damage dealt by a regular attack.
+        """
+        return self._attributes.damage
+
+    @damage.setter
+    def damage(self, damage: int) -> None:
+        """
+        Sets the character's base damage.
+
+        Args:
+            damage (int): The new damage value.
+        """
+        self._attributes.damage = damage
+        self._version += 1
+
+    @property
+    def flee_chance(self) -> int:
+        """
+        Gets the character's chance to flee from combat.
+
+        Returns:
+            int: The flee chance in percent.
+        """
+        return self._attributes.flee_chance
+
+    @property
+    def crit_chance(self) -> int:
+        """
+        Gets the character's chance to land a critical hit.
+
+        Returns:
+            int: The crit chance in percent.
+        """
+        return self._attributes.crit_chance
+
+    @property
+    def speed(self) -> int:
+        """
+        Gets the character's speed, which sets how often they act in combat. A character with
+        twice the `DEFAULT_SPEED` acts twice per turn.
+
+        Returns:
+            int: The speed.
+        """
+        return self._attributes.speed
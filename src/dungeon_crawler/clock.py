@@ -0,0 +1,157 @@
+"""
+This module defines the clocks that pace a game session.
+
+Every pacing delay of a session goes through the clock of its console, see `console.pause`.
+The clock decides how long the delay really takes and keeps the time of the session:
+
+- `RealClock` waits for the whole delay, the way a player experiences the game.
+- `ZeroClock` skips every delay.
+- `WarpClock` waits for a fraction of every delay and runs its time that much faster.
+- `VirtualClock` never waits, its time only moves forward by the delays. A scripted session
+  runs at CPU speed, and its clock still reads the duration the player would have perceived,
+  the same on every run.
+"""
+
+import time
+
+
+class Clock:
+    """
+    Base class for the clocks of a session.
+
+    Attributes:
+        paced (float): The total of the delays the session asked for, in seconds.
+    """
+
+    name = ""
+
+    def __init__(self) -> None:
+        self.paced = 0.0
+
+    def now(self) -> float:
+        """
+        Gets the time of the session.
+
+        Returns:
+            float: The time in seconds, only differences between two readings are meaningful.
+        """
+        return time.monotonic()
+
+    async def sleep(self, seconds: float) -> None:
+        """
+        Pauses the session.
+
+        Args:
+            seconds (float): The delay the player perceives.
+        """
+        self.paced += seconds
+        await self.wait(seconds)
+
+    async def wait(self, seconds: float) -> None:
+        """
+        Waits for as long as the clock makes a delay last.
+        """
+        raise NotImplementedError()
+
+
+class RealClock(Clock):
+    """Waits for every delay, the clock of a player in front of the game."""
+
+    name = "real"
+
+    async def wait(self, seconds: float) -> None:
+        # Imported here: sessions on the other clocks never pay for importing asyncio
+        import asyncio
+
+        await asyncio.sleep(seconds)
+
+
+class ZeroClock(Clock):
+    """Skips every delay, without even yielding to the other sessions."""
+
+    name = "zero"
+
+    async def wait(self, seconds: float) -> None:
+        pass
+
+
+class WarpClock(Clock):
+    """
+    Runs time `factor` times faster: a delay waits for `1 / factor` of its duration, and the
+    time of the clock moves `factor` seconds per real second.
+    """
+
+    name = "warp"
+
+    def __init__(self, factor: float) -> None:
+        """
+        Args:
+            factor (float): How much faster time runs, above 0.
+        """
+        if factor <= 0:
+            raise ValueError(f"the warp factor must be above 0, not {factor}")
+
+        super().__init__()
+        self.factor = factor
+        self.origin = time.monotonic()
+
+    def now(self) -> float:
+        return self.origin + (time.monotonic() - self.origin) * self.factor
+
+    async def wait(self, seconds: float) -> None:
+        import asyncio
+
+        await asyncio.sleep(seconds / self.factor)
+
+
+class VirtualClock(Clock):
+    """
+    Never waits, its time only advances by the delays. Two runs of the same scripted session
+    read the same times.
+    """
+
+    name = "virtual"
+
+    def __init__(self, start: float = 0.0) -> None:
+        """
+        Args:
+            start (float): The initial time of the clock.
+        """
+        super().__init__()
+        self.time = start
+
+    def now(self) -> float:
+        return self.time
+
+    async def wait(self, seconds: float) -> None:
+        self.time += seconds
+
+
+CLOCK_NAMES = ("real", "zero", "warp", "virtual")
+
+
+def create_clock(spec: str) -> Clock:
+    """
+    Creates a clock from its command line name.
+
+    Args:
+        spec (str): One of `CLOCK_NAMES`, the warp clock takes its factor after a colon, e.g.
+            "warp:10".
+
+    Returns:
+        Clock: The new clock.
+
+    Raises:
+        ValueError: If the name or the warp factor is invalid.
+    """
+    name, _, argument = spec.partition(":")
+
+    if name == "warp":
+        try:
+            return WarpClock(float(argument))
+        except ValueError:
+            raise ValueError(f"invalid warp clock {spec!r}, expected e.g. 'warp:10'") from None
+    if argument or name not in CLOCK_NAMES:
+        raise ValueError(f"unknown clock {spec!r}, expected one of {', '.join(CLOCK_NAMES)}")
+
+    return {"real": RealClock, "zero": ZeroClock, "virtual": VirtualClock}[name]()
@@ -1,122 +1,431 @@
-from enemy import Enemy
-import config
+import heapq
+from time import perf_counter
+from typing import Iterator, List, Optional, Sequence, Union
 
-from random import randint
-from time import sleep
-from action import ActionResult
-from util import clear, get_yes_no
-from player import Player, PlayerState
+from .enemy import Enemy
+from . import ai
+from . import config
+from . import metrics
+
+from .action import ActionResult
+from .character import DEFAULT_SPEED, Character
+from .console import draw, get_console, pause, read, write
+from .events import EventType, emit_attack
+from .util import clear, get_yes_no
+from .player import Player, PlayerState
+
+ROUND_TICKS = 1000
+SHOWN_ENEMIES = 3
+
+
+class Initiative:
+    """
+    Orders the actions of a combat turn by speed.
+
+    A character acts every `ROUND_TICKS * DEFAULT_SPEED // speed` ticks from tick 0, and turn
+    `n` covers the ticks `[(n - 1) * ROUND_TICKS, n * ROUND_TICKS)`, so a character at the
+    default speed acts once per turn. The queue of a turn is built from the turn number alone,
+    which lets a combat restored at the start of a turn play on exactly as before. Characters
+    acting on the same tick go in the order they were given, and characters that left the fight
+    don't act.
+    """
+
+    def __init__(self, characters: Sequence[Character]) -> None:
+        """
+        Args:
+            characters (Sequence[Character]): Everyone taking part, in tie-breaking order.
+        """
+        self.characters = list(characters)
+
+    @staticmethod
+    def interval(character: Character) -> int:
+        """
+        Gets the number of ticks between two actions of a character.
+        """
+        return max(ROUND_TICKS * DEFAULT_SPEED // max(character.speed, 1), 1)
+
+    def turn(self, turn: int) -> Iterator[Character]:
+        """
+        Yields the fighting characters in the order they act during a turn. Characters that die
+        or escape during the turn are skipped.
+
+        Args:
+            turn (int): The turn number, starting at 1.
+
+        Yields:
+            Character: The next character to act.
+        """
+        start, end = (turn - 1) * ROUND_TICKS, turn * ROUND_TICKS
+        characters = self.characters
+
+        queue = []
+        for order, character in enumerate(characters):
+            if character.fighting():
+                interval = self.interval(character)
+                queue.append((-(-start // interval) * interval, order, interval))
+        heapq.heapify(queue)
+
+        while queue and queue[0][0] < end:
+            tick, order, interval = queue[0]
+            if tick + interval < end:
+                heapq.heapreplace(queue, (tick + interval, order, interval))
+            else:
+                heapq.heappop(queue)
+
+            if characters[order].fighting():
+                yield characters[order]
+
+
+class TargetIndex:
+    """
+    Finds the weakest character of a group still fighting in O(log n).
+
+    Keeps a heap of (health, position) entries. `update` pushes a new entry whenever the health
+    of a character changed, and entries that don't match a character's health anymore are
+    dropped once they reach the top.
+    """
+
+    def __init__(self, characters: Sequence[Character]) -> None:
+        """
+        Args:
+            characters (Sequence[Character]): The group.
+        """
+        self.characters = list(characters)
+        self._positions = {id(character): position
+                           for position, character in enumerate(self.characters)}
+        self._heap = [(character.health, position)
+                      for position, character in enumerate(self.characters)
+                      if character.fighting()]
+        heapq.heapify(self._heap)
+
+    def update(self, character: Character) -> None:
+        """
+        Records the current health of a character of the group.
+        """
+        if character.fighting():
+            heapq.heappush(self._heap, (character.health, self._positions[id(character)]))
+
+    def weakest(self) -> Optional[Character]:
+        """
+        Gets the fighting character with the lowest health, the first one on ties.
+
+        Returns:
+            Character: The weakest character, None if the whole group is dead or gone.
+        """
+        heap = self._heap
+        while heap:
+            health, position = heap[0]
+            character = self.characters[position]
+            if character.health == health and character.fighting():
+                return character
+            heapq.heappop(heap)
+
+        return None
 
 
 class Combat:
-    def __init__(self, game, hero: Player, enemy: Enemy) -> None:
+    def __init__(self, game, hero: Player, enemies: Union[Enemy, Sequence[Enemy]]) -> None:
+        """
+        Args:
+            game (Game): The game the combat belongs to.
+            hero (Player): The hero.
+            enemies: A single enemy or the group of enemies the hero faces.
+        """
         self.game = game
         self.turn = 1
         self.hero = hero
-        self.enemy = enemy
+        self.enemies: List[Enemy] = [enemies] if isinstance(enemies, Enemy) else list(enemies)
+        for position, enemy in enumerate(self.enemies):
+            enemy.position = position
+
+        self.initiative = Initiative([hero] + self.enemies)
+        self.targets = TargetIndex(self.enemies)
+
+        self.start_health = hero.health
+        self.fighting = False
+
+    @property
+    def enemy(self) -> Enemy:
+        """
+        Gets the enemy the hero is facing: the weakest one still fighting, or the first one once
+        they are all defeated or gone.
+        """
+        return self.targets.weakest() or self.enemies[0]
+
+    def enemies_alive(self) -> bool:
+        """
+        Checks whether any enemy is still fighting.
+        """
+        return self.targets.weakest() is not None
+
+    async def prompt(self):
+        for enemy in self.enemies:
+            self.game.sink.emit(EventType.ENCOUNTER, day=self.game.day, enemy=enemy.name,
+                                health=enemy.health, damage=enemy.damage)
 
-    def prompt(self):
-        print("\n" + config.COMBAT_ALERT)
-        print(f"⚔️ \033[1m{self.hero.name}\033[0m encounters:")
-        print(self.enemy)
+        write("\n" + config.COMBAT_ALERT)
+        write(f"⚔️ \033[1m{self.hero.name}\033[0m encounters:")
+        for enemy in self.enemies[:SHOWN_ENEMIES]:
+            write(enemy)
+        if len(self.enemies) > SHOWN_ENEMIES:
+            write(f"    ...and \033[1m{len(self.enemies) - SHOWN_ENEMIES} more\033[0m!")
 
-        if get_yes_no("\n> 🤺 Fight? [Y/n] "):
-            self.fight()
+        if await get_yes_no("\n> 🤺 Fight? [Y/n] "):
+            await self.fight()
         else:
-            self.dont_fight()
+            await self.dont_fight()
 
-    def fight(self) -> None:
+    async def resume(self) -> None:
+        """
+        Continues a restored combat, at the start of the saved turn if the fight had begun, or
+        with the fight prompt otherwise.
         """
-        Simulates a turn-based combat sequence between the hero and the enemy.
+        if self.fighting:
+            await self.fight(resume=True)
+        else:
+            await self.prompt()
+
+    async def fight(self, resume: bool = False) -> None:
+        """
+        Simulates a turn-based combat sequence between the hero and the enemies.
+
+        Every turn, the characters act in the order given by `initiative`. The enemies acting
+        between two turns of the hero attack as one batch.
+
+        Args:
+            resume (bool): Continue at the current turn instead of starting a new fight.
         """
         clear()
 
         self.hero.state = PlayerState.IN_COMBAT
 
-        old_health = self.hero.health
-        self.turn = 1
+        if not resume:
+            self.start_health = self.hero.health
+            self.turn = 1
+            if metrics.ENABLED:
+                metrics.FIGHTS.inc()
+        self.fighting = True
 
-        while self.enemy.alive() and self.hero.alive():
-            sleep(1 * config.GAME_SPEED)
+        while self.enemies_alive() and self.hero.alive():
+            self.game.save()
+            await pause(1)
 
-            print(f"        🕰️ TURN: {self.turn}    ")
-            print("============================")
+            write(f"        🕰️ TURN: {self.turn}    ")
+            write("============================")
 
-            # Display current stats
-            print(self.hero)
-            print()
-            print(self.enemy)
-            print()
+            # Display current stats, the screen was cleared so both panels are drawn
+            draw("hero", self.hero)
+            write()
+            draw("enemy", self.enemy)
+            write()
+            if len(self.enemies) > 1:
+                left = sum(enemy.fighting() for enemy in self.enemies)
+                write(f"👺 Enemies left: \033[1m{left} / {len(self.enemies)}\033[0m\n")
 
-            # If hero flees, break the cycle
-            if self.hero_turn() == ActionResult.END:
-                return
+            pending: List[Enemy] = []
+            for character in self.initiative.turn(self.turn):
+                if character is not self.hero:
+                    pending.append(character)
+                    continue
+
+                await self.enemy_turns(pending)
+                pending = []
+                if not self.hero.alive() or not self.enemies_alive():
+                    break
 
-            sleep(1.5 * config.GAME_SPEED)
-            self.enemy_turn()
+                # If hero flees, break the cycle
+                if await self.hero_turn() == ActionResult.END:
+                    if metrics.ENABLED:
+                        metrics.FIGHT_TURNS.observe(self.turn)
+                    return
 
-            sleep(0.5 * config.GAME_SPEED)
-            if not self.enemy.alive():
-                input("\n> [press \033[1mENTER\033[0m to finish the fight]")
+                await pause(1.5)
+
+            await self.enemy_turns(pending)
+
+            # The game ends once the encounter is over
+            if not self.hero.alive():
+                self.game.sink.emit(EventType.GAME_OVER, day=self.game.day, cause="combat")
+                if metrics.ENABLED:
+                    metrics.FIGHT_TURNS.observe(self.turn)
+                return
+
+            await pause(0.5)
+            if not self.enemies_alive():
+                await read("\n> [press \033[1mENTER\033[0m to finish the fight]")
             else:
-                input("\n> [press \033[1mENTER\033[0m to continue your next turn...]")
+                await read("\n> [press \033[1mENTER\033[0m to continue your next turn...]")
 
             self.turn += 1
             clear()
 
-        damage = old_health - self.hero.health
+        damage = self.start_health - self.hero.health
+        defeated = [enemy for enemy in self.enemies if not enemy.escaped]
+        escaped = len(self.enemies) - len(defeated)
+
+        if metrics.ENABLED:
+            metrics.FIGHT_TURNS.observe(self.turn - 1)
 
-        # Random experience gained from defeating enemy
-        xp = randint(*config.HERO_XP_GAIN_RANGE)
+        if not defeated:
+            self.game.sink.emit(EventType.ENEMIES_FLED, day=self.game.day, turns=self.turn - 1)
+            self.hero.state = PlayerState.IDLE
+            write(f"\n💨 The enemies ran away from \033[1m{self.hero.name}\033[0m!")
+            write(f"    🩸 Damage taken: {damage}")
+            return
+
+        # Random experience gained from every defeated enemy
+        xp = sum(self.game.rng.randint(*config.HERO_XP_GAIN_RANGE) for _ in defeated)
         self.hero.add_experience(xp)
 
-        print("\n" + config.COMBAT_VICTORY)
-        print(f"⚔️ {self.enemy.name} defeated!")
-        print(f"    🩸 Damage taken: {damage}")
-        print(f"    ✨ Experience gained: {xp}")
+        self.game.sink.emit(EventType.VICTORY, day=self.game.day, turns=self.turn - 1)
+        self.game.sink.emit(EventType.XP_GAIN, amount=xp, experience=self.hero.experience)
+
+        write("\n" + config.COMBAT_VICTORY)
+        if len(self.enemies) == 1:
+            write(f"⚔️ {self.enemies[0].name} defeated!")
+        else:
+            write(f"⚔️ {len(defeated)} enemies defeated!")
+        if escaped:
+            write(f"    💨 Ran away: {escaped}")
+        write(f"    🩸 Damage taken: {damage}")
+        write(f"    ✨ Experience gained: {xp}")
 
         self.hero.state = PlayerState.IDLE
 
         # Random chance to find a super-potion after battle
         self.game.find_superpotion()
 
-    def dont_fight(self) -> None:
+    async def dont_fight(self) -> None:
         """
         Handles the scenario where the hero avoids fighting an enemy.
         """
-        print(f"\n💨 \033[1m{self.hero.name}\033[0m decided to avoid this fight...")
+        self.game.sink.emit(EventType.AVOID, day=self.game.day)
+        write(f"\n💨 \033[1m{self.hero.name}\033[0m decided to avoid this fight...")
 
         # Random chance to find a potion
-        self.game.find_potion()
+        await self.game.find_potion()
 
-    def hero_turn(self):
+    async def hero_turn(self):
         """
-        Handles the hero's turn in combat by prompting the player to choose an action.
+        Handles the hero's turn in combat by prompting the player to choose an action. Attacks
+        go to the weakest enemy.
+
+        While metrics are enabled, the time of the turn is split into the wait on the player and
+        the computation, pacing delays are left out.
         """
-        print(config.COMBAT_PLAYER_TURN)
+        if not metrics.ENABLED:
+            return await self._hero_turn()
+
+        console = get_console()
+        started = perf_counter()
+        waited, paused = console.input_seconds, console.paused_seconds
+
+        result = await self._hero_turn()
+
+        waited = console.input_seconds - waited
+        paused = console.paused_seconds - paused
+        metrics.HERO_INPUT_SECONDS.observe(waited)
+        metrics.HERO_COMPUTE_SECONDS.observe(perf_counter() - started - waited - paused)
+        return result
+
+    async def _hero_turn(self):
+        """
+        Prompts for actions until the hero performed one.
+        """
+        write(config.COMBAT_PLAYER_TURN)
 
         while True:
             self.hero.show_actions()
 
-            action = input("\n> Choose an action: ").strip()
-            print()
-            sleep(1 * config.GAME_SPEED)
+            action = (await read("\n> Choose an action: ")).strip()
+            write()
+            await pause(1)
 
-            result = self.hero.perform_action(action, target=self.enemy)
+            target = self.enemy
+            result = await self.hero.perform_action(action, target=target,
+                                                    sink=self.game.sink, turn=self.turn)
+            self.targets.update(target)
 
             if result == ActionResult.NONE:
                 continue
 
             return result
 
-    def enemy_turn(self) -> None:
+    async def enemy_turn(self, enemy: Enemy) -> None:
         """
-        Handles the enemy's turn during combat, where the enemy attempts to attack the hero.
+        Handles the turn of a single enemy, which does what its policy decides.
+
+        Args:
+            enemy (Enemy): The acting enemy.
         """
-        if self.enemy.alive():
-            print("\n" + config.COMBAT_ENEMY_TURN)
+        if enemy.fighting():
+            write("\n" + config.COMBAT_ENEMY_TURN)
 
-            self.enemy.perform_action("attack", target=self.hero)
+            action = enemy.policy.decide(enemy, self.hero)
+            await enemy.perform_action(action, target=enemy.policy.target(enemy, [self.hero]),
+                                       sink=self.game.sink, turn=self.turn)
+            if action == ai.HEAL:
+                self.targets.update(enemy)
 
-            if not self.hero.alive():
-                self.game.game_over()
+    async def enemy_turns(self, enemies: List[Enemy]) -> None:
+        """
+        Handles the turns of the enemies acting before the hero's next turn.
+
+        A single enemy takes a regular turn. A group acts in one batch: the policies decide for
+        the whole group at once from the state at the start of the batch, then the actions are
+        resolved with the same rolls as separate turns but a single summary instead of one
+        message per action.
+
+        Args:
+            enemies (List[Enemy]): The acting enemies, in initiative order.
+        """
+        if len(enemies) <= 1:
+            for enemy in enemies:
+                await self.enemy_turn(enemy)
+            return
+
+        hero, sink, turn = self.hero, self.game.sink, self.turn
+        attacks = hits = crits = damage = drinks = escapes = 0
+
+        enemies = [enemy for enemy in enemies if enemy.fighting()]
+        for enemy, action in zip(enemies, ai.decide_all(enemies, hero)):
+            if not hero.alive():
+                break
+            if not enemy.fighting():
+                continue
+
+            if action == ai.HEAL:
+                drinks += 1
+                enemy.drink_potion()
+                self.targets.update(enemy)
+                sink.emit(EventType.ENEMY_HEAL, turn=turn, enemy=enemy.position,
+                          health=enemy.health)
+                continue
+            if action == ai.FLEE:
+                escaped = enemy.escape()
+                escapes += escaped
+                sink.emit(EventType.ENEMY_ESCAPE, turn=turn, enemy=enemy.position,
+                          success=escaped)
+                continue
+
+            result = enemy.resolve_attack(hero)
+            emit_attack(sink, turn, enemy, hero, result)
+
+            attacks += 1
+            if not result.dodged:
+                hits += 1
+                crits += result.crit
+                damage += result.damage
+
+        if not attacks and not drinks and not escapes:
+            return
+
+        write("\n" + config.COMBAT_ENEMY_TURN)
+        if attacks:
+            write(f"🗡️ \033[1m{attacks} enemies\033[0m attacked \033[1m{hero.name}\033[0m: "
+                  f"{hits} hits ({crits} \033[1mCRIT!\033[0m) for "
+                  f"\033[1m{damage} damage!\033[0m, {attacks - hits} dodged")
+        if drinks:
+            write(f"🧪 \033[1m{drinks} enemies\033[0m drank a potion")
+        if escapes:
+            write(f"💨 \033[1m{escapes} enemies\033[0m ran away")
@@ -14,8 +14,13 @@ ______                                      _____                    _
                    |___/
 """
 
+# Characters
+CHARACTER_CRIT_CHANCE = 50
+CHARACTER_FLEE_CHANCE = 25
+
 # Hero
 HERO_XP_GAIN_RANGE = (15, 30)
+HERO_DODGE_CHANCE = 50
 
 # Game
 GAME_SPEED = 0.5
@@ -31,6 +36,10 @@ POTION_SUPER_FIND_CHANCE = 100
 # Magic
 FIREBALL_XP = 0
 
+# Enemies
+ENEMY_LOW_HEALTH = 30
+ENEMY_POTION_HEALTH = 30
+
 # Goblin
 GOBLIN_NAMES = [
     "Grukk", "Zorg", "Ragdug", "Thrak", "Vog", "Krog", "Dorg",
@@ -40,6 +49,9 @@ GOBLIN_NAMES = [
 GOBLIN_ICON = "👺"
 GOBLIN_HEALTH = 100
 GOBLIN_DAMAGE = 15
+GOBLIN_CRIT_CHANCE = 50
+GOBLIN_FLEE_CHANCE = 25
+GOBLIN_GROUP_SIZE = (1, 1)
 
 # Story
 TEMPLATE_START = [
@@ -0,0 +1,173 @@
+"""
+This module defines the `Console` a game session talks to, along with helpers that route
+output, prompts and pacing to the console of the current session.
+
+The current console is kept in a context variable, so every asyncio task (one per connected
+player on the server) has its own, while the command line game uses the terminal.
+"""
+
+from contextvars import ContextVar, Token
+from time import perf_counter
+
+from . import config
+from . import metrics
+from .clock import Clock, RealClock
+from .render import NullSink, OutputSink, Renderer, TtySink
+
+
+class SessionClosed(Exception):
+    """Raised when the player on the other end of a console disconnects."""
+
+
+class Console:
+    """
+    Base class for the terminals a game session reads from and writes to.
+
+    Output goes through a `Renderer`, which sends it to the sink once per frame: before every
+    prompt and every pacing delay. Pacing delays last as long as the console's `Clock` makes
+    them.
+
+    While metrics are enabled, the console adds up the time it spent waiting on the player and
+    in pacing delays, so the computation time of a turn can be told apart from both.
+    """
+
+    def __init__(self, sink: OutputSink = None, clock: Clock = None) -> None:
+        """
+        Args:
+            sink (OutputSink): The destination of the output, discarded by default.
+            clock (Clock): The clock pacing the session, a `RealClock` by default.
+        """
+        self.renderer = Renderer(sink or NullSink())
+        self.clock = clock or RealClock()
+        self.input_seconds = 0.0
+        self.paused_seconds = 0.0
+
+    def write(self, text: str) -> None:
+        """Writes text to the player."""
+        self.renderer.write(text)
+
+    async def read(self, prompt: str) -> str:
+        """Shows a prompt and waits for the player's answer."""
+        self.renderer.write(prompt)
+        self.renderer.present(prompt=True)
+        if not metrics.ENABLED:
+            return await self.read_line()
+
+        started = perf_counter()
+        try:
+            return await self.read_line()
+        finally:
+            waited = perf_counter() - started
+            self.input_seconds += waited
+            metrics.INPUT_SECONDS.observe(waited)
+
+    async def read_line(self) -> str:
+        """Waits for the next line the player sends, without the line break."""
+        raise NotImplementedError()
+
+    async def sleep(self, seconds: float) -> None:
+        """Shows the output so far and pauses the session for dramatic effect."""
+        if seconds > 0:
+            self.renderer.present()
+        if not metrics.ENABLED:
+            await self.clock.sleep(seconds)
+            return
+
+        started = perf_counter()
+        await self.clock.sleep(seconds)
+        self.paused_seconds += perf_counter() - started
+
+    def clear(self) -> None:
+        """Clears the player's screen."""
+        self.renderer.clear()
+
+    def flush(self) -> None:
+        """Shows the output that is still buffered."""
+        self.renderer.present()
+
+
+class TerminalConsole(Console):
+    """Console of the local terminal, used by the command line game."""
+
+    def __init__(self, clock: Clock = None) -> None:
+        super().__init__(TtySink(), clock)
+
+    async def read_line(self) -> str:
+        return input()
+
+
+_current: ContextVar[Console] = ContextVar("console", default=TerminalConsole())
+
+
+def get_console() -> Console:
+    """
+    Gets the console of the current session.
+
+    Returns:
+        Console: The console, the terminal if none was set.
+    """
+    return _current.get()
+
+
+def set_console(console: Console) -> Token:
+    """
+    Sets the console of the current session.
+
+    Args:
+        console (Console): The console to use in the current context.
+
+    Returns:
+        Token: A token that can be used to restore the previous console.
+    """
+    return _current.set(console)
+
+
+def write(*values, sep: str = " ", end: str = "\n") -> None:
+    """
+    Writes values to the current console, like `print` does.
+    """
+    _current.get().write(sep.join(str(value) for value in values) + end)
+
+
+async def read(prompt: str = "") -> str:
+    """
+    Prompts the player of the current session, like `input` does.
+
+    Args:
+        prompt (str): The text shown before the answer.
+
+    Returns:
+        str: The player's answer, without the line break.
+    """
+    return await _current.get().read(prompt)
+
+
+def draw(key: str, panel) -> bool:
+    """
+    Draws a status panel on the current console, unless it is already on screen.
+
+    Args:
+        key (str): The slot of the panel on screen, e.g. "hero".
+        panel: An object with a `version`, like a character.
+
+    Returns:
+        bool: Whether the panel was drawn.
+    """
+    return _current.get().renderer.draw(key, panel)
+
+
+def flush() -> None:
+    """
+    Shows the output of the current session that is still buffered.
+    """
+    _current.get().flush()
+
+
+async def pause(beats: float) -> None:
+    """
+    Pauses the current session on its clock.
+
+    Args:
+        beats (float): The length of the delay, a beat lasts `config.GAME_SPEED` seconds.
+    """
+    await _current.get().sleep(beats * config.GAME_SPEED)
@@ -0,0 +1,420 @@
+"""
+This module loads the game content (items and enemies) from the JSON files in `data/`.
+
+The files are read and validated once, the first time the registry is needed, and compiled
+into read-only tables of prototypes. Spawning an item clones a prebuilt template and spawning an
+enemy copies a few fields out of its prototype, so no dict is parsed per spawn and new content
+only needs a new entry in the data files.
+
+The `ai` field of an enemy names its policy in `ai.POLICY_NAMES`, and `potions` is the number
+of healing potions it carries.
+
+A field of an enemy may be given as `{"config": "NAME"}` instead of a value, it's then read from
+`config` whenever the enemy is spawned, so overridden constants (see `simulate.apply_profile`)
+still apply.
+
+Running this module validates the data files and lists their content.
+"""
+
+import json
+import os
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+
+from . import config
+from .ai import POLICY_NAMES, get_policy
+from .character import DEFAULT_SPEED
+from .enemy import Enemy, Goblin
+from .item import Item, NonInteractableItem, PotionItem
+from .rng import GameRandom, default_rng
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+ITEM_KINDS = {cls.__name__: cls for cls in (Item, NonInteractableItem, PotionItem)}
+ENEMY_KINDS = {cls.__name__: cls for cls in (Enemy, Goblin)}
+
+ITEM_FIELDS = {
+    "uuid": str,
+    "kind": str,
+    "name": str,
+    "description": str,
+    "icon": str,
+    "amount": int,
+    "max_amount": int,
+}
+ENEMY_FIELDS = {
+    "id": str,
+    "kind": str,
+    "names": list,
+    "icon": str,
+    "health": int,
+    "damage": int,
+    "crit_chance": int,
+    "flee_chance": int,
+    "speed": int,
+    "ai": str,
+    "potions": int,
+}
+REQUIRED_ITEM_FIELDS = ("uuid", "kind", "name")
+REQUIRED_ENEMY_FIELDS = ("id", "kind", "names", "icon", "health", "damage")
+
+
+class ContentError(ValueError):
+    """Raised when a data file is malformed."""
+
+
+class ConfigValue(str):
+    """The name of a `config` constant that is read when an enemy is spawned."""
+
+    __slots__ = ()
+
+    def resolve(self):
+        """
+        Reads the constant.
+
+        Returns:
+            The current value of the constant.
+        """
+        return getattr(config, self)
+
+
+def _resolve(value):
+    """
+    Gets the value of a prototype field that may refer to a `config` constant.
+    """
+    return value.resolve() if isinstance(value, ConfigValue) else value
+
+
+@dataclass(frozen=True)
+class ItemPrototype:
+    """
+    Immutable description of an item, with a prebuilt template the spawned items are cloned
+    from.
+    """
+    uuid: str
+    kind: str
+    name: str
+    description: str
+    icon: str
+    amount: int
+    max_amount: int
+    template: Item
+
+    def create(self) -> Item:
+        """
+        Spawns a new item.
+
+        Returns:
+            Item: A fresh copy of the template.
+        """
+        return self.template.clone()
+
+
+@dataclass(frozen=True)
+class EnemyPrototype:
+    """
+    Immutable description of an enemy type.
+    """
+    id: str
+    kind: str
+    names: Tuple[str, ...]
+    icon: str
+    health: int
+    damage: int
+    crit_chance: int
+    flee_chance: int
+    speed: int
+    ai: str
+    potions: int
+
+    def create(self, rng: Optional[GameRandom] = None, name: Optional[str] = None) -> Enemy:
+        """
+        Spawns a new enemy.
+
+        Args:
+            rng (GameRandom): The generator of the enemy's name and rolls.
+            name (str): The enemy's name, a random one of `names` by default.
+
+        Returns:
+            Enemy: The new enemy.
+        """
+        rng = rng or default_rng()
+        if name is None:
+            name = rng.choice(_resolve(self.names))
+
+        enemy = ENEMY_KINDS[self.kind](name=name, health=_resolve(self.health),
+                                       damage=_resolve(self.damage), icon=_resolve(self.icon),
+                                       rng=rng)
+        enemy.attributes.crit_chance = _resolve(self.crit_chance)
+        enemy.attributes.flee_chance = _resolve(self.flee_chance)
+        enemy.attributes.speed = _resolve(self.speed)
+        enemy.policy = get_policy(_resolve(self.ai))
+        enemy.potions = _resolve(self.potions)
+
+        return enemy
+
+    def resolved(self) -> "EnemyPrototype":
+        """
+        Reads the fields that refer to `config` constants.
+
+        Returns:
+            EnemyPrototype: A copy of the prototype holding the current values.
+        """
+        return EnemyPrototype(**{field.name: _resolve(getattr(self, field.name))
+                                 for field in fields(self)})
+
+
+def _field(entry: dict, field: str, kind: type, source: str, allow_config: bool = False):
+    """
+    Validates a field of a data entry.
+    """
+    value = entry[field]
+
+    if allow_config and isinstance(value, dict):
+        if set(value) != {"config"} or not isinstance(value["config"], str):
+            raise ContentError(f"{source}: {field} must be a value or {{\"config\": NAME}}")
+        if not hasattr(config, value["config"]):
+            raise ContentError(f"{source}: unknown config constant {value['config']}")
+
+        constant = ConfigValue(value["config"])
+        resolved = constant.resolve()
+        if kind is list and isinstance(resolved, tuple):
+            resolved = list(resolved)
+        if not isinstance(resolved, kind) or isinstance(resolved, bool):
+            raise ContentError(f"{source}: {constant} must be {kind.__name__}")
+
+        return constant
+
+    if not isinstance(value, kind) or isinstance(value, bool):
+        raise ContentError(f"{source}: {field} must be {kind.__name__}")
+
+    return tuple(value) if kind is list else value
+
+
+def compile_item(entry: dict, source: str) -> ItemPrototype:
+    """
+    Validates an item entry and compiles it into a prototype.
+
+    Args:
+        entry (dict): The entry of the data file.
+        source (str): Where the entry comes from, for error messages.
+
+    Returns:
+        ItemPrototype: The prototype.
+
+    Raises:
+        ContentError: If the entry is invalid.
+    """
+    _check_keys(entry, ITEM_FIELDS, REQUIRED_ITEM_FIELDS, source)
+    values = {
+        "description": "Description",
+        "icon": "📦",
+        "amount": 1,
+        "max_amount": 1,
+    }
+    values.update({field: _field(entry, field, kind, source)
+                   for field, kind in ITEM_FIELDS.items() if field in entry})
+
+    if values["kind"] not in ITEM_KINDS:
+        raise ContentError(f"{source}: unknown item kind {values['kind']}")
+
+    template = ITEM_KINDS[values["kind"]](values["uuid"], values)
+    return ItemPrototype(template=template, **values)
+
+
+def compile_enemy(entry: dict, source: str) -> EnemyPrototype:
+    """
+    Validates an enemy entry and compiles it into a prototype.
+
+    Args:
+        entry (dict): The entry of the data file.
+        source (str): Where the entry comes from, for error messages.
+
+    Returns:
+        EnemyPrototype: The prototype.
+
+    Raises:
+        ContentError: If the entry is invalid.
+    """
+    _check_keys(entry, ENEMY_FIELDS, REQUIRED_ENEMY_FIELDS, source)
+    values = {"crit_chance": ConfigValue("CHARACTER_CRIT_CHANCE"),
+              "flee_chance": ConfigValue("CHARACTER_FLEE_CHANCE"), "speed": DEFAULT_SPEED,
+              "ai": "attack", "potions": 0}
+    values.update({field: _field(entry, field, kind, source, allow_config=field != "id")
+                   for field, kind in ENEMY_FIELDS.items() if field in entry})
+
+    if values["kind"] not in ENEMY_KINDS:
+        raise ContentError(f"{source}: unknown enemy kind {values['kind']}")
+    if not _resolve(values["names"]):
+        raise ContentError(f"{source}: names must not be empty")
+    if _resolve(values["ai"]) not in POLICY_NAMES:
+        raise ContentError(f"{source}: unknown ai {_resolve(values['ai'])}")
+
+    return EnemyPrototype(**values)
+
+
+def _check_keys(entry: dict, fields: dict, required: tuple, source: str) -> None:
+    """
+    Rejects entries that aren't objects, miss a required field or have unknown fields.
+    """
+    if not isinstance(entry, dict):
+        raise ContentError(f"{source}: expected an object")
+
+    missing = [field for field in required if field not in entry]
+    if missing:
+        raise ContentError(f"{source}: missing {', '.join(missing)}")
+
+    unknown = sorted(set(entry) - set(fields))
+    if unknown:
+        raise ContentError(f"{source}: unknown fields {', '.join(unknown)}")
+
+
+class ContentRegistry:
+    """
+    Read-only tables of item and enemy prototypes.
+    """
+
+    def __init__(self, items: Mapping[str, ItemPrototype],
+                 enemies: Mapping[str, EnemyPrototype]) -> None:
+        """
+        Args:
+            items (Mapping): Item prototypes by uuid.
+            enemies (Mapping): Enemy prototypes by id.
+        """
+        self.items = MappingProxyType(dict(items))
+        self.enemies = MappingProxyType(dict(enemies))
+
+    @classmethod
+    def load(cls, directory: str = DATA_DIR) -> "ContentRegistry":
+        """
+        Reads, validates and compiles the data files of a directory.
+
+        Args:
+            directory (str): The directory holding `items.json` and `enemies.json`.
+
+        Returns:
+            ContentRegistry: The compiled registry.
+
+        Raises:
+            ContentError: If a file is malformed or an id is defined twice.
+        """
+        items = cls._compile(os.path.join(directory, "items.json"), "items", "uuid",
+                             compile_item)
+        enemies = cls._compile(os.path.join(directory, "enemies.json"), "enemies", "id",
+                               compile_enemy)
+
+        return cls(items, enemies)
+
+    @staticmethod
+    def _compile(path: str, section: str, key: str, compiler) -> dict:
+        """
+        Compiles every entry of a section of a data file.
+        """
+        try:
+            with open(path, encoding="utf-8") as file:
+                document = json.load(file)
+        except (OSError, json.JSONDecodeError) as error:
+            raise ContentError(f"{path}: {error}") from error
+
+        entries = document.get(section) if isinstance(document, dict) else None
+        if not isinstance(entries, list):
+            raise ContentError(f"{path}: expected a list of {section}")
+
+        prototypes = {}
+        for index, entry in enumerate(entries):
+            prototype = compiler(entry, f"{path}: {section}[{index}]")
+            identifier = getattr(prototype, key)
+            if identifier in prototypes:
+                raise ContentError(f"{path}: {key} {identifier} is defined twice")
+            prototypes[identifier] = prototype
+
+        return prototypes
+
+    def item(self, uuid: str) -> Item:
+        """
+        Spawns an item.
+
+        Args:
+            uuid (str): The uuid of the item.
+
+        Returns:
+            Item: The new item.
+
+        Raises:
+            KeyError: If no item has this uuid.
+        """
+        return self.items[uuid].create()
+
+    def enemy(self, enemy_id: str, rng: Optional[GameRandom] = None,
+              name: Optional[str] = None) -> Enemy:
+        """
+        Spawns an enemy.
+
+        Args:
+            enemy_id (str): The id of the enemy type.
+            rng (GameRandom): The generator of the enemy's name and rolls.
+            name (str): The enemy's name, a random one by default.
+
+        Returns:
+            Enemy: The new enemy.
+
+        Raises:
+            KeyError: If no enemy type has this id.
+        """
+        return self.enemies[enemy_id].create(rng, name)
+
+
+@lru_cache(maxsize=1)
+def get_registry() -> ContentRegistry:
+    """
+    Gets the registry of the bundled data files, loading it on first use.
+
+    Returns:
+        ContentRegistry: The shared registry.
+    """
+    return ContentRegistry.load()
+
+
+def create_item(uuid: str) -> Item:
+    """
+    Spawns an item from the shared registry.
+
+    Args:
+        uuid (str): The uuid of the item.
+
+    Returns:
+        Item: The new item.
+    """
+    return get_registry().item(uuid)
+
+
+def create_enemy(enemy_id: str, rng: Optional[GameRandom] = None,
+                 name: Optional[str] = None) -> Enemy:
+    """
+    Spawns an enemy from the shared registry.
+
+    Args:
+        enemy_id (str): The id of the enemy type.
+        rng (GameRandom): The generator of the enemy's name and rolls.
+        name (str): The enemy's name, a random one by default.
+
+    Returns:
+        Enemy: The new enemy.
+    """
+    return get_registry().enemy(enemy_id, rng, name)
+
+
+if __name__ == "__main__":
+    registry = get_registry()
+
+    print(f"📦 {len(registry.items)} items:")
+    for prototype in registry.items.values():
+        print(f"    {prototype.template}")
+
+    print(f"👺 {len(registry.enemies)} enemies:")
+    for prototype in registry.enemies.values():
+        prototype = prototype.resolved()
+        print(f"    {prototype.id} ({prototype.kind}): health {prototype.health}, "
+              f"damage {prototype.damage}")
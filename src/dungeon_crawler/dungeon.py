@@ -0,0 +1,603 @@
+"""
+This module generates the dungeon map: rooms joined by corridors, with enemies and items placed
+in the rooms.
+
+The map is a fixed-size grid stored as a single flat NumPy array of tile codes, split into square
+chunks that are only generated the first time one of their cells is looked at. Every chunk draws
+from its own generator seeded with (seed, chunk x, chunk y), so a map is the same for a given
+seed no matter in which order it is explored. Each chunk holds one room, connected by corridors
+to a gate on each of its four borders; both chunks sharing a border compute the same gate, so
+the whole map is connected.
+
+Placements are bucketed by chunk, which doubles as the spatial index for neighborhood queries.
+Paths are found with A*, or by walking down a cached distance field when it covers the start and
+no shorter path can leave its window.
+
+Usage:
+    python -m dungeon_crawler.dungeon --seed 7 --at 500,500  # draw the map around a cell
+    python -m dungeon_crawler.dungeon --seed 7 --bench       # time generation, paths and LOS
+"""
+
+import argparse
+import heapq
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .content import get_registry
+
+WALL = 0
+FLOOR = 1
+
+DEFAULT_SIZE = 1024
+DEFAULT_CHUNK_SIZE = 32
+MIN_ROOM = 4
+MAX_ENEMIES = 2
+MAX_ITEMS = 1
+FIELD_CACHE_SIZE = 64
+
+TILE_GLYPHS = {WALL: "#", FLOOR: "."}
+PLACEMENT_GLYPHS = {"enemy": "g", "item": "!"}
+
+# Seed salts, so rooms and gates never draw from the same stream
+ROOM_STREAM = 0
+GATE_STREAM = 1
+
+Point = Tuple[int, int]
+
+
+class Room(NamedTuple):
+    """A rectangular room, in cells."""
+    x: int
+    y: int
+    width: int
+    height: int
+
+    @property
+    def center(self) -> Point:
+        return self.x + self.width // 2, self.y + self.height // 2
+
+
+class Placement(NamedTuple):
+    """An enemy or item placed on the map, `content_id` refers to the content registry."""
+    kind: str
+    content_id: str
+    x: int
+    y: int
+
+
+class DistanceField:
+    """
+    Distances to a goal within a square window around it, found by a breadth-first search.
+    Cells that are walls, outside the window or not reachable inside it are -1.
+
+    The distances only count paths inside the window, see `exact` for when they are the
+    shortest ones on the whole map.
+    """
+
+    __slots__ = ("goal", "x0", "y0", "size", "distances", "open_sides")
+
+    def __init__(self, goal: Point, x0: int, y0: int, distances: np.ndarray,
+                 open_sides: Tuple[bool, bool, bool, bool] = (False, False, False, False)
+                 ) -> None:
+        """
+        Args:
+            goal (tuple): The (x, y) of the goal.
+            x0 (int): The column of the window's left side.
+            y0 (int): The row of the window's top side.
+            distances (np.ndarray): The distances, one row per row of the window.
+            open_sides (tuple): Whether the map goes on past the left, right, top and bottom
+                sides of the window.
+        """
+        self.goal = goal
+        self.x0 = x0
+        self.y0 = y0
+        self.size = distances.shape
+        self.distances = distances
+        self.open_sides = open_sides
+
+    def escape(self, x: int, y: int) -> float:
+        """
+        Gets the fewest steps from a cell of the window to a cell outside of it.
+
+        Returns:
+            float: The number of steps, infinite if the window covers the whole map.
+        """
+        left, right, top, bottom = self.open_sides
+        column, row = x - self.x0, y - self.y0
+        return min((steps for steps, open_side in ((column + 1, left),
+                                                  (self.size[1] - column, right),
+                                                  (row + 1, top),
+                                                  (self.size[0] - row, bottom)) if open_side),
+                   default=float("inf"))
+
+    def exact(self, x: int, y: int) -> bool:
+        """
+        Checks whether the distance of a cell is the shortest one on the whole map.
+
+        A path leaving the window takes at least the steps out of it from both ends, so the
+        distance inside the window is the shortest one when it's no longer than these, or
+        when it's the Manhattan distance.
+
+        Returns:
+            bool: False if the cell isn't covered or a shorter path may leave the window.
+        """
+        distance = self.distance(x, y)
+        if distance < 0:
+            return False
+
+        gx, gy = self.goal
+        return (distance == abs(x - gx) + abs(y - gy)
+                or distance <= self.escape(x, y) + self.escape(gx, gy))
+
+    def distance(self, x: int, y: int) -> int:
+        """
+        Gets the distance of a cell to the goal.
+
+        Returns:
+            int: The number of steps, -1 if the cell is not covered.
+        """
+        row, column = y - self.y0, x - self.x0
+        if 0 <= row < self.size[0] and 0 <= column < self.size[1]:
+            return int(self.distances[row, column])
+
+        return -1
+
+
+class Dungeon:
+    """
+    A lazily generated dungeon map.
+    """
+
+    def __init__(self, seed: int, width: int = DEFAULT_SIZE, height: int = DEFAULT_SIZE,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        """
+        Args:
+            seed (int): The seed of the map.
+            width (int): The width in cells, rounded up to whole chunks.
+            height (int): The height in cells, rounded up to whole chunks.
+            chunk_size (int): The side of a chunk in cells, at least 8.
+        """
+        if chunk_size < 2 * MIN_ROOM:
+            raise ValueError(f"Chunks must be at least {2 * MIN_ROOM} cells wide")
+
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.chunks_x = -(-width // chunk_size)
+        self.chunks_y = -(-height // chunk_size)
+        self.width = self.chunks_x * chunk_size
+        self.height = self.chunks_y * chunk_size
+
+        self.tiles = np.zeros(self.width * self.height, dtype=np.uint8)
+        self.grid = self.tiles.reshape(self.height, self.width)
+        self.generated = bytearray(self.chunks_x * self.chunks_y)
+
+        self.rooms: Dict[int, Room] = {}
+        self.placements: Dict[int, List[Placement]] = {}
+        self._fields: "OrderedDict[Tuple[Point, int], DistanceField]" = OrderedDict()
+
+        registry = get_registry()
+        self._enemy_ids = sorted(registry.enemies)
+        self._item_ids = sorted(registry.items)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of generated chunks.
+        """
+        return sum(self.generated)
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        """
+        Checks whether a cell is on the map.
+        """
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def chunk_of(self, x: int, y: int) -> int:
+        """
+        Gets the index of the chunk holding a cell.
+        """
+        return (y // self.chunk_size) * self.chunks_x + x // self.chunk_size
+
+    def ensure(self, x: int, y: int) -> int:
+        """
+        Generates the chunk holding a cell if it doesn't exist yet.
+
+        Returns:
+            int: The index of the chunk.
+        """
+        chunk = (y // self.chunk_size) * self.chunks_x + x // self.chunk_size
+        if not self.generated[chunk]:
+            self._generate(chunk)
+
+        return chunk
+
+    def ensure_area(self, x0: int, y0: int, x1: int, y1: int) -> None:
+        """
+        Generates every chunk overlapping a rectangle, bounds included and clipped to the map.
+        """
+        size = self.chunk_size
+        for cy in range(max(y0, 0) // size, min(y1, self.height - 1) // size + 1):
+            for cx in range(max(x0, 0) // size, min(x1, self.width - 1) // size + 1):
+                chunk = cy * self.chunks_x + cx
+                if not self.generated[chunk]:
+                    self._generate(chunk)
+
+    def tile(self, x: int, y: int) -> int:
+        """
+        Gets the tile of a cell, cells off the map are walls.
+        """
+        if not self.in_bounds(x, y):
+            return WALL
+
+        self.ensure(x, y)
+        return int(self.tiles[y * self.width + x])
+
+    def passable(self, x: int, y: int) -> bool:
+        """
+        Checks whether a cell can be walked on.
+        """
+        return self.tile(x, y) != WALL
+
+    def _gate(self, cx: int, cy: int, vertical: bool) -> int:
+        """
+        Gets the offset of the gate on the east (or, if `vertical`, the south) border of a chunk
+        along that border. Both chunks sharing the border get the same value.
+        """
+        rng = np.random.default_rng((self.seed, GATE_STREAM, cx, cy, vertical))
+        return int(rng.integers(1, self.chunk_size - 1))
+
+    def _carve(self, x0: int, y0: int, x1: int, y1: int) -> None:
+        """
+        Turns a rectangle of cells into floor, bounds included.
+        """
+        self.grid[min(y0, y1):max(y0, y1) + 1, min(x0, x1):max(x0, x1) + 1] = FLOOR
+
+    def _generate(self, chunk: int) -> None:
+        """
+        Carves the room, corridors and placements of a chunk.
+        """
+        size = self.chunk_size
+        cy, cx = divmod(chunk, self.chunks_x)
+        x0, y0 = cx * size, cy * size
+        rng = np.random.default_rng((self.seed, ROOM_STREAM, cx, cy))
+
+        # The room keeps a wall around it so rooms of adjacent chunks never merge
+        width, height = (int(value) for value in rng.integers(MIN_ROOM, size - 3, size=2))
+        room = Room(x0 + 1 + int(rng.integers(0, size - width - 1)),
+                    y0 + 1 + int(rng.integers(0, size - height - 1)), width, height)
+        self._carve(room.x, room.y, room.x + width - 1, room.y + height - 1)
+        self.rooms[chunk] = room
+
+        center_x, center_y = room.center
+        gates = []
+        if cx + 1 < self.chunks_x:
+            gates.append((x0 + size - 1, y0 + self._gate(cx, cy, False)))
+        if cx > 0:
+            gates.append((x0, y0 + self._gate(cx - 1, cy, False)))
+        if cy + 1 < self.chunks_y:
+            gates.append((x0 + self._gate(cx, cy, True), y0 + size - 1))
+        if cy > 0:
+            gates.append((x0 + self._gate(cx, cy - 1, True), y0))
+
+        for gate_x, gate_y in gates:
+            self._carve(center_x, center_y, gate_x, center_y)
+            self._carve(gate_x, center_y, gate_x, gate_y)
+
+        placements = []
+        for kind, ids, most in (("enemy", self._enemy_ids, MAX_ENEMIES),
+                                ("item", self._item_ids, MAX_ITEMS)):
+            if not ids:
+                continue
+            for _ in range(int(rng.integers(0, most + 1))):
+                placements.append(Placement(
+                    kind, ids[int(rng.integers(0, len(ids)))],
+                    room.x + int(rng.integers(0, width)), room.y + int(rng.integers(0, height)),
+                ))
+        self.placements[chunk] = placements
+
+        self.generated[chunk] = 1
+
+    def neighbors(self, x: int, y: int) -> List[Point]:
+        """
+        Gets the passable cells next to a cell, without diagonals.
+
+        Returns:
+            list: The (x, y) of the neighbors.
+        """
+        return [(nx, ny) for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1))
+                if self.passable(nx, ny)]
+
+    def placements_near(self, x: int, y: int, radius: int) -> Iterator[Placement]:
+        """
+        Finds the placements within a square around a cell, generating the chunks it overlaps.
+
+        Args:
+            x (int): The column of the center.
+            y (int): The row of the center.
+            radius (int): The half side of the square.
+
+        Yields:
+            Placement: The placements inside the square.
+        """
+        self.ensure_area(x - radius, y - radius, x + radius, y + radius)
+        size = self.chunk_size
+
+        for cy in range(max(y - radius, 0) // size, min(y + radius, self.height - 1) // size + 1):
+            for cx in range(max(x - radius, 0) // size,
+                            min(x + radius, self.width - 1) // size + 1):
+                for placement in self.placements[cy * self.chunks_x + cx]:
+                    if abs(placement.x - x) <= radius and abs(placement.y - y) <= radius:
+                        yield placement
+
+    def line_of_sight(self, start: Point, end: Point) -> bool:
+        """
+        Checks whether no wall lies on the straight line between two cells.
+
+        Args:
+            start (tuple): The (x, y) of the first cell.
+            end (tuple): The (x, y) of the second cell.
+
+        Returns:
+            bool: Whether the cells see each other.
+        """
+        (x0, y0), (x1, y1) = start, end
+        if not (self.in_bounds(x0, y0) and self.in_bounds(x1, y1)):
+            return False
+
+        steps = max(abs(x1 - x0), abs(y1 - y0))
+        t = np.linspace(0.0, 1.0, steps + 1)
+        xs = np.rint(x0 + t * (x1 - x0)).astype(np.int64)
+        ys = np.rint(y0 + t * (y1 - y0)).astype(np.int64)
+
+        self.ensure_area(min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+        return bool(np.all(self.tiles[ys * self.width + xs] != WALL))
+
+    def visible_placements(self, x: int, y: int, radius: int) -> List[Placement]:
+        """
+        Finds the placements near a cell that are in its line of sight.
+        """
+        return [placement for placement in self.placements_near(x, y, radius)
+                if self.line_of_sight((x, y), (placement.x, placement.y))]
+
+    def distance_field(self, goal: Point, radius: int) -> DistanceField:
+        """
+        Gets the distances to a goal within `radius` cells of it, cached by (goal, radius).
+
+        Chunks only ever carve inside themselves, so a field never goes stale.
+
+        Args:
+            goal (tuple): The (x, y) of the goal.
+            radius (int): The half side of the window around the goal.
+
+        Returns:
+            DistanceField: The distances.
+        """
+        key = (goal, radius)
+        field = self._fields.get(key)
+        if field is not None:
+            self._fields.move_to_end(key)
+            return field
+
+        gx, gy = goal
+        x0, y0 = max(gx - radius, 0), max(gy - radius, 0)
+        x1, y1 = min(gx + radius, self.width - 1), min(gy + radius, self.height - 1)
+        self.ensure_area(x0, y0, x1, y1)
+
+        window = self.grid[y0:y1 + 1, x0:x1 + 1]
+        rows, columns = window.shape
+        distances = np.full(rows * columns, -1, dtype=np.int32)
+        open_cells = (window != WALL).ravel()
+
+        start = (gy - y0) * columns + (gx - x0)
+        if open_cells[start]:
+            distances[start] = 0
+            queue = deque((start,))
+            while queue:
+                cell = queue.popleft()
+                row, column = divmod(cell, columns)
+                step = distances[cell] + 1
+                for neighbor, inside in ((cell + 1, column + 1 < columns),
+                                         (cell - 1, column > 0),
+                                         (cell + columns, row + 1 < rows),
+                                         (cell - columns, row > 0)):
+                    if inside and open_cells[neighbor] and distances[neighbor] < 0:
+                        distances[neighbor] = step
+                        queue.append(neighbor)
+
+        field = DistanceField(goal, x0, y0, distances.reshape(rows, columns),
+                              (x0 > 0, x1 < self.width - 1, y0 > 0, y1 < self.height - 1))
+        self._fields[key] = field
+        if len(self._fields) > FIELD_CACHE_SIZE:
+            self._fields.popitem(last=False)
+
+        return field
+
+    def path(self, start: Point, goal: Point) -> Optional[List[Point]]:
+        """
+        Finds a shortest path between two cells, without diagonals.
+
+        Walks down a cached distance field of the goal when its distance from the start is
+        exact, and runs A* otherwise.
+
+        Args:
+            start (tuple): The (x, y) of the first cell.
+            goal (tuple): The (x, y) of the last cell.
+
+        Returns:
+            list: The cells of the path, both ends included, or None if there is none.
+        """
+        if not (self.passable(*start) and self.passable(*goal)):
+            return None
+
+        for (field_goal, _), field in reversed(self._fields.items()):
+            if field_goal == goal and field.exact(*start):
+                return self._descend(field, start)
+
+        return self._astar(start, goal)
+
+    @staticmethod
+    def _descend(field: DistanceField, start: Point) -> List[Point]:
+        """
+        Follows a distance field downhill from a cell to its goal.
+        """
+        x, y = start
+        path = [start]
+        distance = field.distance(x, y)
+
+        while distance > 0:
+            for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if field.distance(nx, ny) == distance - 1:
+                    x, y, distance = nx, ny, distance - 1
+                    path.append((x, y))
+                    break
+
+        return path
+
+    def _astar(self, start: Point, goal: Point) -> Optional[List[Point]]:
+        """
+        Runs A* on flat cell indices with the Manhattan distance as heuristic.
+        """
+        width, size = self.width, self.chunk_size
+        tiles, generated, chunks_x = self.tiles, self.generated, self.chunks_x
+        gx, gy = goal
+        origin, target = start[1] * width + start[0], gy * width + gx
+
+        costs = {origin: 0}
+        parents = {origin: -1}
+        frontier = [(abs(start[0] - gx) + abs(start[1] - gy), 0, origin)]
+
+        while frontier:
+            _, cost, cell = heapq.heappop(frontier)
+            if cell == target:
+                break
+            if cost > costs[cell]:
+                continue
+
+            y, x = divmod(cell, width)
+            for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if not (0 <= nx < width and 0 <= ny < self.height):
+                    continue
+
+                chunk = (ny // size) * chunks_x + nx // size
+                if not generated[chunk]:
+                    self._generate(chunk)
+
+                neighbor = ny * width + nx
+                if tiles[neighbor] == WALL or costs.get(neighbor, cost + 2) <= cost + 1:
+                    continue
+
+                costs[neighbor] = cost + 1
+                parents[neighbor] = cell
+                heapq.heappush(frontier, (cost + 1 + abs(nx - gx) + abs(ny - gy), cost + 1,
+                                          neighbor))
+        else:
+            return None
+
+        path = []
+        cell = target
+        while cell >= 0:
+            y, x = divmod(cell, width)
+            path.append((x, y))
+            cell = parents[cell]
+
+        path.reverse()
+        return path
+
+    def render(self, x: int, y: int, width: int = 64, height: int = 24) -> str:
+        """
+        Draws the map around a cell as text.
+
+        Args:
+            x (int): The column of the center.
+            y (int): The row of the center.
+            width (int): The number of columns drawn.
+            height (int): The number of rows drawn.
+
+        Returns:
+            str: One line per row, "@" marks the center.
+        """
+        x0, y0 = x - width // 2, y - height // 2
+        x1, y1 = x0 + width - 1, y0 + height - 1
+        self.ensure_area(x0, y0, x1, y1)
+
+        rows = [[TILE_GLYPHS[self.tile(column, row)] for column in range(x0, x1 + 1)]
+                for row in range(y0, y1 + 1)]
+        for placement in self.placements_near(x, y, max(width, height)):
+            if x0 <= placement.x <= x1 and y0 <= placement.y <= y1:
+                rows[placement.y - y0][placement.x - x0] = PLACEMENT_GLYPHS[placement.kind]
+        if x0 <= x <= x1 and y0 <= y <= y1:
+            rows[y - y0][x - x0] = "@"
+
+        return "\n".join("".join(row) for row in rows)
+
+
+def bench(dungeon: Dungeon) -> Dict[str, float]:
+    """
+    Times the generation of the whole map, a long path and line-of-sight queries.
+
+    Returns:
+        dict: Seconds per operation.
+    """
+    start = time.perf_counter()
+    dungeon.ensure_area(0, 0, dungeon.width - 1, dungeon.height - 1)
+    generation = time.perf_counter() - start
+
+    first, last = dungeon.rooms[0].center, dungeon.rooms[len(dungeon.rooms) - 1].center
+    start = time.perf_counter()
+    route = dungeon.path(first, last)
+    astar = time.perf_counter() - start
+
+    goal = dungeon.rooms[len(dungeon.rooms) // 2].center
+    start = time.perf_counter()
+    dungeon.distance_field(goal, 64)
+    field = time.perf_counter() - start
+
+    rng = np.random.default_rng(dungeon.seed)
+    points = rng.integers(0, min(dungeon.width, dungeon.height), size=(1000, 4))
+    start = time.perf_counter()
+    for x0, y0, x1, y1 in points:
+        dungeon.line_of_sight((int(x0), int(y0)), (int(x0 + (x1 - x0) // 16),
+                                                    int(y0 + (y1 - y0) // 16)))
+    sight = (time.perf_counter() - start) / len(points)
+
+    return {
+        "cells": dungeon.width * dungeon.height,
+        "generate_all_s": generation,
+        "astar_s": astar,
+        "astar_length": len(route) if route else 0,
+        "distance_field_s": field,
+        "line_of_sight_s": sight,
+    }
+
+
+def main() -> None:
+    """
+    Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Generate and inspect a dungeon map.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="width and height")
+    parser.add_argument("--at", default=None, metavar="X,Y", help="draw the map around a cell")
+    parser.add_argument("--bench", action="store_true", help="time the map operations")
+    args = parser.parse_args()
+
+    dungeon = Dungeon(args.seed, args.size, args.size)
+
+    if args.bench:
+        for key, value in bench(dungeon).items():
+            print(f"{key:>18}: {value:.6g}")
+        return
+
+    if args.at:
+        x, y = (int(value) for value in args.at.split(","))
+    else:
+        x, y = dungeon.rooms[dungeon.ensure(0, 0)].center
+
+    print(dungeon.render(x, y))
+    print(f"\n{len(dungeon)} of {len(dungeon.generated)} chunks generated")
+
+
+if __name__ == "__main__":
+    main()
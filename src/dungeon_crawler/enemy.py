@@ -3,42 +3,103 @@ This module defines the Enemy class, a subclass of Character, representing adver
 encountered by the hero during the game.
 """
 
-from random import choice
+from typing import Optional
 
-import config
-from action import AttackAction
-from character import Character
+from . import config
+from . import action
+from .ai import DEFAULT_POLICY
+from .character import Character
+from .rng import GameRandom, default_rng
 
 
 class Enemy(Character):
     """
     Subclass of Character representing an enemy in the game.
     This class can be extended to add specific enemy behaviors.
+
+    What the enemy does on its turn is decided by its `policy`, see `ai`. Its `position` is its
+    order among the enemies of the encounter, which events use to tell them apart.
     """
 
-    def __init__(self, name: str, health: int, damage: int, icon: str) -> None:
-        super().__init__(name=name, health=health, damage=damage, icon=icon)
+    __slots__ = ("dodge_chance", "policy", "potions", "escaped", "position")
+
+    actions = {
+        "attack": action.ATTACK,
+        "heal": action.DRINK,
+        "flee": action.ESCAPE,
+    }
+
+    def __init__(self, name: str, health: int, damage: int, icon: str,
+                 rng: Optional[GameRandom] = None) -> None:
+        super().__init__(name=name, health=health, damage=damage, icon=icon, rng=rng)
 
         self.dodge_chance = 0
-        self.actions = {
-            "attack": AttackAction(),
-        }
+        self.policy = DEFAULT_POLICY
+        self.potions = 0
+        self.escaped = False
+        self.position = 0
+
+    def drink_potion(self) -> int:
+        """
+        Drinks one of the enemy's potions, restoring `config.ENEMY_POTION_HEALTH` health.
+
+        Returns:
+            int: The health restored, 0 if the enemy has no potion left.
+        """
+        if self.potions <= 0:
+            return 0
+
+        self.potions -= 1
+        health = self.health
+        self.health = health + config.ENEMY_POTION_HEALTH
+        return self.health - health
+
+    def escape(self) -> bool:
+        """
+        Tries to run away from the combat.
+
+        Returns:
+            bool: True if the enemy escaped.
+        """
+        if self.attempt_flee():
+            self.escaped = True
+        return self.escaped
+
+    def fighting(self) -> bool:
+        return not self.escaped and super().fighting()
 
 
 class Goblin(Enemy):
+    __slots__ = ()
+
     @staticmethod
-    def generate_goblin_name() -> str:
+    def generate_goblin_name(rng: Optional[GameRandom] = None) -> str:
         """
         Generates a random goblin name.
 
+        Args:
+            rng (GameRandom): The generator to draw the name from.
+
         Returns:
             str: A randomly selected goblin name from the predefined list.
         """
-        return choice(config.GOBLIN_NAMES)
+        return (rng or default_rng()).choice(config.GOBLIN_NAMES)
 
     """
     Subclass of Enemy representing a Goblin character in the game.
     """
-    def __init__(self, name: str = generate_goblin_name(), health: int = config.GOBLIN_HEALTH,
-                 damage: int = config.GOBLIN_DAMAGE, icon: str = config.GOBLIN_ICON) -> None:
-        super().__init__(name=name, health=health, damage=damage, icon=icon)
+    def __init__(self, name: Optional[str] = None, health: Optional[int] = None,
+                 damage: Optional[int] = None, icon: Optional[str] = None,
+                 rng: Optional[GameRandom] = None) -> None:
+        # The defaults are read from `config` on every call rather than bound at import time,
+        # so constants overridden by `simulate --set` or `solver --set` apply to new goblins
+        if name is None:
+            name = self.generate_goblin_name(rng)
+        if health is None:
+            health = config.GOBLIN_HEALTH
+        if damage is None:
+            damage = config.GOBLIN_DAMAGE
+        if icon is None:
+            icon = config.GOBLIN_ICON
+
+        super().__init__(name=name, health=health, damage=damage, icon=icon, rng=rng)
@@ -0,0 +1,314 @@
+"""
+This module contains the headless game engine. It plays the same day loop as
+`Game.start_game` (goblin encounters, potions, the spellbook and the Fireball spell), but every
+decision is made by a `Policy` and every outcome is reported to an `EventSink`. The engine never
+reads input, sleeps or clears the screen, so it can run thousands of games per second.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional
+
+from . import ai
+from . import config
+from .combat import Initiative, TargetIndex
+from .content import create_enemy, create_item
+from .enemy import Goblin
+from .events import EventSink, EventType, emit_attack
+from .game import roll_potion_effect
+from .player import Player, PlayerState
+from .rng import GameRandom
+
+
+class Policy:
+    """Base class for the decision makers that replace player input in a headless run."""
+
+    def use_superpotion(self, hero: Player, day: int) -> bool:
+        """Decides whether to drink a super-potion at the start of a day."""
+        raise NotImplementedError()
+
+    def fight(self, hero: Player, enemy: Goblin, day: int) -> bool:
+        """Decides whether to fight an encounter, `enemy` is the first goblin of the group."""
+        raise NotImplementedError()
+
+    def drink_potion(self, hero: Player, day: int) -> bool:
+        """Decides whether to drink a potion of unknown effect found after avoiding a fight."""
+        raise NotImplementedError()
+
+    def combat_action(self, hero: Player, enemy: Goblin, turn: int) -> str:
+        """
+        Chooses the hero's combat action, either "attack" or "flee". `enemy` is the weakest
+        goblin still fighting, the one an attack goes to.
+        """
+        raise NotImplementedError()
+
+
+class AggressivePolicy(Policy):
+    """
+    Policy that fights every enemy to the end, only drinks potions that can't hurt and keeps
+    super-potions until the hero is below half health.
+    """
+
+    def use_superpotion(self, hero: Player, day: int) -> bool:
+        return hero.health * 2 < hero.health_max
+
+    def fight(self, hero: Player, enemy: Goblin, day: int) -> bool:
+        return True
+
+    def drink_potion(self, hero: Player, day: int) -> bool:
+        return "spellbook" in hero.inventory
+
+    def combat_action(self, hero: Player, enemy: Goblin, turn: int) -> str:
+        return "attack"
+
+
+@dataclass
+class RunResult:
+    """Summary of a single headless run."""
+    survived: bool
+    days: int
+    experience: int
+    health: int
+    fights: int
+    victories: int
+
+
+class Engine:
+    """
+    Runs complete games without any I/O.
+
+    Mirrors the flow of `Game.start_game`, `Combat.fight` and `Game.find_potion`, asking the
+    policy wherever the interactive game would prompt the player.
+    """
+
+    def __init__(self, policy: Policy = None, sink: EventSink = None,
+                 rng: Optional[GameRandom] = None) -> None:
+        """
+        Initializes the engine.
+
+        Args:
+            policy (Policy): The decision maker, `AggressivePolicy` by default.
+            sink (EventSink): Receiver for the events of every run, discarded by default.
+            rng (GameRandom): Generator shared by all runs of this engine, a randomly seeded
+                one by default.
+        """
+        self.policy = policy or AggressivePolicy()
+        self.sink = sink or EventSink()
+        self.rng = rng or GameRandom()
+
+        self.hero = None
+        self.day = config.GAME_STARTING_DAY
+        self.fights = 0
+        self.victories = 0
+
+    def run(self, name: str = "Hero") -> RunResult:
+        """
+        Plays a full game from the first day until the hero dies or the last day ends.
+
+        Args:
+            name (str): The hero's name.
+
+        Returns:
+            RunResult: The outcome of the run.
+        """
+        self.hero = Player(name=name, rng=self.rng)
+        self.hero.inventory.sink = self.sink
+        self.day = config.GAME_STARTING_DAY
+        self.fights = 0
+        self.victories = 0
+
+        self.sink.emit(EventType.GAME_START, seed=self.rng.root_seed, name=name,
+                       health=self.hero.health, damage=self.hero.damage)
+
+        while self.day < config.GAME_MAX_DAYS:
+            self.day += 1
+            self.sink.emit(EventType.DAY_START, day=self.day)
+
+            self.prompt_potion()
+
+            if not self.goblin_encounter():
+                return self.result(False)
+
+            self.find_spellbook()
+            self.learn_fireball()
+
+            self.sink.emit(EventType.DAY_END, day=self.day)
+
+        survived = self.hero.experience > 0
+        if not survived:
+            self.sink.emit(EventType.GAME_OVER, day=self.day, cause="experience")
+
+        return self.result(survived)
+
+    def result(self, survived: bool) -> RunResult:
+        """Builds the result of the current run."""
+        self.sink.emit(EventType.GAME_END, day=self.day, survived=survived)
+
+        return RunResult(
+            survived=survived,
+            days=self.day,
+            experience=self.hero.experience,
+            health=self.hero.health,
+            fights=self.fights,
+            victories=self.victories,
+        )
+
+    def prompt_potion(self) -> None:
+        """Lets the policy drink a super-potion, as `Game.prompt_potion` does."""
+        hero = self.hero
+        if "spotion" in hero.inventory and self.policy.use_superpotion(hero, self.day):
+            hero.health = hero.health_max
+            hero.inventory.remove_item("spotion")
+            self.sink.emit(EventType.ITEM_USE, uuid="spotion",
+                           count=hero.inventory.count("spotion"), health=hero.health)
+
+    def goblin_encounter(self) -> bool:
+        """
+        Spawns a group of goblins, as `Game.spawn_goblins` does, and lets the policy fight or
+        avoid it.
+
+        Returns:
+            bool: False if the hero died during the encounter.
+        """
+        low, high = config.GOBLIN_GROUP_SIZE
+        count = low if low == high else self.rng.randint(low, high)
+        enemies = [create_enemy("goblin", self.rng) for _ in range(count)]
+
+        for position, enemy in enumerate(enemies):
+            enemy.position = position
+            self.sink.emit(EventType.ENCOUNTER, day=self.day, enemy=enemy.name,
+                           health=enemy.health, damage=enemy.damage)
+
+        if self.policy.fight(self.hero, enemies[0], self.day):
+            return self.fight(enemies)
+
+        self.sink.emit(EventType.AVOID, day=self.day)
+        return self.find_potion()
+
+    def fight(self, enemies: List[Goblin]) -> bool:
+        """
+        Resolves a fight turn by turn, as `Combat.fight` does: the characters act in the order
+        of their initiative, and the hero attacks the weakest goblin.
+
+        Returns:
+            bool: False if the hero died.
+        """
+        hero = self.hero
+        hero.state = PlayerState.IN_COMBAT
+        self.fights += 1
+
+        initiative = Initiative([hero] + enemies)
+        targets = TargetIndex(enemies)
+
+        turn = 1
+        while targets.weakest() is not None and hero.alive():
+            pending: List[Goblin] = []
+            for character in initiative.turn(turn):
+                if character is not hero:
+                    pending.append(character)
+                    continue
+
+                self.enemy_turns(pending, turn, targets)
+                pending = []
+                target = targets.weakest()
+                if not hero.alive() or target is None:
+                    break
+
+                if self.policy.combat_action(hero, target, turn) == "flee":
+                    fled = hero.attempt_flee()
+                    self.sink.emit(EventType.FLEE, turn=turn, success=fled)
+                    if fled:
+                        hero.state = PlayerState.IDLE
+                        return True
+                else:
+                    emit_attack(self.sink, turn, hero, target, hero.resolve_attack(target))
+                    targets.update(target)
+
+            self.enemy_turns(pending, turn, targets)
+
+            if not hero.alive():
+                self.sink.emit(EventType.GAME_OVER, day=self.day, cause="combat")
+                return False
+
+            turn += 1
+
+        hero.state = PlayerState.IDLE
+        defeated = [enemy for enemy in enemies if not enemy.escaped]
+        if not defeated:
+            self.sink.emit(EventType.ENEMIES_FLED, day=self.day, turns=turn - 1)
+            return True
+
+        xp = sum(self.rng.randint(*config.HERO_XP_GAIN_RANGE) for _ in defeated)
+        hero.add_experience(xp)
+        self.victories += 1
+        self.sink.emit(EventType.VICTORY, day=self.day, turns=turn - 1)
+        self.sink.emit(EventType.XP_GAIN, amount=xp, experience=hero.experience)
+
+        self.find_superpotion()
+        return True
+
+    def enemy_turns(self, enemies: List[Goblin], turn: int, targets: TargetIndex) -> None:
+        """
+        Plays the goblins acting before the hero's next turn, as `Combat.enemy_turns` does: a
+        group decides at once from the state at the start of the batch.
+        """
+        hero = self.hero
+        enemies = [enemy for enemy in enemies if enemy.fighting()]
+        if len(enemies) == 1:
+            actions = [enemies[0].policy.decide(enemies[0], hero)]
+        else:
+            actions = ai.decide_all(enemies, hero)
+
+        for enemy, action in zip(enemies, actions):
+            if not hero.alive():
+                break
+            if not enemy.fighting():
+                continue
+
+            if action == ai.HEAL:
+                enemy.drink_potion()
+                targets.update(enemy)
+                self.sink.emit(EventType.ENEMY_HEAL, turn=turn, enemy=enemy.position,
+                               health=enemy.health)
+            elif action == ai.FLEE:
+                self.sink.emit(EventType.ENEMY_ESCAPE, turn=turn, enemy=enemy.position,
+                               success=enemy.escape())
+            else:
+                emit_attack(self.sink, turn, enemy, hero, enemy.resolve_attack(hero))
+
+    def find_superpotion(self) -> None:
+        """Gives the hero a super-potion after a won fight, as `Game.find_superpotion` does."""
+        if ("spellbook" in self.hero.inventory and self.rng.randint(1, 100) <=
+                config.POTION_SUPER_FIND_CHANCE):
+            self.hero.inventory.add_item(create_item("spotion"))
+
+    def find_potion(self) -> bool:
+        """
+        Lets the policy drink a found potion, as `Game.find_potion` does.
+
+        Returns:
+            bool: False if the potion killed the hero.
+        """
+        if self.rng.randint(1, 100) <= config.POTION_FIND_CHANCE:
+            if self.policy.drink_potion(self.hero, self.day):
+                potion_effect = roll_potion_effect(self.hero, self.rng)
+                self.hero.health = self.hero.health + potion_effect
+                self.sink.emit(EventType.POTION, effect=potion_effect, health=self.hero.health)
+
+                if not self.hero.alive():
+                    self.sink.emit(EventType.GAME_OVER, day=self.day, cause="potion")
+                    return False
+
+        return True
+
+    def find_spellbook(self) -> None:
+        """Gives the hero the spellbook on `config.GAME_SPELLBOOK_DAY`."""
+        if self.day == config.GAME_SPELLBOOK_DAY:
+            self.hero.inventory.add_item(create_item("spellbook"))
+
+    def learn_fireball(self) -> None:
+        """Teaches the hero the Fireball spell, as `Game.learn_fireball` does."""
+        inventory = self.hero.inventory
+        if ("spellbook" in inventory
+                and "fireball" not in inventory
+                and self.hero.experience >= config.FIREBALL_XP):
+            inventory.add_item(create_item("fireball"))
@@ -0,0 +1,373 @@
+"""
+This module provides `EntityStore`, a struct-of-arrays container for large populations of
+heroes and enemies.
+
+Instead of one `Character` object per entity, every attribute is a column in a contiguous
+NumPy array and an entity is just a row index. Rows can be turned into regular characters
+with `character` when the interactive game needs one, and written back with `update`.
+
+Running this module prints the memory footprint of objects and store rows.
+"""
+
+import enum
+import sys
+from enum import IntEnum
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from .ai import EnemyPolicy
+from .character import Character
+from .content import create_item, get_registry
+from .enemy import Enemy, Goblin
+from .events import EventSink
+from .player import Player
+from .rng import GameRandom, default_rng
+
+DEFAULT_CAPACITY = 1024
+
+COLUMNS = {
+    "health": np.int32,
+    "health_max": np.int32,
+    "damage": np.int32,
+    "experience": np.int32,
+    "name": np.uint16,
+    "flee_chance": np.int8,
+    "crit_chance": np.int8,
+    "dodge_chance": np.int8,
+    "kind": np.uint8,
+    "active": np.bool_,
+}
+
+
+class EntityKind(IntEnum):
+    """Defines the kinds of entities kept in a store."""
+    HERO = 0
+    GOBLIN = 1
+
+
+class EntityStore:
+    """
+    Struct-of-arrays storage for characters.
+
+    Each column listed in `COLUMNS` is a NumPy array attribute of the store, indexed by entity
+    id. Names are interned in a shared table, so a row only keeps a 16-bit name index. Removed
+    rows are reused by later spawns.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        """
+        Initializes an empty store.
+
+        Args:
+            capacity (int): The number of rows allocated up front, the store grows as needed.
+        """
+        self.capacity = capacity
+        self.size = 0
+
+        for column, dtype in COLUMNS.items():
+            setattr(self, column, np.zeros(capacity, dtype=dtype))
+
+        self.names: List[str] = []
+        self._name_ids = {}
+        self._free: List[int] = []
+
+    def __len__(self) -> int:
+        """
+        Returns the number of live entities.
+        """
+        return self.size - len(self._free)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Gets the memory used by the column arrays.
+
+        Returns:
+            int: The number of bytes allocated for all rows.
+        """
+        return sum(getattr(self, column).nbytes for column in COLUMNS)
+
+    @staticmethod
+    def bytes_per_entity() -> int:
+        """
+        Gets the size of a single row.
+
+        Returns:
+            int: The number of bytes a row uses across all columns.
+        """
+        return sum(np.dtype(dtype).itemsize for dtype in COLUMNS.values())
+
+    def name_id(self, name: str) -> int:
+        """
+        Interns a name in the name table.
+
+        Args:
+            name (str): The name.
+
+        Returns:
+            int: The index of the name in `names`.
+        """
+        index = self._name_ids.get(name)
+        if index is None:
+            index = len(self.names)
+            self.names.append(name)
+            self._name_ids[name] = index
+
+        return index
+
+    def _allocate(self, count: int) -> np.ndarray:
+        """
+        Reserves `count` rows, reusing removed rows first.
+        """
+        reused = [self._free.pop() for _ in range(min(count, len(self._free)))]
+        fresh = count - len(reused)
+
+        if self.size + fresh > self.capacity:
+            self._grow(self.size + fresh)
+
+        ids = np.concatenate([
+            np.array(reused, dtype=np.int64),
+            np.arange(self.size, self.size + fresh, dtype=np.int64),
+        ])
+        self.size += fresh
+
+        return ids
+
+    def _grow(self, minimum: int) -> None:
+        """
+        Reallocates every column with at least `minimum` rows.
+        """
+        capacity = max(minimum, self.capacity * 2)
+
+        for column in COLUMNS:
+            old = getattr(self, column)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, column, new)
+
+        self.capacity = capacity
+
+    def spawn(self, count: int, kind: EntityKind, health: int, damage: int,
+              flee_chance: int = 25, crit_chance: int = 50, dodge_chance: int = 0,
+              names: Optional[Iterable[str]] = None) -> np.ndarray:
+        """
+        Adds `count` entities with the same stats in a single vectorized write.
+
+        Args:
+            count (int): The number of entities.
+            kind (EntityKind): The kind of the entities.
+            health (int): The starting and maximum health.
+            damage (int): The base damage.
+            flee_chance (int): The flee chance in percent.
+            crit_chance (int): The crit chance in percent.
+            dodge_chance (int): The dodge chance in percent.
+            names (Iterable[str]): One name per entity, "Unnamed" by default.
+
+        Returns:
+            np.ndarray: The ids of the new entities.
+        """
+        ids = self._allocate(count)
+
+        self.health[ids] = health
+        self.health_max[ids] = health
+        self.damage[ids] = damage
+        self.experience[ids] = 0
+        self.flee_chance[ids] = flee_chance
+        self.crit_chance[ids] = crit_chance
+        self.dodge_chance[ids] = dodge_chance
+        self.kind[ids] = kind
+        self.active[ids] = True
+
+        if names is None:
+            self.name[ids] = self.name_id("Unnamed")
+        else:
+            self.name[ids] = [self.name_id(name) for name in names]
+
+        return ids
+
+    def spawn_goblins(self, count: int, rng: Optional[GameRandom] = None) -> np.ndarray:
+        """
+        Adds `count` goblins with the stats of the "goblin" prototype of the content registry.
+
+        Args:
+            count (int): The number of goblins.
+            rng (GameRandom): The generator of the goblin names.
+
+        Returns:
+            np.ndarray: The ids of the new goblins.
+        """
+        rng = rng or default_rng()
+        goblin = get_registry().enemies["goblin"].resolved()
+        names = (rng.choice(goblin.names) for _ in range(count))
+
+        return self.spawn(count, EntityKind.GOBLIN, goblin.health, goblin.damage,
+                          flee_chance=goblin.flee_chance, crit_chance=goblin.crit_chance,
+                          names=names)
+
+    def add(self, character: Character) -> int:
+        """
+        Copies a character into a new row.
+
+        Args:
+            character (Character): A hero or an enemy.
+
+        Returns:
+            int: The id of the new entity.
+        """
+        kind = EntityKind.HERO if isinstance(character, Player) else EntityKind.GOBLIN
+        entity = int(self._allocate(1)[0])
+
+        self.kind[entity] = kind
+        self.active[entity] = True
+        self.update(entity, character)
+
+        return entity
+
+    def update(self, entity: int, character: Character) -> None:
+        """
+        Writes the state of a character back into its row.
+
+        Args:
+            entity (int): The id of the entity.
+            character (Character): The character holding the new state.
+        """
+        attributes = character.attributes
+
+        self.health[entity] = attributes.health
+        self.health_max[entity] = attributes.health_max
+        self.damage[entity] = attributes.damage
+        self.flee_chance[entity] = attributes.flee_chance
+        self.crit_chance[entity] = attributes.crit_chance
+        self.dodge_chance[entity] = getattr(character, "dodge_chance", 0)
+        self.experience[entity] = getattr(character, "experience", 0)
+        self.name[entity] = self.name_id(character.name)
+
+    def character(self, entity: int, rng: Optional[GameRandom] = None) -> Character:
+        """
+        Builds a regular character from a row.
+
+        Args:
+            entity (int): The id of the entity.
+            rng (GameRandom): The generator of the character's rolls.
+
+        Returns:
+            Character: A `Player` for heroes, a `Goblin` for goblins.
+        """
+        name = self.names[self.name[entity]]
+        health_max = int(self.health_max[entity])
+        damage = int(self.damage[entity])
+
+        if self.kind[entity] == EntityKind.HERO:
+            character = Player(name=name, health=health_max, damage=damage, rng=rng)
+            character.experience = int(self.experience[entity])
+        else:
+            character = Goblin(name=name, health=health_max, damage=damage, rng=rng)
+
+        character.dodge_chance = int(self.dodge_chance[entity])
+        character.health = int(self.health[entity])
+        character.attributes.flee_chance = int(self.flee_chance[entity])
+        character.attributes.crit_chance = int(self.crit_chance[entity])
+
+        return character
+
+    def remove(self, ids) -> None:
+        """
+        Removes entities, their rows are reused by later spawns.
+
+        Args:
+            ids: A single id or an array of ids.
+        """
+        ids = np.atleast_1d(ids)
+        ids = ids[self.active[ids]]
+
+        self.active[ids] = False
+        self._free.extend(int(entity) for entity in ids)
+
+    def alive(self, kind: Optional[EntityKind] = None) -> np.ndarray:
+        """
+        Gets the ids of the live entities with health above 0.
+
+        Args:
+            kind (EntityKind): Only return entities of this kind.
+
+        Returns:
+            np.ndarray: The ids.
+        """
+        size = self.size
+        mask = self.active[:size] & (self.health[:size] > 0)
+
+        if kind is not None:
+            mask &= self.kind[:size] == kind
+
+        return np.flatnonzero(mask)
+
+    def apply_damage(self, ids: np.ndarray, damage: np.ndarray) -> None:
+        """
+        Subtracts damage from many entities at once.
+
+        Args:
+            ids (np.ndarray): The ids of the damaged entities.
+            damage (np.ndarray): The damage per entity, or a single value for all of them.
+        """
+        self.health[ids] -= np.asarray(damage, dtype=np.int32)
+
+
+def object_size(obj, seen: Optional[set] = None) -> int:
+    """
+    Measures the memory owned by an object and everything it references.
+
+    Objects shared by every entity (``None``, strings, numbers, enum members, classes,
+    random generators, enemy policies and event sinks) are not counted.
+
+    Args:
+        obj: The object to measure.
+        seen (set): Ids of the objects already counted.
+
+    Returns:
+        int: The size in bytes.
+    """
+    seen = set() if seen is None else seen
+    shared = (str, int, float, type, enum.Enum, GameRandom, EnemyPolicy, EventSink)
+    if obj is None or id(obj) in seen or isinstance(obj, shared):
+        return 0
+
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+
+    if isinstance(obj, dict):
+        size += sum(object_size(key, seen) + object_size(value, seen)
+                    for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(object_size(value, seen) for value in obj)
+
+    if hasattr(obj, "__dict__"):
+        size += object_size(vars(obj), seen)
+
+    for cls in type(obj).__mro__:
+        for slot in getattr(cls, "__slots__", ()):
+            if slot != "__dict__" and hasattr(obj, slot):
+                size += object_size(getattr(obj, slot), seen)
+
+    return size
+
+
+def footprint() -> dict:
+    """
+    Measures the bytes per entity of the object and the array representations.
+
+    Returns:
+        dict: Bytes per hero, goblin and item object, and per store row.
+    """
+    return {
+        "Player": object_size(Player()),
+        "Goblin": object_size(Goblin()),
+        "Enemy": object_size(Enemy("Enemy", 10, 1, "?")),
+        "Item": object_size(create_item("spotion")),
+        "EntityStore row": EntityStore.bytes_per_entity(),
+    }
+
+
+if __name__ == "__main__":
+    for label, size in footprint().items():
+        print(f"{label:>16}: {size} bytes")
@@ -0,0 +1,669 @@
+"""
+This module stores the event stream of a game in a compact, append-only binary log and rebuilds
+the state of the game by folding the events back, without rolling dice or prompting anyone.
+
+A log starts with a header, the magic bytes and the format version, followed by one record per
+event:
+
+    u16 size | u8 event type | fixed-size fields | strings (u16 length + UTF-8 bytes)
+
+`size` counts the bytes after itself, so a reader can skip records of unknown types. A record
+cut short by a crash is ignored, everything before it can still be replayed.
+
+Usage:
+    python -m dungeon_crawler.eventlog session.log            # print the events of a log
+    python -m dungeon_crawler.eventlog session.log --state    # print the state after the last event
+"""
+
+import argparse
+import struct
+from itertools import islice
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from .action import PlayerState
+from .combat import Combat
+from .content import create_enemy, get_registry
+from .events import EventSink, EventType
+from .game import Game, GameState
+from .item import Item
+
+MAGIC = b"DCEL"
+FORMAT_VERSION = 2
+MAX_STRING = 1024
+
+HEADER = struct.Struct("<4sH")
+RECORD = struct.Struct("<HB")
+STRING = struct.Struct("<H")
+
+# Fields of every event type, the strings are stored after the fixed-size fields
+SCHEMA = {
+    EventType.GAME_START: (("health", "i"), ("damage", "i"), ("seed", "s"), ("name", "s")),
+    EventType.DAY_START: (("day", "H"),),
+    EventType.DAY_END: (("day", "H"),),
+    EventType.ENCOUNTER: (("day", "H"), ("health", "i"), ("damage", "i"), ("enemy", "s")),
+    EventType.AVOID: (("day", "H"),),
+    EventType.ATTACK: (("turn", "I"), ("hero", "?"), ("damage", "i"), ("crit", "?"),
+                       ("health", "i"), ("enemy", "H")),
+    EventType.DODGE: (("turn", "I"), ("hero", "?")),
+    EventType.FLEE: (("turn", "I"), ("success", "?")),
+    EventType.POTION: (("effect", "i"), ("health", "i")),
+    EventType.ITEM_ADD: (("count", "I"), ("uuid", "s")),
+    EventType.ITEM_USE: (("count", "I"), ("health", "i"), ("uuid", "s")),
+    EventType.ITEM_REMOVE: (("count", "I"), ("uuid", "s")),
+    EventType.XP_GAIN: (("amount", "i"), ("experience", "i")),
+    EventType.VICTORY: (("day", "H"), ("turns", "I")),
+    EventType.GAME_OVER: (("day", "H"), ("cause", "s")),
+    EventType.GAME_END: (("day", "H"), ("survived", "?")),
+    EventType.ENEMY_HEAL: (("turn", "I"), ("enemy", "H"), ("health", "i")),
+    EventType.ENEMY_ESCAPE: (("turn", "I"), ("enemy", "H"), ("success", "?")),
+    EventType.ENEMIES_FLED: (("day", "H"), ("turns", "I")),
+}
+
+
+class FieldCodec:
+    """
+    Packs and unpacks a fixed list of named fields: the fixed-size ones with a single struct,
+    followed by the strings, each prefixed with its length.
+    """
+
+    __slots__ = ("names", "fixed_names", "string_names", "fixed")
+
+    def __init__(self, fields: Tuple[Tuple[str, str], ...]) -> None:
+        """
+        Args:
+            fields (tuple): Pairs of field name and struct format code, "s" for strings.
+        """
+        self.names = tuple(name for name, code in fields if code != "s") + \
+            tuple(name for name, code in fields if code == "s")
+        self.fixed_names = tuple(name for name, code in fields if code != "s")
+        self.string_names = tuple(name for name, code in fields if code == "s")
+        self.fixed = struct.Struct("<" + "".join(code for _, code in fields if code != "s"))
+
+    def pack(self, data: dict) -> bytes:
+        """
+        Packs the fields.
+
+        Args:
+            data (dict): The field values, extra keys are not stored.
+
+        Returns:
+            bytes: The packed fields.
+        """
+        payload = self.fixed.pack(*[data[name] for name in self.fixed_names])
+
+        for name in self.string_names:
+            raw = str(data[name]).encode()[:MAX_STRING]
+            payload += STRING.pack(len(raw)) + raw
+
+        return payload
+
+    def unpack(self, buffer: bytes, offset: int) -> Tuple[tuple, int]:
+        """
+        Unpacks the fields.
+
+        Args:
+            buffer (bytes): The buffer holding the fields.
+            offset (int): The start of the fields.
+
+        Returns:
+            tuple: The values in the order of `names`, and the offset after the fields.
+        """
+        values = self.fixed.unpack_from(buffer, offset)
+        offset += self.fixed.size
+
+        if not self.string_names:
+            return values, offset
+
+        strings = []
+        for _ in self.string_names:
+            length, = STRING.unpack_from(buffer, offset)
+            offset += STRING.size
+            strings.append(buffer[offset:offset + length].decode(errors="replace"))
+            offset += length
+
+        return values + tuple(strings), offset
+
+
+class RecordCodec(FieldCodec):
+    """Packs and unpacks the records of one event type."""
+
+    __slots__ = ("event_type",)
+
+    def __init__(self, event_type: EventType, fields: Tuple[Tuple[str, str], ...]) -> None:
+        super().__init__(fields)
+        self.event_type = event_type
+
+    def encode(self, data: dict) -> bytes:
+        """
+        Builds the record of an event.
+
+        Args:
+            data (dict): The fields of the event, extra fields are not stored.
+
+        Returns:
+            bytes: The record, size prefix included.
+        """
+        payload = self.pack(data)
+        return RECORD.pack(len(payload) + 1, self.event_type.value) + payload
+
+    def decode(self, buffer: bytes, offset: int) -> tuple:
+        """
+        Unpacks the fields of a record.
+
+        Args:
+            buffer (bytes): The log.
+            offset (int): The start of the fields, right after the type code.
+
+        Returns:
+            tuple: The values in the order of `names`.
+        """
+        return self.unpack(buffer, offset)[0]
+
+
+# Indexed by type code, unknown codes are None
+CODECS: List[Optional[RecordCodec]] = [None] * 256
+for _event_type, _fields in SCHEMA.items():
+    CODECS[_event_type.value] = RecordCodec(_event_type, _fields)
+
+
+def encode_event(event_type: EventType, **data) -> bytes:
+    """
+    Builds the record of an event.
+
+    Args:
+        event_type (EventType): The kind of event.
+        **data: The fields listed for the event type in `SCHEMA`.
+
+    Returns:
+        bytes: The record.
+    """
+    return CODECS[event_type.value].encode(data)
+
+
+class BinaryLogSink(EventSink):
+    """
+    Event sink that appends every event to a binary log.
+    """
+
+    def __init__(self, stream: BinaryIO) -> None:
+        """
+        Args:
+            stream (BinaryIO): A stream positioned after the header of a log.
+        """
+        self.stream = stream
+
+    @classmethod
+    def open(cls, path: str) -> "BinaryLogSink":
+        """
+        Opens a log for appending, creating it with a header if it doesn't exist yet. Meant for
+        resuming a log, a new session should use `create`.
+
+        Args:
+            path (str): The path of the log.
+
+        Returns:
+            BinaryLogSink: The sink, to be closed once the session is over.
+
+        Raises:
+            ValueError: If the file is not an event log of a supported version.
+        """
+        stream = open(path, "a+b")
+        stream.seek(0)
+        header = stream.read(HEADER.size)
+
+        if not header:
+            stream.write(HEADER.pack(MAGIC, FORMAT_VERSION))
+        else:
+            try:
+                check_header(header)
+            except ValueError:
+                stream.close()
+                raise
+
+        return cls(stream)
+
+    @classmethod
+    def create(cls, path: str) -> "BinaryLogSink":
+        """
+        Creates a new log, for a session that must not share its file with any other.
+
+        Args:
+            path (str): The path of the log.
+
+        Returns:
+            BinaryLogSink: The sink, to be closed once the session is over.
+
+        Raises:
+            FileExistsError: If the file already exists.
+        """
+        stream = open(path, "xb")
+        stream.write(HEADER.pack(MAGIC, FORMAT_VERSION))
+        return cls(stream)
+
+    def emit(self, event_type: EventType, **data) -> None:
+        self.stream.write(CODECS[event_type.value].encode(data))
+
+    def flush(self) -> None:
+        """Pushes the buffered records to the file."""
+        self.stream.flush()
+
+    def close(self) -> None:
+        """Closes the log."""
+        self.stream.close()
+
+
+def check_header(buffer: bytes) -> None:
+    """
+    Validates the header of a log.
+
+    Raises:
+        ValueError: If the buffer doesn't start with a supported header.
+    """
+    if len(buffer) < HEADER.size:
+        raise ValueError("Truncated event log header")
+
+    magic, version = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError("Not an event log")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported event log version {version}")
+
+
+def iter_records(buffer: bytes) -> Iterator[Tuple[int, tuple]]:
+    """
+    Iterates over the records of a log.
+
+    Args:
+        buffer (bytes): The whole log, header included.
+
+    Yields:
+        tuple: The type code and the field values of every complete record.
+    """
+    check_header(buffer)
+
+    codecs = CODECS
+    unpack_record = RECORD.unpack_from
+    offset = HEADER.size
+    size = len(buffer)
+
+    while offset + RECORD.size <= size:
+        length, code = unpack_record(buffer, offset)
+        end = offset + 2 + length
+        if end > size:
+            break
+
+        codec = codecs[code]
+        if codec is not None:
+            yield code, codec.decode(buffer, offset + RECORD.size)
+
+        offset = end
+
+
+def read_events(buffer: bytes) -> Iterator[Tuple[EventType, dict]]:
+    """
+    Iterates over the events of a log, with named fields.
+
+    Args:
+        buffer (bytes): The whole log, header included.
+
+    Yields:
+        tuple: The event type and its fields, like `ListSink` keeps them.
+    """
+    for code, values in iter_records(buffer):
+        codec = CODECS[code]
+        yield codec.event_type, dict(zip(codec.names, values))
+
+
+class ReplayEnemy:
+    """
+    An enemy of the current encounter, as rebuilt from the events.
+    """
+
+    __slots__ = ("name", "health", "health_max", "damage", "heals", "escaped")
+
+    def __init__(self, name: str, health: int, damage: int) -> None:
+        self.name = name
+        self.health = self.health_max = health
+        self.damage = damage
+        self.heals = 0
+        self.escaped = False
+
+
+class ReplayState:
+    """
+    State of a game rebuilt from its events.
+
+    Every event carries the values it produced (health after an attack, item counts after an
+    inventory change), so folding never needs the rules or the random generator. The enemies of
+    an encounter are kept in the order of their ENCOUNTER events, which is the `position` that
+    attacks refer to. `fighting` is set from the encounter to the end of the fight, `engaged`
+    once the hero took up the fight.
+    """
+
+    __slots__ = ("seed", "name", "health", "health_max", "damage", "experience", "day",
+                 "state", "items", "enemies", "fighting", "engaged", "turn", "events")
+
+    def __init__(self) -> None:
+        self.seed: Optional[int] = None
+        self.name = ""
+        self.health = 0
+        self.health_max = 0
+        self.damage = 0
+        self.experience = 0
+        self.day = 0
+        self.state = GameState.START
+        self.items: Dict[str, int] = {}
+        self.enemies: List[ReplayEnemy] = []
+        self.fighting = False
+        self.engaged = False
+        self.turn = 0
+        self.events = 0
+
+    def __str__(self) -> str:
+        """
+        Returns a short description of the state.
+        """
+        text = (f"{self.name}: day {self.day} ({self.state.name}), health {self.health} / "
+                f"{self.health_max}, damage {self.damage}, experience {self.experience}, "
+                f"items {self.items or '{}'}")
+
+        if self.fighting:
+            text += " | fighting " + ", ".join(f"{enemy.name} ({enemy.health} health)"
+                                               for enemy in self.enemies if not enemy.escaped)
+            text += f" on turn {self.turn}"
+
+        return text + f" | {self.events} events"
+
+    def to_game(self) -> Game:
+        """
+        Builds a `Game` in this state.
+
+        The random generator of the game restarts from the logged seed, the log doesn't record
+        how many numbers were drawn. A log cut during an encounter rebuilds its goblins, the
+        fight prompt is shown again if the hero hadn't answered it, otherwise the fight goes on
+        from the start of the last logged turn.
+
+        Returns:
+            Game: The game, ready to continue at its current state.
+        """
+        game = Game(seed=self.seed)
+        game.day = self.day
+        game.state = self.state
+
+        hero = game.hero
+        hero.name = self.name
+        hero.health_max = self.health_max
+        hero.health = self.health
+        hero.damage = self.damage
+        hero.experience = self.experience
+        hero.state = PlayerState.IN_COMBAT if self.engaged else PlayerState.IDLE
+
+        prototypes = get_registry().items
+        for uuid, count in self.items.items():
+            create = prototypes[uuid].create if uuid in prototypes else lambda: Item(uuid)
+            item = create()
+            if item.stackable:
+                item.amount = count
+                hero.inventory.add_item(item)
+                continue
+
+            hero.inventory.add_item(item)
+            for _ in range(count - 1):
+                hero.inventory.add_item(create())
+
+        if self.fighting:
+            enemies = []
+            for logged in self.enemies:
+                # The log only has the goblin's name and stats, its kind gives the rest
+                enemy = create_enemy("goblin", game.rng, name=logged.name)
+                enemy.health_max = logged.health_max
+                enemy.health = logged.health
+                enemy.damage = logged.damage
+                enemy.potions = max(enemy.potions - logged.heals, 0)
+                enemy.escaped = logged.escaped
+                enemies.append(enemy)
+
+            game.combat = Combat(game, hero, enemies)
+            game.combat.turn = max(self.turn, 1)
+            game.combat.fighting = self.engaged
+
+        return game
+
+
+def _game_start(state: ReplayState, values: tuple) -> None:
+    health, damage, seed, name = values
+    state.__init__()
+    state.seed = int(seed)
+    state.name = name
+    state.health = state.health_max = health
+    state.damage = damage
+    state.state = GameState.DAY
+
+
+def _day_start(state: ReplayState, values: tuple) -> None:
+    state.day = values[0]
+    state.state = GameState.ENCOUNTER
+
+
+def _day_end(state: ReplayState, values: tuple) -> None:
+    state.day = values[0]
+    state.state = GameState.DAY
+    state.fighting = state.engaged = False
+
+
+def _encounter(state: ReplayState, values: tuple) -> None:
+    # The enemies of an encounter are announced one after the other before the fight
+    if not state.fighting:
+        state.enemies = []
+        state.fighting = True
+        state.engaged = False
+
+    _, health, damage, name = values
+    state.enemies.append(ReplayEnemy(name, health, damage))
+    state.turn = 1
+
+
+def _leave_fight(state: ReplayState, values: tuple) -> None:
+    state.fighting = state.engaged = False
+
+
+def _attack(state: ReplayState, values: tuple) -> None:
+    state.turn = values[0]
+    state.engaged = True
+    if values[1]:
+        state.enemies[values[5]].health = values[4]
+    else:
+        state.health = values[4]
+
+
+def _turn(state: ReplayState, values: tuple) -> None:
+    state.turn = values[0]
+    state.engaged = True
+
+
+def _enemy_heal(state: ReplayState, values: tuple) -> None:
+    state.turn, position, health = values
+    enemy = state.enemies[position]
+    enemy.health = health
+    enemy.heals += 1
+    state.engaged = True
+
+
+def _enemy_escape(state: ReplayState, values: tuple) -> None:
+    state.turn, enemy, success = values
+    state.engaged = True
+    if success:
+        state.enemies[enemy].escaped = True
+
+
+def _flee(state: ReplayState, values: tuple) -> None:
+    state.turn = values[0]
+    state.engaged = True
+    if values[1]:
+        state.fighting = state.engaged = False
+
+
+def _potion(state: ReplayState, values: tuple) -> None:
+    state.health = values[1]
+
+
+def _item_count(state: ReplayState, values: tuple) -> None:
+    count, uuid = values
+    if count:
+        state.items[uuid] = count
+    else:
+        state.items.pop(uuid, None)
+
+
+def _item_use(state: ReplayState, values: tuple) -> None:
+    count, state.health, uuid = values
+    if count:
+        state.items[uuid] = count
+    else:
+        state.items.pop(uuid, None)
+
+
+def _xp_gain(state: ReplayState, values: tuple) -> None:
+    state.experience = values[1]
+
+
+def _game_end(state: ReplayState, values: tuple) -> None:
+    state.day = values[0]
+    state.state = GameState.END
+    state.fighting = state.engaged = False
+
+
+def _ignore(state: ReplayState, values: tuple) -> None:
+    pass
+
+
+FOLDS = {
+    EventType.GAME_START: _game_start,
+    EventType.DAY_START: _day_start,
+    EventType.DAY_END: _day_end,
+    EventType.ENCOUNTER: _encounter,
+    EventType.AVOID: _leave_fight,
+    EventType.ATTACK: _attack,
+    EventType.DODGE: _turn,
+    EventType.FLEE: _flee,
+    EventType.POTION: _potion,
+    EventType.ITEM_ADD: _item_count,
+    EventType.ITEM_USE: _item_use,
+    EventType.ITEM_REMOVE: _item_count,
+    EventType.XP_GAIN: _xp_gain,
+    EventType.VICTORY: _leave_fight,
+    EventType.GAME_OVER: _leave_fight,
+    EventType.GAME_END: _game_end,
+    EventType.ENEMY_HEAL: _enemy_heal,
+    EventType.ENEMY_ESCAPE: _enemy_escape,
+    EventType.ENEMIES_FLED: _leave_fight,
+}
+
+_FOLD_TABLE = [FOLDS.get(codec.event_type, _ignore) if codec else _ignore for codec in CODECS]
+
+# Records without strings are unpacked directly, the others go through their codec
+_UNPACK_TABLE = [codec.fixed.unpack_from if codec and not codec.string_names else None
+                 for codec in CODECS]
+
+
+def replay(buffer: bytes, limit: Optional[int] = None,
+           state: Optional[ReplayState] = None) -> ReplayState:
+    """
+    Folds the events of a log into a state.
+
+    Args:
+        buffer (bytes): The whole log, header included.
+        limit (int): Only fold the first `limit` events, to inspect any earlier state.
+        state (ReplayState): A state to continue from, a fresh one by default.
+
+    Returns:
+        ReplayState: The state after the folded events.
+    """
+    check_header(buffer)
+
+    state = state or ReplayState()
+    folds = _FOLD_TABLE
+    unpackers = _UNPACK_TABLE
+    codecs = CODECS
+    unpack_record = RECORD.unpack_from
+
+    attack, dodge = EventType.ATTACK.value, EventType.DODGE.value
+    unpack_attack = unpackers[attack]
+    unpack_dodge = unpackers[dodge]
+
+    offset = HEADER.size
+    size = len(buffer)
+    remaining = -1 if limit is None else limit
+    count = 0
+
+    # Decoding and folding share one loop, this is the hot path of crash recovery and audits.
+    # Attacks and dodges make up most of a log, so they are folded inline.
+    while remaining and offset + 3 <= size:
+        length, code = unpack_record(buffer, offset)
+        end = offset + 2 + length
+        if end > size:
+            break
+
+        if code == attack:
+            state.turn, hero, _, _, health, enemy = unpack_attack(buffer, offset + 3)
+            state.engaged = True
+            if hero:
+                state.enemies[enemy].health = health
+            else:
+                state.health = health
+        elif code == dodge:
+            state.turn = unpack_dodge(buffer, offset + 3)[0]
+            state.engaged = True
+        elif unpackers[code] is not None:
+            folds[code](state, unpackers[code](buffer, offset + 3))
+        elif codecs[code] is not None:
+            folds[code](state, codecs[code].decode(buffer, offset + 3))
+        else:
+            offset = end
+            continue
+
+        offset = end
+        remaining -= 1
+        count += 1
+
+    state.events += count
+    return state
+
+
+def load(path: str, limit: Optional[int] = None) -> ReplayState:
+    """
+    Replays a log file.
+
+    Args:
+        path (str): The path of the log.
+        limit (int): Only fold the first `limit` events.
+
+    Returns:
+        ReplayState: The state after the folded events.
+    """
+    with open(path, "rb") as stream:
+        return replay(stream.read(), limit)
+
+
+def main() -> None:
+    """
+    Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Inspect a dungeon crawler event log.")
+    parser.add_argument("log")
+    parser.add_argument("--state", action="store_true",
+                        help="print the state after the last event instead of the events")
+    parser.add_argument("--limit", type=int, default=None, help="stop after N events")
+    args = parser.parse_args()
+
+    if args.state:
+        print(load(args.log, args.limit))
+        return
+
+    with open(args.log, "rb") as stream:
+        for event_type, data in islice(read_events(stream.read()), args.limit):
+            print(event_type.name, data)
+
+
+if __name__ == "__main__":
+    main()
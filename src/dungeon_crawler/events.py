@@ -0,0 +1,86 @@
+"""
+This module defines the structured events emitted while a game is played, along with the
+`EventSink` classes that receive them. Sinks replace direct `print` calls for code that has
+to run without a terminal, such as the headless engine.
+"""
+
+from enum import Enum, auto
+
+
+class EventType(Enum):
+    """
+    Defines the kinds of events that can happen during a run.
+
+    The values are the type codes of the binary event log, new kinds must be appended.
+    """
+    DAY_START = auto()
+    DAY_END = auto()
+    ENCOUNTER = auto()
+    AVOID = auto()
+    ATTACK = auto()
+    FLEE = auto()
+    POTION = auto()
+    ITEM_ADD = auto()
+    ITEM_USE = auto()
+    XP_GAIN = auto()
+    VICTORY = auto()
+    GAME_OVER = auto()
+    GAME_END = auto()
+    GAME_START = auto()
+    DODGE = auto()
+    ITEM_REMOVE = auto()
+    ENEMY_HEAL = auto()
+    ENEMY_ESCAPE = auto()
+    ENEMIES_FLED = auto()
+
+
+class EventSink:
+    """
+    Base class for event receivers.
+
+    The default implementation discards every event, so it can be used as a null sink.
+    """
+
+    def emit(self, event_type: EventType, **data) -> None:
+        """
+        Receives a single event.
+
+        Args:
+            event_type (EventType): The kind of event.
+            **data: Event specific fields, such as `damage` or `crit`.
+        """
+
+
+NULL_SINK = EventSink()
+
+
+def emit_attack(sink: EventSink, turn: int, attacker, target, result) -> None:
+    """
+    Reports a resolved attack, as an ATTACK event or a DODGE event if the target dodged. An
+    ATTACK names the enemy involved by its `position` in the encounter.
+
+    Args:
+        sink (EventSink): The receiver of the event.
+        turn (int): The combat turn.
+        attacker (Character): The attacking character.
+        target (Character): The attacked character, its health is read after the attack.
+        result (AttackResult): The outcome of the attack.
+    """
+    if result.dodged:
+        sink.emit(EventType.DODGE, turn=turn, hero=attacker.is_hero)
+    else:
+        enemy = target if attacker.is_hero else attacker
+        sink.emit(EventType.ATTACK, turn=turn, hero=attacker.is_hero, damage=result.damage,
+                  crit=result.crit, health=target.health, enemy=enemy.position)
+
+
+class ListSink(EventSink):
+    """
+    Event sink that keeps every event in memory, mostly useful for inspecting a single run.
+    """
+
+    def __init__(self) -> None:
+        self.events = []
+
+    def emit(self, event_type: EventType, **data) -> None:
+        self.events.append((event_type, data))
@@ -5,107 +5,248 @@ enemies, and handling the days of survival. The game is turn-based, and the hero
 while making strategic decisions each day.
 """
 
-import sys
-from random import choice, randint
-from time import sleep
-from util import clear, get_yes_no
-
-import config
-from enemy import Goblin
-from player import Player
-from item import Item, Potion
-from combat import Combat
-
-
-def get_start_message(hero: Player) -> str:
+from enum import Enum, auto
+from random import Random
+from typing import Callable, List, Optional
+from .util import clear, get_yes_no
+
+from . import config
+from . import metrics
+from .enemy import Enemy
+from .player import Player
+from .combat import Combat
+from .console import flush, pause, read, write
+from .content import create_enemy, create_item
+from .events import EventSink, EventType
+
+
+def get_start_message(hero: Player, rng: Random) -> str:
     """
     Gets a random start message for the hero.
 
     Args:
         hero (Player): The hero object.
+        rng (Random): The generator to pick the message with.
 
     Returns:
         str: A randomly generated start message string.
     """
-    message = choice(config.TEMPLATE_START)
+    message = rng.choice(config.TEMPLATE_START)
     return message.format(name=hero.name)
 
 
+def roll_potion_effect(hero: Player, rng: Random) -> int:
+    """
+    Rolls the health effect of a potion found in the dungeon.
+
+    Args:
+        hero (Player): The hero drinking the potion.
+        rng (Random): The generator to roll the effect with.
+
+    Returns:
+        int: The health change, never negative if the hero owns a spellbook.
+    """
+    potion_effect = rng.randint(*config.POTION_EFFECT_RANGE)
+
+    if "spellbook" in hero.inventory:
+        potion_effect = abs(potion_effect)
+
+    return potion_effect
+
+
+class GameState(Enum):
+    """
+    Defines the states of a game session.
+
+    A playthrough goes START -> DAY -> ENCOUNTER -> DAY ... -> END, and END either restarts
+    the session at START or finishes it with QUIT.
+    """
+    START = auto()
+    DAY = auto()
+    ENCOUNTER = auto()
+    END = auto()
+    QUIT = auto()
+
+
 class Game:
     """
     Main game class that handles the flow of the game, including starting the game,
     handling hero actions, and processing encounters.
     """
 
-    def __init__(self) -> None:
-        self.hero = Player()
+    def __init__(self, seed: Optional[int] = None, sink: Optional[EventSink] = None) -> None:
+        """
+        Initializes the game.
+
+        Args:
+            seed (int): Seed of the game's random generator, a random one if not given.
+            sink (EventSink): Receiver for the events of the session, discarded by default.
+        """
+        self.rng = metrics.game_random(seed)
+        self.sink = sink or EventSink()
+        self.hero = self.create_hero()
         self.day = config.GAME_STARTING_DAY
+        self.state = GameState.START
+        self.combat: Optional[Combat] = None
+        self.checkpoint: Optional[Callable[["Game"], None]] = None
+        self.day_draws = 0
+
+    def create_hero(self) -> Player:
+        """
+        Creates a hero that rolls with the game's generator and reports to the game's sink.
+
+        Returns:
+            Player: The new hero.
+        """
+        hero = Player(rng=self.rng)
+        hero.inventory.sink = self.sink
+        return hero
 
     def reset(self) -> None:
         """
         Resets the game state for a new playthrough.
         """
-        self.hero = Player()
+        self.hero = self.create_hero()
         self.day = config.GAME_STARTING_DAY
+        self.combat = None
 
-    def pre_start_game(self) -> None:
+    async def pre_start_game(self) -> None:
         """
         Initializes the game by setting up the hero and displaying a start message.
         """
-        print(config.GAME_NAME)
+        write(config.GAME_NAME)
 
-        self.hero = Player()
-        self.hero.prompt_name()
-        sleep(1 * config.GAME_SPEED)
+        self.hero = self.create_hero()
+        await self.hero.prompt_name()
+        self.sink.emit(EventType.GAME_START, seed=self.rng.root_seed, name=self.hero.name,
+                       health=self.hero.health, damage=self.hero.damage)
+        await pause(1)
 
         # Generate and display a random start message
-        print(f"\n{get_start_message(self.hero)}")
-        sleep(1 * config.GAME_SPEED)
+        write(f"\n{get_start_message(self.hero, self.rng)}")
+        await pause(1)
+
+        await read("\n> [press \033[1mENTER\033[0m to start]")
+
+    async def start_game(self) -> None:
+        """
+        Runs the game session until the player quits.
 
-        input("\n> [press \033[1mENTER\033[0m to start]")
+        Every state handler returns the next state instead of calling the next step, so the
+        session runs at a constant stack depth no matter how many games are replayed.
+        """
+        self.state = GameState.START
+        await self.resume_game()
 
-    def start_game(self) -> None:
+    async def resume_game(self) -> None:
+        """
+        Runs the game session from its current state until the player quits, e.g. after it was
+        restored from a snapshot.
         """
-        Runs the main game loop, handling daily events and progression.
+        while self.state is not GameState.QUIT:
+            self.state = await self.step()
+            self.save()
+
+        flush()
+
+    def save(self) -> None:
+        """
+        Hands the game to the `checkpoint` callback, if one is set. Called between states and
+        at the start of every combat turn.
+        """
+        if self.checkpoint is not None:
+            self.checkpoint(self)
+
+    async def step(self) -> GameState:
+        """
+        Runs the handler of the current state.
+
+        Returns:
+            GameState: The next state of the session.
+        """
+        if self.state is GameState.START:
+            return await self.new_game()
+        if self.state is GameState.DAY:
+            return await self.start_day()
+        if self.state is GameState.ENCOUNTER:
+            return await self.end_day()
+
+        return await self.end_game()
+
+    async def new_game(self) -> GameState:
+        """
+        Starts a new playthrough with a fresh hero.
+
+        Returns:
+            GameState: The first day.
         """
         clear()
         self.reset()
-        self.pre_start_game()
+        await self.pre_start_game()
         clear()
 
-        # Game loop for each day
-        while self.day < config.GAME_MAX_DAYS:
-            self.day += 1
+        return GameState.DAY
+
+    async def start_day(self) -> GameState:
+        """
+        Begins the next day, or ends the game when the terminal day is reached.
+
+        Returns:
+            GameState: The day's encounter, or the end of the game.
+        """
+        if self.day >= config.GAME_MAX_DAYS:
+            return GameState.END
+
+        self.day += 1
+        self.sink.emit(EventType.DAY_START, day=self.day)
+        if metrics.ENABLED:
+            metrics.DAYS.inc()
+            self.day_draws = metrics.draws(self.rng)
 
-            sleep(0.5 * config.GAME_SPEED)
-            print("============================")
-            print(f"     ☀️ Day {self.day} begins...")
-            print("============================")
-            print(self.hero)
+        await pause(0.5)
+        write("============================")
+        write(f"     ☀️ Day {self.day} begins...")
+        write("============================")
+        write(self.hero)
 
-            self.prompt_potion()
+        await self.prompt_potion()
 
-            sleep(1.5 * config.GAME_SPEED)
-            move_text = choice(config.TEMPLATE_MOVE)
-            print("\n" + move_text)
-            sleep(1.5 * config.GAME_SPEED)
+        await pause(1.5)
+        move_text = self.rng.choice(config.TEMPLATE_MOVE)
+        write("\n" + move_text)
+        await pause(1.5)
 
-            self.goblin_encounter()
-            self.find_spellbook()
-            self.learn_fireball()
+        return GameState.ENCOUNTER
 
-            sleep(1 * config.GAME_SPEED)
-            print("============================")
-            print(f"      🌑 Day {self.day} ends...")
-            print("============================")
+    async def end_day(self) -> GameState:
+        """
+        Plays the day's encounter and finishes the day if the hero survived it.
+
+        Returns:
+            GameState: The next day, or the end of the game if the hero died.
+        """
+        await self.goblin_encounter()
 
-            input("\n> [press \033[1mENTER\033[0m to continue...]")
-            clear()
+        if not self.hero.alive():
+            return GameState.END
+
+        self.find_spellbook()
+        self.learn_fireball()
+        self.sink.emit(EventType.DAY_END, day=self.day)
+        if metrics.ENABLED:
+            metrics.DAY_RNG_DRAWS.observe(metrics.draws(self.rng) - self.day_draws)
+
+        await pause(1)
+        write("============================")
+        write(f"      🌑 Day {self.day} ends...")
+        write("============================")
+
+        await read("\n> [press \033[1mENTER\033[0m to continue...]")
+        clear()
 
-        # Game ends when terminal day is reached
-        self.end_game()
+        return GameState.DAY
 
-    def prompt_potion(self):
+    async def prompt_potion(self):
         """
         Prompts the hero to use a SUPER-POTION to restore full health if available.
 
@@ -113,8 +254,8 @@ class Game:
         if they want to use it. If the user agrees, the potion is used to restore
         the hero's health.
         """
-        if (self.hero.inventory.find_item("spotion") and
-                get_yes_no("\n> ⚗️ Use a SUPER-POTION to restore full health? [Y/n] ")):
+        if ("spotion" in self.hero.inventory and
+                await get_yes_no("\n> ⚗️ Use a SUPER-POTION to restore full health? [Y/n] ")):
             item_spotion = self.hero.inventory.find_item("spotion")
             if item_spotion:
                 self.hero.inventory.use_item(item_spotion, self.hero)
@@ -126,20 +267,12 @@ class Game:
         Checks if the hero has the spellbook and whether they have gained enough experience
         to learn the Fireball spell. If so, the Fireball spell is added to their inventory.
         """
-        if (self.hero.inventory.find_item("spellbook")
-                and not self.hero.inventory.find_item("fireball")
+        if ("spellbook" in self.hero.inventory
+                and "fireball" not in self.hero.inventory
                 and self.hero.experience >= config.FIREBALL_XP):
-            item_fireball = Item(
-                "fireball",
-                {
-                    "name": "Fireball",
-                    "description": "A devastating burst of fiery magic",
-                    "icon": "🔥"
-                }
-            )
-            self.hero.inventory.add_item(item_fireball)
-
-            print(f"🔥 \033[1m{self.hero.name}\033[0m learned the Fireball spell!")
+            self.hero.inventory.add_item(create_item("fireball"))
+
+            write(f"🔥 \033[1m{self.hero.name}\033[0m learned the Fireball spell!")
 
     def find_spellbook(self):
         """
@@ -149,41 +282,39 @@ class Game:
         If so, the spellbook is added to the hero's inventory.
         """
         if self.day == config.GAME_SPELLBOOK_DAY:
-            item_spellbook = Item(
-                "spellbook",
-                {
-                    "name": "Spellbook",
-                    "description": "An ancient tome imbued with magical knowledge.",
-                    "icon": "📔"
-                }
-            )
-            self.hero.inventory.add_item(item_spellbook)
+            self.hero.inventory.add_item(create_item("spellbook"))
 
-            print(f"📔 \033[1m{self.hero.name}\033[0m found a spellbook!")
+            write(f"📔 \033[1m{self.hero.name}\033[0m found a spellbook!")
 
-    def show_end_screen(self, message: str) -> None:
+    async def show_end_screen(self, message: str) -> GameState:
         """
         Displays the end screen with a message and prompts the player to replay or quit.
 
         Args:
             message (str): The message to display on the end screen.
+
+        Returns:
+            GameState: START to play again, QUIT otherwise.
         """
-        print(message)
+        write(message)
 
         # Prompt to play again or quit
-        play_again = input(
+        play_again = (await read(
             "> [press \033[1mENTER\033[0m to play again, or type 'q' to quit]: "
-        ).lower()
+        )).lower()
 
         if play_again == "q":
-            print("Thanks for playing! Exiting...")
-            sys.exit()
-        else:
-            self.start_game()
+            write("Thanks for playing! Exiting...")
+            return GameState.QUIT
 
-    def game_over(self) -> None:
+        return GameState.START
+
+    async def game_over(self) -> GameState:
         """
         Displays the game-over screen when the hero loses.
+
+        Returns:
+            GameState: The state chosen on the end screen.
         """
         clear()
 
@@ -192,30 +323,55 @@ class Game:
         if self.day >= config.GAME_MAX_DAYS and self.hero.experience <= 0:
             message += f"\n...because they reached day {config.GAME_MAX_DAYS} with no experience.\n"
 
-        self.show_end_screen(message)
+        return await self.show_end_screen(message)
 
-    def end_game(self) -> None:
+    async def end_game(self) -> GameState:
         """
-        Displays the victory screen if the hero survives until the final day.
+        Displays the victory screen if the hero survives until the final day, or the game-over
+        screen otherwise.
+
+        Returns:
+            GameState: The state chosen on the end screen.
         """
-        if self.hero.experience <= 0:
-            self.game_over()
-            return
+        survived = self.hero.alive() and self.hero.experience > 0
+        if self.hero.alive() and not survived:
+            self.sink.emit(EventType.GAME_OVER, day=self.day, cause="experience")
+        self.sink.emit(EventType.GAME_END, day=self.day, survived=survived)
+
+        if not survived:
+            return await self.game_over()
 
-        self.show_end_screen(f"🥳 \033[1m{self.hero.name}\033[0m survived!"
-                             f"\nWith ✨ \033[1m{self.hero.experience} experience\033[0m\n")
+        return await self.show_end_screen(f"🥳 \033[1m{self.hero.name}\033[0m survived!"
+                                          f"\nWith ✨ \033[1m{self.hero.experience} "
+                                          f"experience\033[0m\n")
 
-    def goblin_encounter(self) -> None:
+    async def goblin_encounter(self) -> None:
         """
         Handles a goblin encounter.
 
         Prompts the user to either fight a goblin or avoid the encounter.
-        If the user chooses to fight, initiates a combat sequence.
+        If the user chooses to fight, initiates a combat sequence. A combat restored from a
+        snapshot is continued instead.
+        """
+        if self.combat is not None:
+            await self.combat.resume()
+        else:
+            self.combat = Combat(self, self.hero, self.spawn_goblins())
+            await self.combat.prompt()
+
+        self.combat = None
+
+    def spawn_goblins(self) -> List[Enemy]:
         """
-        enemy = Goblin()
+        Spawns the goblins of an encounter, as many as `config.GOBLIN_GROUP_SIZE` allows.
 
-        combat = Combat(self, self.hero, enemy)
-        combat.prompt()
+        Returns:
+            List[Enemy]: The goblins.
+        """
+        low, high = config.GOBLIN_GROUP_SIZE
+        count = low if low == high else self.rng.randint(low, high)
+
+        return [create_enemy("goblin", self.rng) for _ in range(count)]
 
     def find_superpotion(self) -> None:
         """
@@ -225,47 +381,34 @@ class Game:
         it increases the hero's super-potion count and displays the result.
         This feature is only available if the hero has a spellbook.
         """
-        if (self.hero.inventory.find_item("spellbook") and randint(1, 100) <=
+        if ("spellbook" in self.hero.inventory and self.rng.randint(1, 100) <=
                 config.POTION_SUPER_FIND_CHANCE):
             # old_spotion = self.hero.superpotion
 
-            item_spotion = Potion(
-                "spotion",
-                {
-                    "name": "Super-potion",
-                    "description": "Restores the hero's health completely when used.",
-                    "icon": "⚗️"
-                }
-            )
-
-            self.hero.inventory.add_item(item_spotion)
-            # print(f"    ⚗️ \033[1m{self.hero.name}\033[0m found a SUPER-POTION! |",
+            self.hero.inventory.add_item(create_item("spotion"))
+            # write(f"    ⚗️ \033[1m{self.hero.name}\033[0m found a SUPER-POTION! |",
             #       old_spotion, f"-> {self.hero.superpotion}")
 
-    def find_potion(self) -> None:
+    async def find_potion(self) -> None:
         """
         Handles the logic for finding and optionally consuming a potion.
 
         A potion is found based on a random chance. The player is prompted to decide whether to
         consume the potion. The potion may have a positive or negative effect on the hero's
         health. If the hero possesses a spellbook, the potion effect is always positive.
+        A potion that kills the hero ends the game once the day's encounter is over.
         """
-        if randint(1, 100) <= config.POTION_FIND_CHANCE:
-            print(f"🧪 \033[1m{self.hero.name}\033[0m found a potion!")
+        if self.rng.randint(1, 100) <= config.POTION_FIND_CHANCE:
+            write(f"🧪 \033[1m{self.hero.name}\033[0m found a potion!")
 
             # Prompt to consume the potion
-            if get_yes_no("    > Potion may be poisonous or healing. Consume it? [Y/n] "):
-                potion_effect = randint(*config.POTION_EFFECT_RANGE)
-
-                if self.hero.inventory.find_item("spellbook"):
-                    potion_effect = abs(potion_effect)
-
+            if await get_yes_no("    > Potion may be poisonous or healing. Consume it? [Y/n] "):
+                potion_effect = roll_potion_effect(self.hero, self.rng)
                 self.hero.health = self.hero.health + potion_effect
-
-                print(f"\n{'😇' if potion_effect > 0 else '🤮'} {potion_effect:+} health")
-
-                # If health is 0 or less - game over
+                self.sink.emit(EventType.POTION, effect=potion_effect, health=self.hero.health)
                 if not self.hero.alive():
-                    self.game_over()
+                    self.sink.emit(EventType.GAME_OVER, day=self.day, cause="potion")
+
+                write(f"\n{'😇' if potion_effect > 0 else '🤮'} {potion_effect:+} health")
             else:
-                print(f"\n\033[1m{self.hero.name}\033[0m decided not to drink the potion...")
+                write(f"\n\033[1m{self.hero.name}\033[0m decided not to drink the potion...")
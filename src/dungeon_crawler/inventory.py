@@ -2,9 +2,20 @@
 This module defines the `Inventory` class, which manages a collection of items that a character
 can carry. The class allows adding, removing, checking for, and using items, as well as displaying
 the inventory contents.
+
+Items are kept in insertion order and indexed by their UUID, along with the total amount of every
+UUID, so looking up, counting and removing items takes constant time no matter how many items an
+inventory holds. A stored item reports its changes to its inventory, which keeps both the totals
+and the version of its status panel up to date.
 """
 
-from item import Item
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional
+
+from .events import NULL_SINK, EventSink, EventType
+from .item import Item
+
+DEFAULT_CAPACITY = 5
 
 
 class Inventory:
@@ -13,41 +24,109 @@ class Inventory:
 
     This class provides methods to add, remove, and use items, as well as to check if an item
     exists in the inventory and display the current contents of the inventory.
+
+    Every stored item is a slot, a stackable item takes a single slot whatever its amount. The
+    `in` operator checks for an item UUID.
+
+    Changes are reported to `sink` with the count of the item left in the inventory.
     """
 
-    def __init__(self):
+    __slots__ = ("_items", "_index", "_totals", "capacity", "sink", "_version", "_panel")
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, sink: EventSink = NULL_SINK):
         """
         Initializes an empty inventory.
 
-        This method creates an empty list to store the items in the inventory.
+        Args:
+            capacity (int): The maximum number of slots.
+            sink (EventSink): Receiver for ITEM_ADD, ITEM_USE and ITEM_REMOVE events.
         """
-        self._items = []
-        self.capacity = 5
+        self._items: Dict[int, Item] = {}
+        # The oldest item of a UUID is found in constant time after removals, which leave holes
+        # at the front of a plain dict
+        self._index: Dict[str, "OrderedDict[int, Item]"] = {}
+        self._totals: Dict[str, int] = {}
+        self.capacity = capacity
+        self.sink = sink
+
+        self._version = 0
+        self._panel = None
 
     def __str__(self):
         """
         Returns a string representation of the inventory, listing all items.
 
-        If the inventory is empty, it returns a message stating that the inventory is empty.
+        If the inventory is empty, it returns a message stating that the inventory is empty. The
+        text is rendered again only when `version` changed since the last call.
 
         Returns:
             str: The inventory's contents as a string.
         """
-        return "🎒 Inventory:\n" + ("\n".join(
-            f"    {str(item)}" for item in self._items) if self._items else "    Inventory is empty.")
+        version = self.version
+        if self._panel is None or self._panel[0] != version:
+            self._panel = (version, "🎒 Inventory:\n" + ("\n".join(
+                f"    {str(item)}" for item in self) if self._items else "    Inventory is empty."))
+
+        return self._panel[1]
+
+    @property
+    def version(self) -> int:
+        """
+        Gets the version of the inventory's contents.
+
+        The counter changes when items are added or removed, and when an item in the inventory
+        changes, e.g. the amount of a stack.
+
+        Returns:
+            int: The counter.
+        """
+        return self._version
+
+    def __len__(self) -> int:
+        """
+        Returns the number of used slots.
+        """
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[Item]:
+        """
+        Iterates over the items in the order they were added.
+        """
+        return iter(self._items.values())
+
+    def __contains__(self, item_uuid: str) -> bool:
+        """
+        Checks whether the inventory holds an item with the given UUID.
+        """
+        return item_uuid in self._index
 
     def add_item(self, item: Item):
         """
         Adds an item to the inventory.
+
+        A stackable item is merged into the stack already in the inventory, otherwise it takes
+        a new slot if one is free.
+
+        Args:
+            item: The item to add.
+
+        Returns:
+            bool: True if the item was added, False if the inventory is full.
         """
         if item.stackable:
             existing_item = self.find_item(item.uuid)
             if existing_item:
                 existing_item.amount += item.amount
+                self._emit(EventType.ITEM_ADD, item.uuid)
                 return True
 
         if len(self._items) < self.capacity:
-            self._items.append(item)
+            self._items[id(item)] = item
+            self._index.setdefault(item.uuid, OrderedDict())[id(item)] = item
+            self._totals[item.uuid] = self._totals.get(item.uuid, 0) + item.amount
+            item._owner = self
+            self._version += 1
+            self._emit(EventType.ITEM_ADD, item.uuid)
             return True
 
         return False
@@ -55,25 +134,30 @@ class Inventory:
     def remove_item(self, item_uuid: str, amount: int = 1):
         """
         Removes an item from the inventory.
+
+        Args:
+            item_uuid: The UUID of the item to remove, the oldest one is removed first.
+            amount: How much to take from a stackable item.
+
+        Returns:
+            Item or None: The removed item, or None if nothing was removed or a stack only
+                shrank.
         """
-        for item in self._items:
-            if item.uuid == item_uuid:
-                if item.stackable:
-                    if item.amount <= amount:
-                        item.on_remove()
-                        self._items.remove(item)
-                        return item
+        item = self.find_item(item_uuid)
+        if item is None:
+            return None
 
-                    item.amount -= amount
-                    return None
-                else:
-                    item.on_remove()
-                    self._items.remove(item)
-                    return item
+        if item.stackable and item.amount > amount:
+            item.amount -= amount
+            self._emit(EventType.ITEM_REMOVE, item_uuid)
+            return None
 
-        return None
+        item.on_remove()
+        self._discard(item)
+        self._emit(EventType.ITEM_REMOVE, item_uuid)
+        return item
 
-    def find_item(self, item_uuid: str):
+    def find_item(self, item_uuid: str) -> Optional[Item]:
         """
         Finds a specific item in the inventory.
 
@@ -81,13 +165,22 @@ class Inventory:
             item_uuid: The item UUID to search for in the inventory.
 
         Returns:
-            Item or None: The item if found, or None if not found.
+            Item or None: The oldest item with this UUID if found, or None if not found.
         """
-        for item in self._items:
-            if item.uuid == item_uuid:
-                return item
+        items = self._index.get(item_uuid)
+        return next(iter(items.values())) if items else None
 
-        return None
+    def count(self, item_uuid: str) -> int:
+        """
+        Counts the items with the given UUID, stacks count with their amount.
+
+        Args:
+            item_uuid: The item UUID to count.
+
+        Returns:
+            int: The total amount, 0 if the inventory holds no such item.
+        """
+        return self._totals.get(item_uuid, 0)
 
     def use_item(self, item: Item, user):
         """
@@ -98,4 +191,39 @@ class Inventory:
             user: The character using the item.
         """
         if item.use(user):
-            self._items.remove(item)
+            self._discard(item)
+
+        self._emit(EventType.ITEM_USE, item.uuid, health=user.health)
+
+    def _emit(self, event_type: EventType, item_uuid: str, **data) -> None:
+        """
+        Reports a change of the items with the given UUID, along with their count. Nothing is
+        computed when no sink is attached.
+        """
+        if self.sink is not NULL_SINK:
+            self.sink.emit(event_type, uuid=item_uuid, count=self.count(item_uuid), **data)
+
+    def _discard(self, item: Item) -> None:
+        """
+        Drops an item from the storage and the UUID index.
+        """
+        del self._items[id(item)]
+        item._owner = None
+
+        items = self._index[item.uuid]
+        del items[id(item)]
+        if items:
+            self._totals[item.uuid] -= item.amount
+        else:
+            del self._index[item.uuid]
+            del self._totals[item.uuid]
+
+        self._version += 1
+
+    def _item_changed(self, item: Item, amount_change: int) -> None:
+        """
+        Bumps the version after an item in the inventory changed, and updates the total of its
+        UUID.
+        """
+        self._totals[item.uuid] += amount_change
+        self._version += 1
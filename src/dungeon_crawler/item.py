@@ -1,9 +1,11 @@
 """
-This module defines the base `Item` class, along with the `Potion` subclass.
+This module defines the base `Item` class, along with the `PotionItem` subclass.
 The `Item` class represents an object that can be added to a character's inventory.
-The `Potion` subclass represents an item that can be used to heal the character.
+The `PotionItem` subclass represents an item that can be used to heal the character.
 """
 
+from .console import write
+
 DEFAULT_NAME = "Item"
 DEFAULT_DESCRIPTION = "Description"
 DEFAULT_ICON = "📦"
@@ -19,6 +21,9 @@ class Item:
     used by a character, though the exact behavior of `use` depends on the specific item.
     """
 
+    __slots__ = ("_uuid", "_name", "_description", "_icon", "_amount", "_max_amount",
+                 "_stackable", "_version", "_panel", "_owner")
+
     def __init__(self, uuid: str, attributes: dict = None) -> None:
         """
         Initializes an item with the given attributes.
@@ -37,15 +42,54 @@ class Item:
         self._max_amount = attributes.get("max_amount", DEFAULT_MAX_AMOUNT)
         self._stackable = self._max_amount > 1 and True or False
 
+        self._version = 0
+        self._panel = None
+        self._owner = None
+
     def __str__(self):
         """
         Returns a string representation of the item, including its icon, name, and description.
 
+        The text is rendered again only when `version` changed since the last call.
+
         Returns:
             str: A string describing the item.
         """
-        return (f"{self.icon} {self.name} \033[1m({self.amount})\033[0m: {self.description} "
-                f"\033[1m[{self.uuid}]\033[0m")
+        if self._panel is None or self._panel[0] != self._version:
+            self._panel = (self._version,
+                           f"{self.icon} {self.name} \033[1m({self.amount})\033[0m: "
+                           f"{self.description} \033[1m[{self.uuid}]\033[0m")
+
+        return self._panel[1]
+
+    def clone(self) -> "Item":
+        """
+        Creates a copy of the item without parsing its attributes again, used to spawn items
+        from the prototypes of the content registry.
+
+        Returns:
+            Item: A new item of the same class with the same attributes.
+        """
+        item = object.__new__(type(self))
+        item._uuid = self._uuid
+        item._name = self._name
+        item._description = self._description
+        item._icon = self._icon
+        item._amount = self._amount
+        item._max_amount = self._max_amount
+        item._stackable = self._stackable
+        item._version = 0
+        item._panel = None
+        item._owner = None
+
+        return item
+
+    @property
+    def version(self) -> int:
+        """
+        Gets a counter that increments whenever the name, description, icon or amount changes.
+        """
+        return self._version
 
     @property
     def uuid(self):
@@ -58,6 +102,7 @@ class Item:
     @name.setter
     def name(self, name: str) -> None:
         self._name = name
+        self._changed(0)
 
     @property
     def description(self) -> str:
@@ -66,6 +111,7 @@ class Item:
     @description.setter
     def description(self, description: str) -> None:
         self._description = description
+        self._changed(0)
 
     @property
     def icon(self) -> str:
@@ -74,6 +120,7 @@ class Item:
     @icon.setter
     def icon(self, icon: str) -> None:
         self._icon = icon
+        self._changed(0)
 
     @property
     def amount(self) -> int:
@@ -81,7 +128,20 @@ class Item:
 
     @amount.setter
     def amount(self, amount: int) -> None:
+        change = amount - self._amount
         self._amount = amount
+        self._changed(change)
+
+    def _changed(self, amount_change: int) -> None:
+        """
+        Bumps the version of the item, and reports the change to the inventory holding it.
+
+        Args:
+            amount_change (int): How much the amount of the item changed.
+        """
+        self._version += 1
+        if self._owner is not None:
+            self._owner._item_changed(self, amount_change)
 
     @property
     def max_amount(self) -> int:
@@ -118,14 +178,19 @@ class Item:
 
 
 class NonInteractableItem(Item):
+    __slots__ = ()
+
     def use(self, user):
-        print(self.icon, self.description)
+        write(self.icon, self.description)
 
 
 class PotionItem(Item):
     """
     A subclass of Item representing a potion that restores health.
     """
+
+    __slots__ = ()
+
     def use(self, user):
         """
         Uses the potion to restore the user's health to full.
@@ -137,6 +202,6 @@ class PotionItem(Item):
             bool: Always returns True to indicate the potion was used successfully.
         """
         user.health = user.health_max
-        print("🩵 Health fully restored")
+        write("🩵 Health fully restored")
 
         return super().use(user)
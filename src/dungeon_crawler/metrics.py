@@ -0,0 +1,331 @@
+"""
+This module defines the process-wide metrics of the game: counters and histograms telling
+whether the latency of a session comes from the engine, the renderer or the player.
+
+Metrics are disabled by default. Every instrumented spot checks `ENABLED` first, so a disabled
+build pays one attribute lookup per turn or frame and nothing per roll: the RNG draws are only
+counted by the `CountingRandom` generators that games create while metrics are enabled.
+
+The registry can be exported as Prometheus text (`to_prometheus`) or as a JSON snapshot
+(`snapshot`), e.g. with `python -m dungeon_crawler.server --metrics metrics.prom`.
+"""
+
+import json
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Union
+
+from .rng import GameRandom
+
+ENABLED = False
+
+SECONDS_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0,
+                   5.0, 10.0, 30.0, 60.0)
+TURN_BUCKETS = (1, 2, 3, 4, 5, 7, 10, 15, 20, 30, 50, 100)
+DRAW_BUCKETS = (5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+
+def _format(value: float) -> str:
+    """
+    Formats a number the way the Prometheus text format expects it.
+    """
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """
+    A value that only goes up, e.g. the number of fights.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str) -> None:
+        """
+        Args:
+            name (str): The name of the metric.
+            help_text (str): What the metric counts.
+        """
+        self.name = name
+        self.help = help_text
+        self.value = 0
+
+    def inc(self, amount: Union[int, float] = 1) -> None:
+        """
+        Increases the counter.
+        """
+        self.value += amount
+
+    def reset(self) -> None:
+        """
+        Sets the counter back to 0.
+        """
+        self.value = 0
+
+    def lines(self) -> List[str]:
+        """
+        Gets the samples of the counter in the Prometheus text format.
+        """
+        return [f"{self.name} {_format(self.value)}"]
+
+    def to_dict(self) -> dict:
+        """
+        Converts the counter into a JSON-serializable dict.
+        """
+        return {"type": self.kind, "help": self.help, "value": self.value}
+
+
+class Histogram:
+    """
+    The distribution of observed values over fixed buckets, e.g. the duration of frames.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float]) -> None:
+        """
+        Args:
+            name (str): The name of the metric.
+            help_text (str): What the metric measures.
+            buckets (Sequence): The upper bounds of the buckets in increasing order, a last
+                unbounded bucket is added.
+        """
+        self.name = name
+        self.help = help_text
+        self.bounds = tuple(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """
+        Records a value, in the first bucket whose upper bound is at least the value.
+        """
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def reset(self) -> None:
+        """
+        Drops every observation.
+        """
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def cumulative(self) -> Dict[str, int]:
+        """
+        Gets the number of observations up to every bound, the way Prometheus reports them.
+
+        Returns:
+            dict: The counts by formatted upper bound, "+Inf" last.
+        """
+        buckets = {}
+        total = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            total += count
+            buckets[_format(bound)] = total
+        return buckets
+
+    def lines(self) -> List[str]:
+        """
+        Gets the samples of the histogram in the Prometheus text format.
+        """
+        lines = [f'{self.name}_bucket{{le="{bound}"}} {count}'
+                 for bound, count in self.cumulative().items()]
+        lines.append(f"{self.name}_sum {_format(self.sum)}")
+        lines.append(f"{self.name}_count {self.count}")
+        return lines
+
+    def to_dict(self) -> dict:
+        """
+        Converts the histogram into a JSON-serializable dict.
+        """
+        return {
+            "type": self.kind,
+            "help": self.help,
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "buckets": self.cumulative(),
+        }
+
+
+class Registry:
+    """
+    The set of metrics exported together.
+    """
+
+    def __init__(self) -> None:
+        self.metrics: Dict[str, Union[Counter, Histogram]] = {}
+
+    def _add(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"metric {metric.name} is registered twice")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        """
+        Registers a counter.
+
+        Returns:
+            Counter: The new counter.
+        """
+        return self._add(Counter(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float]) -> Histogram:
+        """
+        Registers a histogram.
+
+        Returns:
+            Histogram: The new histogram.
+        """
+        return self._add(Histogram(name, help_text, buckets))
+
+    def reset(self) -> None:
+        """
+        Sets every metric back to its initial state.
+        """
+        for metric in self.metrics.values():
+            metric.reset()
+
+    def to_prometheus(self) -> str:
+        """
+        Exports the metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The text dump.
+        """
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.lines())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """
+        Exports the metrics as a JSON-serializable dict.
+
+        Returns:
+            dict: Every metric by name.
+        """
+        return {name: metric.to_dict() for name, metric in self.metrics.items()}
+
+
+REGISTRY = Registry()
+
+FIGHTS = REGISTRY.counter("dungeon_fights_total", "Fights the hero started.")
+FIGHT_TURNS = REGISTRY.histogram("dungeon_fight_turns", "Turns per finished fight.",
+                                 TURN_BUCKETS)
+HERO_INPUT_SECONDS = REGISTRY.histogram(
+    "dungeon_hero_turn_input_seconds", "Time a hero's turn waited on the player.",
+    SECONDS_BUCKETS)
+HERO_COMPUTE_SECONDS = REGISTRY.histogram(
+    "dungeon_hero_turn_compute_seconds",
+    "Time a hero's turn spent computing, without input and pacing.", SECONDS_BUCKETS)
+INPUT_SECONDS = REGISTRY.histogram("dungeon_input_seconds", "Time every prompt waited on the "
+                                   "player.", SECONDS_BUCKETS)
+FRAME_SECONDS = REGISTRY.histogram("dungeon_render_frame_seconds",
+                                   "Time spent sending a frame to its sink.", SECONDS_BUCKETS)
+PANEL_SECONDS = REGISTRY.histogram("dungeon_render_panel_seconds",
+                                   "Time spent rendering a status panel.", SECONDS_BUCKETS)
+DAYS = REGISTRY.counter("dungeon_days_total", "Days played.")
+DAY_RNG_DRAWS = REGISTRY.histogram("dungeon_rng_draws_per_day",
+                                   "Random numbers drawn per completed day.", DRAW_BUCKETS)
+
+
+class CountingRandom(GameRandom):
+    """
+    A `GameRandom` that counts its draws.
+
+    Both primitives every roll goes through are overridden, which keeps the stream identical to
+    the one of a `GameRandom` with the same seed.
+    """
+
+    def __init__(self, seed: Optional[int] = None) -> None:
+        self.draws = 0
+        super().__init__(seed)
+
+    def random(self) -> float:
+        self.draws += 1
+        return super().random()
+
+    def getrandbits(self, k: int) -> int:
+        self.draws += 1
+        return super().getrandbits(k)
+
+
+def game_random(seed: Optional[int] = None) -> GameRandom:
+    """
+    Creates the generator of a game, one that counts its draws if metrics are enabled.
+
+    Args:
+        seed (int): The seed of the stream, a random one if not given.
+
+    Returns:
+        GameRandom: The generator.
+    """
+    return CountingRandom(seed) if ENABLED else GameRandom(seed)
+
+
+def draws(rng: GameRandom) -> int:
+    """
+    Gets the number of draws of a generator, 0 if it doesn't count them.
+    """
+    return getattr(rng, "draws", 0)
+
+
+def enable(reset: bool = True) -> None:
+    """
+    Turns the instrumentation on. Games created from now on count their RNG draws.
+
+    Args:
+        reset (bool): Drop what was recorded before.
+    """
+    global ENABLED
+    if reset:
+        REGISTRY.reset()
+    ENABLED = True
+
+
+def disable() -> None:
+    """
+    Turns the instrumentation off, the recorded metrics are kept.
+    """
+    global ENABLED
+    ENABLED = False
+
+
+def to_prometheus() -> str:
+    """
+    Exports the metrics of the process in the Prometheus text format.
+    """
+    return REGISTRY.to_prometheus()
+
+
+def snapshot() -> dict:
+    """
+    Exports the metrics of the process as a JSON-serializable dict.
+    """
+    return REGISTRY.snapshot()
+
+
+def dump(path: str) -> None:
+    """
+    Writes the metrics to a file, as a JSON snapshot if the path ends with `.json` and as
+    Prometheus text otherwise.
+
+    Args:
+        path (str): The destination file.
+    """
+    if path.endswith(".json"):
+        text = json.dumps(snapshot(), indent=2)
+    else:
+        text = to_prometheus()
+
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(text)
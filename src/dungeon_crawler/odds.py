@@ -0,0 +1,298 @@
+"""
+This module computes the exact outcome distribution of a hero-vs-enemy fight.
+
+A fight, as played by `Combat.fight`, is a Markov chain over (hero health, enemy health): every
+turn the hero attacks (or tries to flee), then the enemy attacks back if it is still alive. The
+solver pushes the probability mass of every state forward one turn at a time until it has been
+absorbed by a win, a loss or an escape. Results are memoized on the stat tuple, so asking for
+the same odds again costs a dictionary lookup.
+
+Usage:
+    python -m dungeon_crawler.odds                 # odds of a fresh hero against a `config` goblin
+    python -m dungeon_crawler.odds --check 100000  # compare with the Monte Carlo resolver
+"""
+
+import argparse
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from .content import create_enemy
+from .enemy import Enemy
+from .player import Player
+from .vector_combat import crit_damage, resolve_fights
+
+MAX_TURNS = 10000
+EPSILON = 1e-15
+
+
+@dataclass(frozen=True)
+class FightOdds:
+    """
+    Exact outcome distribution of a fight.
+
+    Attributes:
+        win (float): Probability that the enemy dies.
+        flee (float): Probability that the hero escapes.
+        loss (float): Probability that the hero dies.
+        expected_damage (float): Expected health lost by the hero, overkill included.
+        expected_turns (float): Expected number of turns.
+        turns (tuple): Probability that the fight ends on turn 1, 2, ...
+        win_health (tuple): (health, probability) pairs of the hero's health after a win.
+        flee_health (tuple): (health, probability) pairs of the hero's health after escaping.
+        unresolved (float): Probability mass still fighting after `MAX_TURNS` turns, only
+            above 0 for fights that can't end, e.g. with 0 damage.
+    """
+    win: float
+    flee: float
+    loss: float
+    expected_damage: float
+    expected_turns: float
+    turns: Tuple[float, ...]
+    win_health: Tuple[Tuple[int, float], ...]
+    flee_health: Tuple[Tuple[int, float], ...]
+    unresolved: float
+
+    def summary(self) -> dict:
+        """
+        Summarizes the odds with the same keys as `FightBatch.summary`.
+
+        Returns:
+            dict: Win, flee and loss rates plus the mean turns and damage taken.
+        """
+        return {
+            "win_rate": self.win,
+            "flee_rate": self.flee,
+            "loss_rate": self.loss,
+            "mean_turns": self.expected_turns,
+            "mean_damage_taken": self.expected_damage,
+        }
+
+
+def hit_chances(damage: int, crit_chance: int) -> Tuple[Tuple[float, int], ...]:
+    """
+    Gets the damage distribution of an attack that can't be dodged.
+
+    Args:
+        damage (int): The attacker's base damage.
+        crit_chance (int): The attacker's crit chance in percent.
+
+    Returns:
+        tuple: (probability, damage) pairs.
+    """
+    crit = min(max(crit_chance, 0), 100) / 100
+    hits: Dict[int, float] = defaultdict(float)
+    hits[crit_damage(damage)] += crit
+    hits[damage] += 1 - crit
+
+    return tuple((probability, amount) for amount, probability in hits.items() if probability)
+
+
+def dodged_hit_chances(damage: int, crit_chance: int,
+                       dodge_chance: int) -> Tuple[Tuple[float, int], ...]:
+    """
+    Gets the damage distribution of an attack on the hero, who dodges on a 1-100 roll of at
+    least `dodge_chance`.
+
+    Args:
+        damage (int): The attacker's base damage.
+        crit_chance (int): The attacker's crit chance in percent.
+        dodge_chance (int): The hero's `dodge_chance`.
+
+    Returns:
+        tuple: (probability, damage) pairs, a dodge deals 0 damage.
+    """
+    dodge = min(max(101 - dodge_chance, 0), 100) / 100
+    hits = ((dodge, 0),) + tuple((probability * (1 - dodge), amount)
+                                 for probability, amount in hit_chances(damage, crit_chance))
+
+    return tuple(hit for hit in hits if hit[0])
+
+
+@lru_cache(maxsize=4096)
+def fight_odds(hero_health: int, hero_damage: int, enemy_health: int, enemy_damage: int,
+               hero_crit: int = 50, hero_dodge: int = 50, hero_flee: int = 25,
+               enemy_crit: int = 50, flee_below: int = 0) -> FightOdds:
+    """
+    Computes the exact odds of a fight.
+
+    Args:
+        hero_health (int): The hero's health at the start of the fight.
+        hero_damage (int): The hero's base damage.
+        enemy_health (int): The enemy's health.
+        enemy_damage (int): The enemy's base damage.
+        hero_crit (int): The hero's crit chance in percent.
+        hero_dodge (int): The hero's `dodge_chance`, the hero dodges on a 1-100 roll of at
+            least this value.
+        hero_flee (int): The hero's flee chance in percent.
+        enemy_crit (int): The enemy's crit chance in percent.
+        flee_below (int): The hero tries to flee instead of attacking while their health is
+            below this value. 0 means the hero always attacks.
+
+    Returns:
+        FightOdds: The outcome distribution.
+    """
+    hero_hits = hit_chances(hero_damage, hero_crit)
+    enemy_hits = dodged_hit_chances(enemy_damage, enemy_crit, hero_dodge)
+    escape = min(max(hero_flee, 0), 100) / 100
+
+    win = flee = loss = 0.0
+    loss_damage = 0.0
+    win_health: Dict[int, float] = defaultdict(float)
+    flee_health: Dict[int, float] = defaultdict(float)
+    turns = []
+
+    live: Dict[Tuple[int, int], float] = {}
+    if hero_health > 0 and enemy_health > 0:
+        live[(hero_health, enemy_health)] = 1.0
+
+    remaining = sum(live.values())
+
+    while remaining > EPSILON and len(turns) < MAX_TURNS:
+        following: Dict[Tuple[int, int], float] = defaultdict(float)
+        ended = 0.0
+
+        for (health, enemy), mass in live.items():
+            # Hero's turn, the enemy only strikes back in the branches that leave it alive
+            if health < flee_below:
+                escaped = mass * escape
+                flee += escaped
+                flee_health[health] += escaped
+                ended += escaped
+                branches = ((mass - escaped, enemy),)
+            else:
+                branches = []
+                for probability, amount in hero_hits:
+                    if enemy - amount <= 0:
+                        win += mass * probability
+                        win_health[health] += mass * probability
+                        ended += mass * probability
+                    else:
+                        branches.append((mass * probability, enemy - amount))
+
+            # Enemy's turn
+            for branch, enemy_left in branches:
+                for probability, amount in enemy_hits:
+                    share = branch * probability
+                    if health - amount <= 0:
+                        loss += share
+                        loss_damage += share * (hero_health - health + amount)
+                        ended += share
+                    else:
+                        following[(health - amount, enemy_left)] += share
+
+        turns.append(ended)
+        live = following
+        remaining = sum(live.values())
+
+    expected_damage = loss_damage + sum(
+        mass * (hero_health - health)
+        for outcome in (win_health, flee_health) for health, mass in outcome.items()
+    )
+
+    return FightOdds(
+        win=win,
+        flee=flee,
+        loss=loss,
+        expected_damage=expected_damage,
+        expected_turns=sum(turn * mass for turn, mass in enumerate(turns, start=1)),
+        turns=tuple(turns),
+        win_health=tuple(sorted(win_health.items())),
+        flee_health=tuple(sorted(flee_health.items())),
+        unresolved=remaining,
+    )
+
+
+def odds_for(hero: Player, enemy: Enemy, flee_below: int = 0) -> FightOdds:
+    """
+    Computes the odds of a fight between two characters, at their current health.
+
+    Args:
+        hero (Player): The hero.
+        enemy (Enemy): The enemy.
+        flee_below (int): The hero tries to flee while their health is below this value.
+
+    Returns:
+        FightOdds: The outcome distribution.
+    """
+    return fight_odds(hero.health, hero.damage, enemy.health, enemy.damage,
+                      hero_crit=hero.crit_chance, hero_dodge=hero.dodge_chance,
+                      hero_flee=hero.flee_chance, enemy_crit=enemy.crit_chance,
+                      flee_below=flee_below)
+
+
+def cross_check(count: int, hero_factory=Player, enemy_factory=None, flee_below: int = 0,
+                seed: Optional[int] = None) -> Dict[str, Tuple[float, float, float]]:
+    """
+    Compares the exact odds with the Monte Carlo resolver `resolve_fights`.
+
+    Args:
+        count (int): The number of simulated fights.
+        hero_factory: Callable returning a fresh hero.
+        enemy_factory: Callable returning a fresh enemy, a goblin by default.
+        flee_below (int): The hero tries to flee while their health is below this value.
+        seed (int): Seed of the simulation.
+
+    Returns:
+        dict: For every statistic of `FightOdds.summary`, the exact value, the simulated value
+            and the standard error of the simulated value.
+    """
+    hero = hero_factory()
+    enemy = enemy_factory() if enemy_factory is not None else create_enemy("goblin")
+    exact = odds_for(hero, enemy, flee_below).summary()
+    batch = resolve_fights(count, hero, enemy, flee_below=flee_below,
+                           rng=np.random.default_rng(seed))
+
+    samples = {
+        "win_rate": batch.won,
+        "flee_rate": batch.fled,
+        "loss_rate": batch.lost,
+        "mean_turns": batch.turns,
+        "mean_damage_taken": batch.damage_taken,
+    }
+
+    return {
+        key: (exact[key], float(values.mean()), float(values.std() / np.sqrt(count)))
+        for key, values in samples.items()
+    }
+
+
+def main() -> None:
+    """
+    Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Exact odds of a hero-vs-goblin fight.")
+    parser.add_argument("--health", type=int, default=None, help="hero health at the start")
+    parser.add_argument("--flee-below", type=int, default=0)
+    parser.add_argument("--check", type=int, default=0, metavar="FIGHTS",
+                        help="compare with this many simulated fights")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    def hero_factory() -> Player:
+        hero = Player()
+        if args.health is not None:
+            hero.health = args.health
+        return hero
+
+    def enemy_factory() -> Enemy:
+        return create_enemy("goblin", name="Goblin")
+
+    odds = odds_for(hero_factory(), enemy_factory(), args.flee_below)
+    for key, value in odds.summary().items():
+        print(f"{key:>18}: {value:.6f}")
+
+    if args.check:
+        print()
+        for key, (exact, simulated, error) in cross_check(
+                args.check, hero_factory, enemy_factory, args.flee_below, args.seed).items():
+            deviation = (simulated - exact) / error if error else 0.0
+            print(f"{key:>18}: exact {exact:.6f}, simulated {simulated:.6f} "
+                  f"({deviation:+.2f} standard errors)")
+
+
+if __name__ == "__main__":
+    main()
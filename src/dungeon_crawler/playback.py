@@ -0,0 +1,572 @@
+"""
+This module plays recorded input transcripts through the interactive game at full speed.
+
+A transcript is one session: the seed of its game and every answer the player gave, each with
+the prompt it answered and a digest of the output shown since the previous answer. Playback
+feeds the answers to the real `Game` through a `ScriptedConsole`, so the code path is the one a
+player goes through, prompts, rendering and all, but paced on a `VirtualClock`: sessions run at
+CPU speed and still report how long they would have lasted.
+
+A session that doesn't go the way it was recorded diverges at the first prompt whose text or
+preceding output differs, when it asks for more answers than were recorded, when it ends with
+answers left, or when its games end differently.
+
+Transcripts are stored as JSON, one session per `.json` file or one per line of a `.jsonl`
+corpus. Corpora can be recorded with a bot that answers every prompt at random.
+
+Usage:
+    python -m dungeon_crawler.playback --record 1000 corpus.jsonl  # record bot sessions
+    python -m dungeon_crawler.playback corpus.jsonl --workers 8    # replay, report divergence
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+from .clock import Clock, VirtualClock
+from .console import Console, set_console
+from .events import EventSink, EventType
+from .game import Game
+from .render import OutputSink
+from .rng import GameRandom, derive_seed
+
+DEFAULT_CHUNK_SIZE = 50
+DIGEST_SIZE = 8
+SHOWN_DIVERGENCES = 10
+
+
+class Step(NamedTuple):
+    """
+    An answer of a transcript.
+
+    Attributes:
+        prompt (str): The prompt it answered.
+        answer (str): The line the player sent.
+        output (str): The digest of the output shown since the previous answer, prompt included.
+    """
+    prompt: str
+    answer: str
+    output: str
+
+
+@dataclass
+class Transcript:
+    """
+    A recorded session.
+
+    Attributes:
+        id (str): The name of the session in reports.
+        seed (int): The seed of the session's game.
+        steps (list): Every answer of the session, in order.
+        outcome (list): The `GAME_END` event of every game of the session.
+        paced (float): The pacing delays of the session in seconds, on the clock of the
+            recording.
+    """
+    id: str
+    seed: int
+    steps: List[Step] = field(default_factory=list)
+    outcome: List[dict] = field(default_factory=list)
+    paced: float = 0.0
+
+    def to_dict(self) -> dict:
+        """
+        Converts the transcript into a JSON-serializable dict.
+        """
+        return {"id": self.id, "seed": self.seed,
+                "steps": [step._asdict() for step in self.steps],
+                "outcome": self.outcome, "paced": self.paced}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Transcript":
+        """
+        Creates a transcript from its dict.
+
+        Raises:
+            KeyError: If a field is missing.
+        """
+        return cls(str(data["id"]), int(data["seed"]),
+                   [Step(step["prompt"], step["answer"], step["output"])
+                    for step in data["steps"]],
+                   list(data.get("outcome", [])), float(data.get("paced", 0.0)))
+
+
+@dataclass
+class Divergence:
+    """
+    The point where a session stopped following its transcript.
+
+    Attributes:
+        step (int): The index of the first step that didn't match.
+        reason (str): "prompt", "output", "exhausted", "unused" or "outcome".
+        expected (str): What the transcript recorded.
+        actual (str): What the session did.
+    """
+    step: int
+    reason: str
+    expected: str
+    actual: str
+
+    def __str__(self) -> str:
+        return (f"step {self.step}: {self.reason} differs, expected {self.expected!r}, "
+                f"got {self.actual!r}")
+
+
+class Diverged(Exception):
+    """Raised by a transcript input to stop a session that diverged."""
+
+    def __init__(self, divergence: Divergence) -> None:
+        super().__init__(str(divergence))
+        self.divergence = divergence
+
+
+class InputProvider:
+    """
+    Base class for the sources of a scripted console's answers.
+    """
+
+    def answer(self, prompt: str, output: str) -> str:
+        """
+        Answers a prompt.
+
+        Args:
+            prompt (str): The prompt.
+            output (str): The digest of the output shown since the previous answer.
+
+        Returns:
+            str: The answer, without the line break.
+        """
+        raise NotImplementedError()
+
+
+class TranscriptInput(InputProvider):
+    """
+    Answers with the steps of a transcript, and stops the session as soon as a prompt doesn't
+    match the recorded one.
+    """
+
+    def __init__(self, transcript: Transcript) -> None:
+        self.steps = transcript.steps
+        self.position = 0
+
+    def answer(self, prompt: str, output: str) -> str:
+        if self.position >= len(self.steps):
+            raise Diverged(Divergence(self.position, "exhausted", "end of session", prompt))
+
+        step = self.steps[self.position]
+        if step.prompt != prompt:
+            raise Diverged(Divergence(self.position, "prompt", step.prompt, prompt))
+        if step.output != output:
+            raise Diverged(Divergence(self.position, "output", step.output, output))
+
+        self.position += 1
+        return step.answer
+
+
+class BotInput(InputProvider):
+    """
+    Answers every prompt at random among the sensible answers, so recorded sessions go
+    through fights, flights, items and invalid choices. Every session quits at its end screen.
+    """
+
+    ANSWERS = {
+        "Hero name": ("Bot",),
+        "Choose an action": ("attack", "attack", "attack", "flee", "use", "continue"),
+        "Which item": ("c", "c", "spotion", "spellbook", "sword"),
+        "[Y/n]": ("y", "n", "", "maybe"),
+        "play again": ("q",),
+    }
+
+    def __init__(self, rng: GameRandom) -> None:
+        """
+        Args:
+            rng (GameRandom): The generator of the answers, separate from the game's.
+        """
+        self.rng = rng
+
+    def answer(self, prompt: str, output: str) -> str:
+        for key, answers in self.ANSWERS.items():
+            if key in prompt:
+                return self.rng.choice(answers)
+
+        return ""
+
+
+class RecordingInput(InputProvider):
+    """
+    Records the answers of another provider as the steps of a transcript.
+    """
+
+    def __init__(self, provider: InputProvider) -> None:
+        self.provider = provider
+        self.steps: List[Step] = []
+
+    def answer(self, prompt: str, output: str) -> str:
+        answer = self.provider.answer(prompt, output)
+        self.steps.append(Step(prompt, answer, output))
+        return answer
+
+
+class DigestSink(OutputSink):
+    """
+    Hashes the frames it receives instead of showing them.
+    """
+
+    def __init__(self) -> None:
+        self.hash = hashlib.blake2b(digest_size=DIGEST_SIZE)
+
+    def write(self, frame: str, prompt: bool = False) -> None:
+        self.hash.update(frame.encode())
+
+    def take(self) -> str:
+        """
+        Gets the digest of the frames received since the previous call.
+
+        Returns:
+            str: The digest in hexadecimal.
+        """
+        digest = self.hash.hexdigest()
+        self.hash = hashlib.blake2b(digest_size=DIGEST_SIZE)
+        return digest
+
+
+class ScriptedConsole(Console):
+    """
+    A console whose player is an `InputProvider`, paced on a virtual clock by default.
+    """
+
+    def __init__(self, provider: InputProvider, clock: Optional[Clock] = None) -> None:
+        """
+        Args:
+            provider (InputProvider): The source of the answers.
+            clock (Clock): The clock pacing the session, a `VirtualClock` by default.
+        """
+        self.output = DigestSink()
+        super().__init__(self.output, clock or VirtualClock())
+        self.provider = provider
+        self.prompt = ""
+
+    async def read(self, prompt: str) -> str:
+        self.prompt = prompt
+        return await super().read(prompt)
+
+    async def read_line(self) -> str:
+        return self.provider.answer(self.prompt, self.output.take())
+
+
+class OutcomeSink(EventSink):
+    """
+    Keeps the `GAME_END` events of a session.
+    """
+
+    def __init__(self) -> None:
+        self.outcome: List[dict] = []
+
+    def emit(self, event_type: EventType, **data) -> None:
+        if event_type is EventType.GAME_END:
+            self.outcome.append(data)
+
+
+@dataclass
+class PlaybackResult:
+    """
+    The playback of one transcript.
+
+    Attributes:
+        id (str): The id of the transcript.
+        steps (int): The number of steps played.
+        paced (float): The pacing delays of the session in seconds.
+        divergence (Divergence): Where the session diverged, None if it followed the transcript.
+    """
+    id: str
+    steps: int
+    paced: float
+    divergence: Optional[Divergence] = None
+
+
+async def play(transcript: Transcript) -> PlaybackResult:
+    """
+    Plays a transcript through the game.
+
+    Args:
+        transcript (Transcript): The recorded session.
+
+    Returns:
+        PlaybackResult: The number of steps played and the divergence, if any.
+    """
+    provider = TranscriptInput(transcript)
+    console = ScriptedConsole(provider)
+    sink = OutcomeSink()
+    set_console(console)
+
+    divergence = None
+    try:
+        await Game(seed=transcript.seed, sink=sink).start_game()
+    except Diverged as error:
+        divergence = error.divergence
+    else:
+        if provider.position < len(transcript.steps):
+            divergence = Divergence(provider.position, "unused",
+                                    transcript.steps[provider.position].prompt, "end of session")
+        elif sink.outcome != transcript.outcome:
+            divergence = Divergence(provider.position, "outcome", json.dumps(transcript.outcome),
+                                    json.dumps(sink.outcome))
+
+    return PlaybackResult(transcript.id, provider.position, console.clock.paced, divergence)
+
+
+async def record(transcript_id: str, seed: int) -> Transcript:
+    """
+    Records a session played by a `BotInput`.
+
+    Args:
+        transcript_id (str): The id of the transcript.
+        seed (int): The seed of the game, the bot's answers are derived from it too.
+
+    Returns:
+        Transcript: The recorded session.
+    """
+    provider = RecordingInput(BotInput(GameRandom(seed).spawn("bot")))
+    console = ScriptedConsole(provider)
+    sink = OutcomeSink()
+    set_console(console)
+
+    await Game(seed=seed, sink=sink).start_game()
+
+    return Transcript(transcript_id, seed, provider.steps, sink.outcome, console.clock.paced)
+
+
+def play_chunk(transcripts: List[dict]) -> List[PlaybackResult]:
+    """
+    Plays a chunk of transcripts one after the other, in a single event loop.
+
+    Args:
+        transcripts (list): The transcripts as dicts, which are cheaper to send to a worker.
+
+    Returns:
+        list: The result of every transcript, in order.
+    """
+    async def play_all() -> List[PlaybackResult]:
+        return [await play(Transcript.from_dict(data)) for data in transcripts]
+
+    return asyncio.run(play_all())
+
+
+def record_chunk(seed: int, start: int, count: int) -> List[dict]:
+    """
+    Records a chunk of bot sessions.
+
+    Args:
+        seed (int): The seed of the whole corpus.
+        start (int): The index of the chunk's first session.
+        count (int): The number of sessions.
+
+    Returns:
+        list: The transcripts as dicts.
+    """
+    async def record_all() -> List[dict]:
+        return [(await record(str(index), derive_seed(seed, index))).to_dict()
+                for index in range(start, start + count)]
+
+    return asyncio.run(record_all())
+
+
+@dataclass
+class PlaybackReport:
+    """
+    Aggregated outcome of a playback.
+    """
+    transcripts: int = 0
+    steps: int = 0
+    paced: float = 0.0
+    seconds: float = 0.0
+    divergences: List[tuple] = field(default_factory=list)
+
+    def add(self, result: PlaybackResult) -> None:
+        """
+        Counts the result of a transcript.
+        """
+        self.transcripts += 1
+        self.steps += result.steps
+        self.paced += result.paced
+        if result.divergence is not None:
+            self.divergences.append((result.id, result.divergence))
+
+    def __str__(self) -> str:
+        """
+        Returns a printable summary of the report.
+        """
+        rate = self.transcripts / self.seconds if self.seconds > 0 else 0.0
+        prompts = self.steps / self.seconds if self.seconds > 0 else 0.0
+        perceived = self.paced / self.transcripts if self.transcripts else 0.0
+        lines = [
+            f"📜 Transcripts: {self.transcripts} in {self.seconds:.2f}s "
+            f"({rate:,.1f}/s, {prompts:,.0f} prompts/s)",
+            f"🕰️ Paced: {perceived:.1f}s per session on the virtual clock",
+            f"🔀 Diverged: {len(self.divergences)}",
+        ]
+
+        for transcript_id, divergence in self.divergences[:SHOWN_DIVERGENCES]:
+            lines.append(f"    {transcript_id}: {divergence}")
+        if len(self.divergences) > SHOWN_DIVERGENCES:
+            lines.append(f"    ... and {len(self.divergences) - SHOWN_DIVERGENCES} more")
+
+        return "\n".join(lines)
+
+
+def _chunks(items: List, size: int) -> Iterator[List]:
+    """
+    Splits a list into chunks of `size` items.
+    """
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def playback(transcripts: List[dict], workers: Optional[int] = None,
+             chunk_size: int = DEFAULT_CHUNK_SIZE) -> PlaybackReport:
+    """
+    Plays transcripts across a process pool.
+
+    Args:
+        transcripts (list): The transcripts as dicts.
+        workers (int): The number of worker processes, all cores by default.
+        chunk_size (int): The number of transcripts a worker plays per task.
+
+    Returns:
+        PlaybackReport: The throughput and the divergences, in the order of the transcripts.
+    """
+    workers = workers or os.cpu_count() or 1
+    report = PlaybackReport()
+    started = time.perf_counter()
+
+    if workers == 1:
+        for chunk in _chunks(transcripts, chunk_size):
+            for result in play_chunk(chunk):
+                report.add(result)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for results in pool.map(play_chunk, _chunks(transcripts, chunk_size)):
+                for result in results:
+                    report.add(result)
+
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def record_corpus(count: int, seed: int = 0, workers: Optional[int] = None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[dict]:
+    """
+    Records bot sessions across a process pool. The corpus only depends on `count` and `seed`.
+
+    Args:
+        count (int): The number of sessions.
+        seed (int): The seed of the corpus.
+        workers (int): The number of worker processes, all cores by default.
+        chunk_size (int): The number of sessions a worker records per task.
+
+    Returns:
+        list: The transcripts as dicts, in order.
+    """
+    workers = workers or os.cpu_count() or 1
+    starts = range(0, count, chunk_size)
+    sizes = [min(chunk_size, count - start) for start in starts]
+
+    if workers == 1:
+        chunks = map(record_chunk, [seed] * len(sizes), starts, sizes)
+        return [transcript for chunk in chunks for transcript in chunk]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunks = pool.map(record_chunk, [seed] * len(sizes), starts, sizes)
+        return [transcript for chunk in chunks for transcript in chunk]
+
+
+def load_transcripts(paths: Iterable[str]) -> List[dict]:
+    """
+    Reads transcripts from `.json` files, `.jsonl` corpora and directories holding them.
+
+    Args:
+        paths (Iterable[str]): The files and directories.
+
+    Returns:
+        list: The transcripts as dicts, in the order of the paths.
+    """
+    transcripts = []
+    for path in paths:
+        if os.path.isdir(path):
+            transcripts.extend(load_transcripts(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.endswith((".json", ".jsonl"))))
+            continue
+
+        with open(path, encoding="utf-8") as file:
+            if path.endswith(".jsonl"):
+                transcripts.extend(json.loads(line) for line in file if line.strip())
+            else:
+                transcripts.append(json.load(file))
+
+    return transcripts
+
+
+def save_transcripts(path: str, transcripts: List[dict]) -> None:
+    """
+    Writes transcripts as a `.jsonl` corpus, or as one `.json` file per session if `path`
+    doesn't end with `.jsonl`, in which case it's a directory.
+
+    Args:
+        path (str): The corpus file or the directory.
+        transcripts (list): The transcripts as dicts.
+    """
+    if path.endswith(".jsonl"):
+        with open(path, "w", encoding="utf-8") as file:
+            for transcript in transcripts:
+                file.write(json.dumps(transcript, ensure_ascii=False) + "\n")
+        return
+
+    os.makedirs(path, exist_ok=True)
+    for transcript in transcripts:
+        with open(os.path.join(path, f"{transcript['id']}.json"), "w", encoding="utf-8") as file:
+            json.dump(transcript, file, ensure_ascii=False)
+
+
+def main() -> None:
+    """
+    Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Play input transcripts through the game.")
+    parser.add_argument("paths", nargs="+", metavar="PATH",
+                        help="transcript files, corpora or directories, or the destination "
+                             "with --record")
+    parser.add_argument("--record", type=int, default=0, metavar="SESSIONS",
+                        help="record this many bot sessions instead of playing")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the recorded corpus")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="transcripts per worker task")
+    args = parser.parse_args()
+
+    if args.record:
+        if len(args.paths) != 1:
+            parser.error("--record takes a single destination")
+        started = time.perf_counter()
+        transcripts = record_corpus(args.record, args.seed, args.workers, args.chunk_size)
+        save_transcripts(args.paths[0], transcripts)
+        print(f"💾 {len(transcripts)} transcripts recorded to {args.paths[0]} in "
+              f"{time.perf_counter() - started:.2f}s")
+        return
+
+    report = playback(load_transcripts(args.paths), args.workers, args.chunk_size)
+    print(report)
+    sys.exit(1 if report.divergences else 0)
+
+
+if __name__ == "__main__":
+    main()
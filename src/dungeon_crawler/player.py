@@ -4,11 +4,14 @@ player's hero in the game. It adds unique attributes and abilities that differen
 from other characters, including experience points, super-potions, and magical abilities.
 """
 
-from enum import Enum, auto
-from random import randint
-from character import Character
-from inventory import Inventory
-import action
+from typing import Optional, Tuple
+from .character import Character
+from .inventory import Inventory
+from .rng import GameRandom
+from .console import read, write
+from .action import PlayerState
+from . import action
+from . import config
 
 DEFAULT_NAME = "Hero"
 DEFAULT_ICON = "🧍"
@@ -16,20 +19,25 @@ DEFAULT_HEALTH = 100
 DEFAULT_DAMAGE = 20
 
 
-class PlayerState(Enum):
-    IDLE = auto(),
-    IN_COMBAT = auto(),
-
-
 class Player(Character):
     """
     Subclass of Character representing the player's hero.
     Adds experience points, super-potions, and magic abilities.
     """
 
+    __slots__ = ("_experience", "dodge_chance", "state")
+
+    actions = {
+        "attack": action.ATTACK,
+        "flee": action.FLEE,
+        "use": action.USE_ITEM,
+        "continue": action.CONTINUE,
+    }
+    is_hero = True
+
     def __init__(self, name: str = DEFAULT_NAME, health: int = DEFAULT_HEALTH,
                  damage: int = DEFAULT_DAMAGE,
-                 icon: str = DEFAULT_ICON) -> None:
+                 icon: str = DEFAULT_ICON, rng: Optional[GameRandom] = None) -> None:
         """
         Initializes a hero with the given attributes, plus experience, super-potions, and magic.
 
@@ -38,31 +46,34 @@ class Player(Character):
             health (int): The health points of the hero.
             damage (int): The damage the hero can inflict.
             icon (str): The visual representation of the hero.
+            rng (GameRandom): The generator of the hero's rolls, usually the game's.
         """
-        super().__init__(name=name, health=health, damage=damage, icon=icon)
+        super().__init__(name=name, health=health, damage=damage, icon=icon, rng=rng)
 
         self._experience = 0
-        self.dodge_chance = 50
+        self.dodge_chance = config.HERO_DODGE_CHANCE
 
         self.inventory = Inventory()
-
-        self.actions = {
-            "attack": action.AttackAction(),
-            "flee": action.FleeAction(),
-            "use": action.UseItemAction(),
-            "continue": action.ContinueAction(),
-        }
-
         self.state = PlayerState.IDLE
 
-    def __str__(self) -> str:
+    def render(self) -> str:
         """
-        Prints the character's current health and name.
+        Renders the hero's status panel, with their experience and inventory.
         """
         text = f"\n    ✨ Experience: {self.experience}\n" + "\n" + str(self.inventory)
-        return super().__str__() + text
+        return super().render() + text
 
-    def prompt_name(self):
+    @property
+    def version(self) -> Tuple[int, int]:
+        """
+        Gets the version of the hero's status panel, which includes the inventory.
+
+        Returns:
+            tuple: The hero's version counter and the inventory's version.
+        """
+        return self._version, self.inventory.version
+
+    async def prompt_name(self):
         """
         Prompts the user for a valid hero name.
 
@@ -70,10 +81,10 @@ class Player(Character):
             str: The hero's name entered by the user.
         """
         while True:
-            hero_name = input("> Hero name: ")
+            hero_name = await read("> Hero name: ")
 
             if not hero_name:
-                print("\n❌ Please enter a valid hero name. The name cannot be empty.\n")
+                write("\n❌ Please enter a valid hero name. The name cannot be empty.\n")
             else:
                 self.name = hero_name
                 return self.name
@@ -82,21 +93,23 @@ class Player(Character):
         """
            Displays the available actions to the player during combat.
         """
-        print("🎭 \033[1mActions:\033[0m")
+        write("🎭 \033[1mActions:\033[0m")
 
         for name in self.actions:
             act = self.actions[name]
             if not act.can_perform(self):
                 continue
 
-            print(f"    [{name}]")
+            write(f"    [{name}]")
 
     def pre_damage(self):
-        if randint(1, 100) >= self.dodge_chance:
-            print(f"💨 \033[1m{self.name}\033[0m swiftly dodged the attack!")
-            return True
+        """
+        Rolls the hero's chance to dodge an incoming attack.
 
-        return False
+        Returns:
+            bool: True if the attack was dodged, False otherwise.
+        """
+        return self.rng.randint(1, 100) >= self.dodge_chance
 
     @property
     def experience(self):
@@ -117,6 +130,7 @@ class Player(Character):
             experience (int): The new experience value to set.
         """
         self._experience = experience
+        self._version += 1
 
     def add_experience(self, experience: int) -> None:
         """
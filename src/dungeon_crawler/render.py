@@ -0,0 +1,155 @@
+"""
+This module defines the `Renderer`, which collects everything a session prints into a frame and
+sends the whole frame to an output sink in a single write.
+
+A frame ends when the session waits for the player, either on a prompt or on a pacing delay, so
+the player sees the same output as before, but a combat turn costs one write instead of one per
+line. The screen is cleared with ANSI escape sequences instead of a `clear` subprocess.
+
+Status panels (characters, inventories) carry a `version` that changes with their contents, the
+renderer uses it to skip panels that are already on screen.
+"""
+
+import sys
+from time import perf_counter
+from typing import TYPE_CHECKING, Dict, List, TextIO
+
+from . import metrics
+
+if TYPE_CHECKING:
+    import asyncio
+
+CLEAR_SCREEN = "\033[2J\033[H"
+
+
+class OutputSink:
+    """Base class for the destinations of rendered frames."""
+
+    def write(self, frame: str, prompt: bool = False) -> None:
+        """
+        Writes a frame.
+
+        Args:
+            frame (str): The text of the frame.
+            prompt (bool): Whether the frame ends with a prompt the player has to answer.
+        """
+        raise NotImplementedError()
+
+
+class TtySink(OutputSink):
+    """Writes frames to a terminal or any other text stream."""
+
+    def __init__(self, stream: TextIO = None) -> None:
+        """
+        Args:
+            stream (TextIO): The stream to write to, `sys.stdout` by default.
+        """
+        self.stream = stream
+
+    def write(self, frame: str, prompt: bool = False) -> None:
+        stream = self.stream or sys.stdout
+        stream.write(frame)
+        stream.flush()
+
+
+class SocketSink(OutputSink):
+    """
+    Writes frames to a telnet client, with CRLF line breaks and a Go Ahead (IAC GA) after every
+    prompt.
+    """
+
+    GO_AHEAD = b"\xff\xf9"
+
+    def __init__(self, writer: "asyncio.StreamWriter") -> None:
+        """
+        Args:
+            writer (asyncio.StreamWriter): The writer of the connection.
+        """
+        self.writer = writer
+
+    def write(self, frame: str, prompt: bool = False) -> None:
+        data = frame.replace("\n", "\r\n").encode()
+        self.writer.write(data + self.GO_AHEAD if prompt else data)
+
+
+class NullSink(OutputSink):
+    """Discards every frame, for sessions nobody watches."""
+
+    def write(self, frame: str, prompt: bool = False) -> None:
+        pass
+
+
+class Renderer:
+    """
+    Buffers the output of a session and presents it one frame at a time.
+    """
+
+    def __init__(self, sink: OutputSink) -> None:
+        """
+        Args:
+            sink (OutputSink): The destination of the frames.
+        """
+        self.sink = sink
+        self.frames = 0
+        self._buffer: List[str] = []
+        self._drawn: Dict[str, tuple] = {}
+
+    def write(self, text: str) -> None:
+        """
+        Adds text to the current frame.
+        """
+        self._buffer.append(text)
+
+    def clear(self) -> None:
+        """
+        Adds a screen clear to the current frame.
+        """
+        self._buffer.append(CLEAR_SCREEN)
+        self._drawn.clear()
+
+    def draw(self, key: str, panel) -> bool:
+        """
+        Adds a status panel to the current frame, unless the same version of the same panel
+        was already drawn in this slot since the screen was last cleared.
+
+        Args:
+            key (str): The slot of the panel on screen, e.g. "hero".
+            panel: An object with a `version` and a cached `__str__`, like a character.
+
+        Returns:
+            bool: Whether the panel was drawn.
+        """
+        version = panel.version
+        drawn = self._drawn.get(key)
+        if drawn is not None and drawn[0] is panel and drawn[1] == version:
+            return False
+
+        self._drawn[key] = (panel, version)
+        started = perf_counter() if metrics.ENABLED else 0.0
+
+        self._buffer.append(f"{panel}\n")
+
+        if metrics.ENABLED:
+            metrics.PANEL_SECONDS.observe(perf_counter() - started)
+        return True
+
+    def present(self, prompt: bool = False) -> None:
+        """
+        Sends the current frame to the sink and starts a new one. Does nothing if the frame is
+        empty and doesn't end with a prompt.
+
+        Args:
+            prompt (bool): Whether the frame ends with a prompt.
+        """
+        if not self._buffer and not prompt:
+            return
+
+        started = perf_counter() if metrics.ENABLED else 0.0
+
+        frame = "".join(self._buffer)
+        self._buffer.clear()
+        self.frames += 1
+        self.sink.write(frame, prompt)
+
+        if metrics.ENABLED:
+            metrics.FRAME_SECONDS.observe(perf_counter() - started)
@@ -0,0 +1,99 @@
+"""
+This module defines `GameRandom`, the random generator every roll of a game goes through.
+
+Each game owns one generator, so a run can be reproduced from its seed. Independent streams for
+parallel workers are derived with `spawn`, which hashes the parent seed together with a key, so
+the same seed and key always produce the same stream.
+"""
+
+import hashlib
+import random
+from typing import Hashable, List, Optional
+
+
+def derive_seed(seed: int, key: Hashable) -> int:
+    """
+    Derives the seed of a child stream.
+
+    Args:
+        seed (int): The seed of the parent stream.
+        key (Hashable): The key identifying the child, e.g. a worker or chunk index.
+
+    Returns:
+        int: A 64-bit seed for the child stream.
+    """
+    digest = hashlib.blake2b(f"{seed}/{key!r}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class GameRandom(random.Random):
+    """
+    Seeded random generator for a single game, with support for splitting off child streams.
+    """
+
+    def __init__(self, seed: Optional[int] = None) -> None:
+        """
+        Initializes the generator.
+
+        Args:
+            seed (int): The seed of the stream, a random one is drawn from the OS if not given.
+        """
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+
+        self.root_seed = seed
+        super().__init__(seed)
+
+    def __reduce__(self):
+        """
+        Keeps the root seed when the generator is pickled, e.g. to be sent to a worker process.
+        """
+        return self.__class__, (self.root_seed,), self.getstate()
+
+    def __setstate__(self, state) -> None:
+        self.setstate(state)
+
+    def spawn(self, key: Hashable) -> "GameRandom":
+        """
+        Creates an independent child stream.
+
+        The child only depends on this generator's root seed and the key, not on how many
+        numbers have been drawn so far.
+
+        Args:
+            key (Hashable): The key identifying the child stream.
+
+        Returns:
+            GameRandom: The child generator.
+        """
+        return GameRandom(derive_seed(self.root_seed, key))
+
+    def split(self, count: int) -> List["GameRandom"]:
+        """
+        Creates `count` independent child streams keyed by their index.
+
+        Args:
+            count (int): The number of streams.
+
+        Returns:
+            list: The child generators.
+        """
+        return [self.spawn(index) for index in range(count)]
+
+
+_default: Optional[GameRandom] = None
+
+
+def default_rng() -> GameRandom:
+    """
+    Gets the process-wide generator used by characters created without a game.
+
+    The generator is created on first use, so importing the game doesn't seed one from the OS.
+
+    Returns:
+        GameRandom: The shared generator.
+    """
+    global _default
+    if _default is None:
+        _default = GameRandom()
+    return _default
@@ -0,0 +1,385 @@
+"""
+Asyncio game server that hosts one `Game` session per TCP connection.
+
+The protocol is plain telnet: output is sent as UTF-8 text and every prompt is followed by a
+telnet Go Ahead (IAC GA), which tells the client (or a bot) that the server waits for a line.
+Prompts await the socket and pacing delays wait on the session's clock (`asyncio.sleep` for the
+real one), so a single process can serve thousands of mostly idle sessions.
+
+Usage:
+    python -m dungeon_crawler.server --port 8023             # serve, `telnet localhost 8023`
+    python -m dungeon_crawler.server --bench 1000 --speed 0  # play bot sessions locally
+    python -m dungeon_crawler.server --metrics metrics.prom  # also export the game metrics
+    python -m dungeon_crawler.server --bench 1000 --clock virtual  # CPU speed, real durations
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import time
+import uuid
+from collections import deque
+from contextlib import suppress
+from typing import Optional
+
+from . import config
+from . import metrics
+from .clock import Clock, create_clock
+from .console import Console, SessionClosed, set_console
+from .eventlog import BinaryLogSink
+from .game import Game
+from .render import SocketSink
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8023
+LATENCY_SAMPLES = 100000
+BACKLOG = 4096
+
+IAC_GA = SocketSink.GO_AHEAD
+TELNET_COMMAND = re.compile(rb"\xff[\xfb-\xfe].|\xff[\xf0-\xfa]", re.DOTALL)
+
+
+class SessionStats:
+    """
+    Counters of a server: sessions started and finished, the latency of every prompt and the
+    duration of every session.
+
+    The prompt latency is the time between the player's answer arriving and the next prompt
+    being sent, minus the pacing delays in between, so it measures the server alone. Session
+    durations are read on the clock of the session, so a virtual or warped clock reports how
+    long the session would have lasted for the player.
+    """
+
+    def __init__(self) -> None:
+        self.started_at = time.perf_counter()
+        self.started = 0
+        self.finished = 0
+        self.prompts = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.durations = deque(maxlen=LATENCY_SAMPLES)
+
+    @property
+    def active(self) -> int:
+        """
+        Gets the number of sessions currently connected.
+
+        Returns:
+            int: The number of active sessions.
+        """
+        return self.started - self.finished
+
+    def sessions_per_second(self) -> float:
+        """
+        Gets the rate of finished sessions since the server started.
+
+        Returns:
+            float: Finished sessions per second.
+        """
+        elapsed = time.perf_counter() - self.started_at
+        return self.finished / elapsed if elapsed > 0 else 0.0
+
+    def latency_percentile(self, percentile: float) -> float:
+        """
+        Gets a percentile of the recent prompt latencies.
+
+        Args:
+            percentile (float): The percentile between 0 and 100.
+
+        Returns:
+            float: The latency in seconds, 0 if no prompt was answered yet.
+        """
+        if not self.latencies:
+            return 0.0
+
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * percentile / 100))
+        return ordered[index]
+
+    def mean_duration(self) -> float:
+        """
+        Gets the mean duration of the recent sessions on their clocks.
+
+        Returns:
+            float: The duration in seconds, 0 if no session finished yet.
+        """
+        return sum(self.durations) / len(self.durations) if self.durations else 0.0
+
+    def __str__(self) -> str:
+        """
+        Returns a one line summary of the counters.
+        """
+        return (f"sessions: {self.active} active, {self.finished} finished "
+                f"({self.sessions_per_second():.1f}/s, {self.mean_duration():.1f} s each) | "
+                f"prompts: {self.prompts} | "
+                f"latency p50 {self.latency_percentile(50) * 1000:.3f} ms, "
+                f"p99 {self.latency_percentile(99) * 1000:.3f} ms")
+
+
+class StreamConsole(Console):
+    """Console of a player connected over a socket."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                 stats: SessionStats, clock: Optional[Clock] = None) -> None:
+        super().__init__(SocketSink(writer), clock)
+        self.reader = reader
+        self.writer = writer
+        self.stats = stats
+
+        self._answered_at: Optional[float] = None
+        self._paused = 0.0
+
+    async def read_line(self) -> str:
+        if self._answered_at is not None:
+            latency = time.perf_counter() - self._answered_at - self._paused
+            self.stats.latencies.append(max(latency, 0.0))
+
+        await self.writer.drain()
+
+        line = await self.reader.readline()
+        if not line:
+            raise SessionClosed()
+
+        self.stats.prompts += 1
+        self._answered_at = time.perf_counter()
+        self._paused = 0.0
+
+        return TELNET_COMMAND.sub(b"", line).decode(errors="replace").rstrip("\r\n")
+
+    async def sleep(self, seconds: float) -> None:
+        # The time really spent, which is not `seconds` on a warped or virtual clock
+        started = time.perf_counter()
+        await super().sleep(seconds)
+        self._paused += time.perf_counter() - started
+
+
+class GameServer:
+    """
+    Accepts connections and plays a separate game with each of them.
+    """
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 log_dir: Optional[str] = None, metrics_path: Optional[str] = None,
+                 clock: str = "real") -> None:
+        """
+        Args:
+            host (str): The interface to listen on.
+            port (int): The port to listen on, 0 picks a free one.
+            log_dir (str): Directory receiving the binary event log of every session, logging
+                is disabled if not given. Every session gets a new file named after its start
+                time and a random id, so restarted servers never append to an older log.
+            metrics_path (str): File receiving the game metrics with every report, Prometheus
+                text or JSON if it ends with `.json`. Metrics are disabled if not given.
+            clock (str): The clock pacing every session, see `clock.create_clock`.
+        """
+        create_clock(clock)  # Fails on an invalid clock now rather than with every connection
+
+        self.host = host
+        self.port = port
+        self.log_dir = log_dir
+        self.metrics_path = metrics_path
+        self.clock = clock
+        self.sessions = 0
+        self.stats = SessionStats()
+        self.server: Optional[asyncio.Server] = None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Plays a game session with a connected player until they quit or disconnect.
+
+        Every connection runs in its own task, so the console set here is only seen by the
+        game of this connection.
+        """
+        self.sessions += 1
+        self.stats.started += 1
+        console = StreamConsole(reader, writer, self.stats, create_clock(self.clock))
+        set_console(console)
+        started = console.clock.now()
+
+        sink = None
+        if self.log_dir:
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:12]}.log"
+            sink = BinaryLogSink.create(os.path.join(self.log_dir, name))
+
+        try:
+            await Game(sink=sink).start_game()
+        except (SessionClosed, ConnectionError):
+            pass
+        finally:
+            if sink is not None:
+                sink.close()
+            self.stats.finished += 1
+            self.stats.durations.append(console.clock.now() - started)
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def start(self) -> asyncio.Server:
+        """
+        Starts listening for connections.
+
+        Returns:
+            asyncio.Server: The listening server. Its port is known even if 0 was requested.
+        """
+        self.server = await asyncio.start_server(self.handle, self.host, self.port,
+                                                 backlog=BACKLOG)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+
+    async def serve_forever(self, report_interval: float = 0) -> None:
+        """
+        Serves players until cancelled, printing the stats and exporting the metrics every
+        `report_interval` seconds.
+        """
+        await self.start()
+        print(f"🏰 Serving on {self.host}:{self.port}")
+
+        async with self.server:
+            if report_interval > 0:
+                while True:
+                    await asyncio.sleep(report_interval)
+                    print(self.stats)
+                    self.export_metrics()
+            else:
+                await self.server.serve_forever()
+
+    def export_metrics(self) -> None:
+        """
+        Writes the game metrics to `metrics_path`, if one was given.
+        """
+        if self.metrics_path:
+            metrics.dump(self.metrics_path)
+
+
+def bot_answer(output: str) -> str:
+    """
+    Picks a bot's answer to the prompt at the end of the output.
+
+    Args:
+        output (str): Everything the server sent since the previous prompt.
+
+    Returns:
+        str: The line to send back.
+    """
+    prompt = output.rsplit("\n", 1)[-1]
+
+    if "Hero name" in prompt:
+        return "Bot"
+    if "Choose an action" in prompt:
+        return "attack"
+    if "Which item" in prompt:
+        return "c"
+    if "play again" in prompt:
+        return "q"
+    if "[Y/n]" in prompt:
+        return "y"
+
+    return ""
+
+
+async def play_bot_session(host: str, port: int) -> int:
+    """
+    Connects to a server and plays one game as a bot that always fights.
+
+    Returns:
+        int: The number of prompts answered.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    buffer = b""
+    answers = 0
+
+    while True:
+        chunk = await reader.read(65536)
+        if not chunk:
+            break
+
+        buffer += chunk
+        while IAC_GA in buffer:
+            output, _, buffer = buffer.partition(IAC_GA)
+            writer.write(bot_answer(output.decode(errors="replace")).encode() + b"\r\n")
+            answers += 1
+
+    writer.close()
+    return answers
+
+
+async def bench(sessions: int, concurrency: int, log_dir: Optional[str] = None,
+                metrics_path: Optional[str] = None, clock: str = "real") -> SessionStats:
+    """
+    Plays bot sessions against a server on an ephemeral local port.
+
+    Args:
+        sessions (int): The number of sessions to play.
+        concurrency (int): The number of sessions connected at the same time.
+        log_dir (str): Directory receiving the event logs of the sessions.
+        metrics_path (str): File receiving the game metrics once the sessions are over.
+        clock (str): The clock pacing every session.
+
+    Returns:
+        SessionStats: The server's stats after the last session finished.
+    """
+    server = GameServer(port=0, log_dir=log_dir, metrics_path=metrics_path, clock=clock)
+    await server.start()
+    limit = asyncio.Semaphore(concurrency)
+
+    async def session() -> None:
+        async with limit:
+            await play_bot_session(server.host, server.port)
+
+    async with server.server:
+        server.stats = SessionStats()
+        await asyncio.gather(*(session() for _ in range(sessions)))
+
+    server.export_metrics()
+    return server.stats
+
+
+def main() -> None:
+    """
+    Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Host dungeon crawler games over TCP.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--speed", type=float, default=None,
+                        help="override config.GAME_SPEED, 0 disables pacing")
+    parser.add_argument("--clock", default="real",
+                        help="clock pacing the sessions: real, zero, virtual or warp:FACTOR")
+    parser.add_argument("--report-interval", type=float, default=0,
+                        help="print the server stats every N seconds")
+    parser.add_argument("--bench", type=int, default=0, metavar="SESSIONS",
+                        help="play bot sessions against a local server and report")
+    parser.add_argument("--concurrency", type=int, default=100,
+                        help="concurrent bot sessions with --bench")
+    parser.add_argument("--log-dir", default=None,
+                        help="write the event log of every session to this directory")
+    parser.add_argument("--metrics", default=None, metavar="PATH",
+                        help="enable the game metrics and export them to this file, as JSON "
+                             "if it ends with .json and as Prometheus text otherwise")
+    args = parser.parse_args()
+
+    try:
+        create_clock(args.clock)
+    except ValueError as error:
+        parser.error(str(error))
+
+    if args.speed is not None:
+        config.GAME_SPEED = args.speed
+    if args.metrics:
+        metrics.enable()
+
+    if args.bench:
+        print(asyncio.run(bench(args.bench, args.concurrency, args.log_dir, args.metrics,
+                                 args.clock)))
+        return
+
+    server = GameServer(args.host, args.port, args.log_dir, args.metrics, args.clock)
+    try:
+        with suppress(KeyboardInterrupt):
+            asyncio.run(server.serve_forever(args.report_interval))
+    finally:
+        server.export_metrics()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""
+Batch Monte Carlo runner for the headless engine.
+
+Plays many full games across a process pool and reports the survival rate, the distribution of
+the final experience and a histogram of the days survived. Every chunk of games is seeded on its
+own, so a run is reproducible for a given seed no matter how many workers are used.
+
+Usage:
+    python -m dungeon_crawler.simulate --runs 100000 --set GOBLIN_DAMAGE=20 \
+        --set HERO_XP_GAIN_RANGE=10,25
+    python -m dungeon_crawler.simulate --runs 100000 --cache results.db  # reuse earlier chunks
+"""
+
+import argparse
+import ast
+import os
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterator, Optional
+
+from . import config
+from .engine import AggressivePolicy, Engine, Policy
+from .rng import GameRandom
+
+if TYPE_CHECKING:
+    from .cache import ResultCache
+
+DEFAULT_CHUNK_SIZE = 1000
+
+POLICY_NAMES = ("aggressive", "optimal")
+
+
+def create_policy(name: str) -> Policy:
+    """
+    Creates a policy of the headless engine.
+
+    The optimal policy is only imported when asked for, since the solver pulls in NumPy and
+    every worker process would pay for it on start-up otherwise.
+
+    Args:
+        name (str): The name of the policy, one of `POLICY_NAMES`.
+
+    Returns:
+        Policy: The new policy.
+
+    Raises:
+        KeyError: If no policy has this name.
+    """
+    if name == "aggressive":
+        return AggressivePolicy()
+    if name == "optimal":
+        from .solver import OptimalPolicy
+        return OptimalPolicy()
+    raise KeyError(name)
+
+
+@dataclass
+class SimulationReport:
+    """
+    Aggregated outcome of many runs.
+
+    Only counters are kept, so merging the reports of different chunks is cheap no matter how
+    many games were played.
+    """
+    runs: int = 0
+    survivals: int = 0
+    days: Counter = field(default_factory=Counter)
+    experience: Counter = field(default_factory=Counter)
+
+    def merge(self, other: "SimulationReport") -> None:
+        """
+        Adds the counters of another report to this one.
+
+        Args:
+            other (SimulationReport): The report to merge.
+        """
+        self.runs += other.runs
+        self.survivals += other.survivals
+        self.days.update(other.days)
+        self.experience.update(other.experience)
+
+    def to_dict(self) -> dict:
+        """
+        Converts the report into a JSON-serializable dict.
+        """
+        return {"runs": self.runs, "survivals": self.survivals, "days": dict(self.days),
+                "experience": dict(self.experience)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SimulationReport":
+        """
+        Creates a report from its dict, the keys of the counters may have become strings.
+        """
+        return cls(data["runs"], data["survivals"],
+                   Counter({int(day): count for day, count in data["days"].items()}),
+                   Counter({int(xp): count for xp, count in data["experience"].items()}))
+
+    @property
+    def survival_rate(self) -> float:
+        """
+        Gets the share of runs the hero survived.
+
+        Returns:
+            float: The survival rate between 0 and 1.
+        """
+        return self.survivals / self.runs if self.runs else 0.0
+
+    @property
+    def mean_experience(self) -> float:
+        """
+        Gets the mean final experience over all runs.
+
+        Returns:
+            float: The mean experience.
+        """
+        if not self.runs:
+            return 0.0
+
+        return sum(xp * count for xp, count in self.experience.items()) / self.runs
+
+    def experience_percentile(self, percentile: float) -> int:
+        """
+        Gets a percentile of the final experience.
+
+        Args:
+            percentile (float): The percentile between 0 and 100.
+
+        Returns:
+            int: The smallest experience value reaching the percentile.
+        """
+        threshold = self.runs * percentile / 100
+        seen = 0
+
+        for xp in sorted(self.experience):
+            seen += self.experience[xp]
+            if seen >= threshold:
+                return xp
+
+        return 0
+
+    def __str__(self) -> str:
+        """
+        Returns a printable summary of the report.
+        """
+        lines = [
+            f"🎲 Runs: {self.runs}",
+            f"🥳 Survival rate: {self.survival_rate:.2%}",
+            f"✨ Experience: mean {self.mean_experience:.1f}, "
+            f"p10 {self.experience_percentile(10)}, "
+            f"p50 {self.experience_percentile(50)}, "
+            f"p90 {self.experience_percentile(90)}",
+            "📅 Days survived:",
+        ]
+
+        peak = max(self.days.values(), default=0) or 1
+        for day in range(1, max(self.days, default=0) + 1):
+            count = self.days[day]
+            bar = "#" * round(40 * count / peak)
+            lines.append(f"    {day:>3} {count:>9} {bar}")
+
+        return "\n".join(lines)
+
+
+def apply_profile(profile: Dict[str, object]) -> None:
+    """
+    Overrides `config` constants with the values of a profile.
+
+    Args:
+        profile (dict): Mapping of constant names to their new values.
+
+    Raises:
+        KeyError: If the profile names a constant that doesn't exist.
+    """
+    for name, value in profile.items():
+        if not hasattr(config, name):
+            raise KeyError(f"Unknown config constant: {name}")
+
+        setattr(config, name, value)
+
+
+@contextmanager
+def profile_applied(profile: Dict[str, object]) -> Iterator[None]:
+    """
+    Overrides `config` constants with a profile for the duration of a `with` block.
+
+    Args:
+        profile (dict): Mapping of constant names to their new values.
+    """
+    original = {name: getattr(config, name) for name in profile if hasattr(config, name)}
+    apply_profile(profile)
+    try:
+        yield
+    finally:
+        apply_profile(original)
+
+
+def run_chunk(seed: int, index: int, runs: int, policy: str) -> SimulationReport:
+    """
+    Plays a chunk of games and aggregates them into a report.
+
+    Args:
+        seed (int): The seed of the whole simulation.
+        index (int): The chunk index, used to derive the chunk's RNG stream.
+        runs (int): The number of games to play.
+        policy (str): The name of the policy, one of `POLICY_NAMES`.
+
+    Returns:
+        SimulationReport: The counters of the chunk.
+    """
+    engine = Engine(create_policy(policy), rng=GameRandom(seed).spawn(index))
+    report = SimulationReport()
+
+    for _ in range(runs):
+        result = engine.run()
+
+        report.runs += 1
+        report.survivals += result.survived
+        report.days[result.days] += 1
+        report.experience[result.experience] += 1
+
+    return report
+
+
+def simulate(runs: int, seed: int = 0, workers: Optional[int] = None,
+             chunk_size: int = DEFAULT_CHUNK_SIZE, policy: str = "aggressive",
+             profile: Optional[Dict[str, object]] = None,
+             cache: Optional["ResultCache"] = None) -> SimulationReport:
+    """
+    Plays many games across a process pool.
+
+    With a cache, the chunks it holds for the same rules, seed and policy aren't played again,
+    and the chunks that are played are added to it.
+
+    Args:
+        runs (int): The total number of games to play.
+        seed (int): The seed of the simulation.
+        workers (int): The number of worker processes, all cores by default.
+        chunk_size (int): The number of games a worker plays per task.
+        policy (str): The name of the policy, one of `POLICY_NAMES`.
+        profile (dict): `config` constants to override in every worker.
+        cache (ResultCache): Cache of chunk reports, every chunk is played if not given.
+
+    Returns:
+        SimulationReport: The aggregated outcome of all runs.
+    """
+    profile = profile or {}
+    workers = workers or os.cpu_count() or 1
+    chunks = [min(chunk_size, runs - start) for start in range(0, runs, chunk_size)]
+
+    report = SimulationReport()
+    pending = list(enumerate(chunks))
+    keys = {}
+
+    if cache is not None:
+        from .cache import chunk_key, rules_digest
+
+        with profile_applied(profile):
+            rules = rules_digest()
+
+        pending = []
+        for index, size in enumerate(chunks):
+            keys[index] = chunk_key(rules, seed, index, size, policy)
+            cached = cache.get(keys[index])
+            if cached is None:
+                pending.append((index, size))
+            else:
+                report.merge(SimulationReport.from_dict(cached))
+
+    def played(index: int, chunk: SimulationReport) -> None:
+        report.merge(chunk)
+        if cache is not None:
+            cache.put(keys[index], chunk.to_dict())
+
+    if workers == 1 or len(pending) <= 1:
+        with profile_applied(profile):
+            for index, size in pending:
+                played(index, run_chunk(seed, index, size, policy))
+    else:
+        # Imported here so the workers, which import this module to run `run_chunk`, start
+        # faster
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=apply_profile,
+                                 initargs=(profile,)) as pool:
+            futures = {pool.submit(run_chunk, seed, index, size, policy): index
+                       for index, size in pending}
+
+            for future in as_completed(futures):
+                played(futures[future], future.result())
+
+    if cache is not None:
+        cache.flush()
+
+    return report
+
+
+def parse_override(text: str) -> tuple:
+    """
+    Parses a `NAME=VALUE` config override from the command line.
+
+    Args:
+        text (str): The override, e.g. `GOBLIN_DAMAGE=20` or `HERO_XP_GAIN_RANGE=10,25`.
+
+    Returns:
+        tuple: The constant name and its parsed value.
+    """
+    name, _, value = text.partition("=")
+    if not value:
+        raise argparse.ArgumentTypeError(f"Expected NAME=VALUE, got {text!r}")
+
+    try:
+        parsed = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        parsed = value
+
+    return name.strip(), parsed
+
+
+def main() -> None:
+    """
+    Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Run many headless dungeon crawler games.")
+    parser.add_argument("--runs", type=int, default=10000, help="number of games to play")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the simulation")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="games per worker task")
+    parser.add_argument("--policy", choices=POLICY_NAMES, default="aggressive")
+    parser.add_argument("--set", dest="overrides", type=parse_override, action="append",
+                        default=[], metavar="NAME=VALUE", help="override a config constant")
+    parser.add_argument("--cache", default=None, metavar="PATH",
+                        help="SQLite file caching the results of every chunk")
+    parser.add_argument("--cache-size", type=float, default=64, metavar="MB",
+                        help="size of the cached results above which old ones are evicted")
+    args = parser.parse_args()
+
+    cache = None
+    if args.cache:
+        from .cache import ResultCache
+        cache = ResultCache(args.cache, int(args.cache_size * 1024 * 1024))
+
+    try:
+        report = simulate(args.runs, seed=args.seed, workers=args.workers,
+                          chunk_size=args.chunk_size, policy=args.policy,
+                          profile=dict(args.overrides), cache=cache)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    print(report)
+    if cache is not None:
+        print(f"🗃️ Cache: {cache.hits} chunks reused, {cache.misses} played")
+
+
+if __name__ == "__main__":
+    main()
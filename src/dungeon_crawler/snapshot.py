@@ -0,0 +1,493 @@
+"""
+This module saves a `Game` to disk and restores it, so a session survives server restarts and
+can be moved to another process.
+
+A save file starts with a header, the magic bytes and the schema version, followed by
+checkpoints:
+
+    u32 size | u32 sequence | u8 section count | sections (u8 id, u32 length, payload)
+
+The state of a game is split into sections (game, hero, inventory, combat and the two halves of
+the random generator state), each packed with a `FieldCodec`. A checkpoint only contains the
+sections that changed since the previous one, so the latest state is the last payload of every
+section. The Mersenne Twister key only changes every 624 draws, so most checkpoints store just
+its position. A checkpoint cut short by a crash is ignored.
+
+Usage:
+    python -m dungeon_crawler.snapshot session.save     # print the latest state of a save file
+"""
+
+import argparse
+import os
+import struct
+from enum import IntEnum
+from typing import Dict, Optional, Tuple
+
+from .action import PlayerState
+from .ai import DEFAULT_POLICY, POLICY_NAMES, get_policy
+from .combat import Combat
+from .content import ENEMY_KINDS, ITEM_KINDS
+from .enemy import Enemy
+from .eventlog import FieldCodec
+from .events import NULL_SINK, EventSink
+from .game import Game, GameState
+from .inventory import Inventory
+from .item import Item
+
+MAGIC = b"DCSV"
+SCHEMA_VERSION = 3
+
+HEADER = struct.Struct("<4sH")
+CHECKPOINT = struct.Struct("<IIB")
+SECTION = struct.Struct("<BI")
+
+RNG_KEY = struct.Struct("<I624I")
+RNG_POSITION = struct.Struct("<I?d")
+
+
+class Section(IntEnum):
+    """Defines the sections of a checkpoint, the values are stored in the file."""
+    GAME = 1
+    HERO = 2
+    INVENTORY = 3
+    COMBAT = 4
+    RNG_KEY = 5
+    RNG_POSITION = 6
+
+
+GAME_FIELDS = FieldCodec((("day", "I"), ("state", "s"), ("seed", "s")))
+
+CHARACTER_FIELDS = (
+    ("health", "i"), ("health_max", "i"), ("damage", "i"), ("flee_chance", "i"),
+    ("crit_chance", "i"), ("dodge_chance", "i"), ("speed", "i"), ("name", "s"), ("icon", "s"),
+)
+HERO_FIELDS = FieldCodec(CHARACTER_FIELDS + (("experience", "i"), ("state", "s")))
+COMBAT_FIELDS = FieldCodec((
+    ("turn", "I"), ("start_health", "i"), ("fighting", "?"), ("size", "I"),
+))
+ENEMY_FIELDS = FieldCodec(CHARACTER_FIELDS + (
+    ("kind", "s"), ("policy", "s"), ("potions", "i"), ("escaped", "?"),
+))
+
+INVENTORY_FIELDS = FieldCodec((("capacity", "I"), ("size", "I")))
+ITEM_FIELDS = FieldCodec((
+    ("amount", "i"), ("max_amount", "i"), ("kind", "s"), ("uuid", "s"), ("name", "s"),
+    ("description", "s"), ("icon", "s"),
+))
+
+
+def character_fields(character) -> dict:
+    """
+    Collects the fields shared by heroes and enemies.
+    """
+    attributes = character.attributes
+    return {
+        "health": attributes.health,
+        "health_max": attributes.health_max,
+        "damage": attributes.damage,
+        "flee_chance": attributes.flee_chance,
+        "crit_chance": attributes.crit_chance,
+        "dodge_chance": character.dodge_chance,
+        "speed": attributes.speed,
+        "name": character.name,
+        "icon": character.icon,
+    }
+
+
+def encode_sections(game: Game) -> Dict[Section, bytes]:
+    """
+    Packs the state of a game.
+
+    Args:
+        game (Game): The game.
+
+    Returns:
+        dict: The payload of every section.
+    """
+    hero = game.hero
+    version, internal, gauss = game.rng.getstate()
+
+    inventory = INVENTORY_FIELDS.pack({"capacity": hero.inventory.capacity,
+                                       "size": len(hero.inventory)})
+    for item in hero.inventory:
+        inventory += ITEM_FIELDS.pack({
+            "amount": item.amount, "max_amount": item.max_amount,
+            "kind": type(item).__name__, "uuid": item.uuid, "name": item.name,
+            "description": item.description, "icon": item.icon,
+        })
+
+    combat = b""
+    if game.combat is not None:
+        combat = COMBAT_FIELDS.pack({
+            "turn": game.combat.turn,
+            "start_health": game.combat.start_health,
+            "fighting": game.combat.fighting,
+            "size": len(game.combat.enemies),
+        })
+        for enemy in game.combat.enemies:
+            combat += ENEMY_FIELDS.pack({
+                **character_fields(enemy), "kind": type(enemy).__name__,
+                "policy": enemy.policy.name, "potions": enemy.potions, "escaped": enemy.escaped,
+            })
+
+    return {
+        Section.GAME: GAME_FIELDS.pack({"day": game.day, "state": game.state.name,
+                                        "seed": game.rng.root_seed}),
+        Section.HERO: HERO_FIELDS.pack({**character_fields(hero),
+                                        "experience": hero.experience,
+                                        "state": hero.state.name}),
+        Section.INVENTORY: inventory,
+        Section.COMBAT: combat,
+        Section.RNG_KEY: RNG_KEY.pack(version, *internal[:624]),
+        Section.RNG_POSITION: RNG_POSITION.pack(internal[624], gauss is not None, gauss or 0.0),
+    }
+
+
+def _restore_character(character, values: dict) -> None:
+    character.health_max = values["health_max"]
+    character.health = values["health"]
+    character.damage = values["damage"]
+    character.attributes.flee_chance = values["flee_chance"]
+    character.attributes.crit_chance = values["crit_chance"]
+    character.dodge_chance = values["dodge_chance"]
+    character.attributes.speed = values["speed"]
+    character.name = values["name"]
+    character.icon = values["icon"]
+
+
+def decode_game(sections: Dict[Section, bytes], sink: Optional[EventSink] = None) -> Game:
+    """
+    Builds a game from the payloads of its sections.
+
+    Args:
+        sections (dict): The payload of every section.
+        sink (EventSink): Receiver for the events of the restored game.
+
+    Returns:
+        Game: The game, ready to continue with `Game.resume_game`.
+    """
+    values = dict(zip(GAME_FIELDS.names, GAME_FIELDS.unpack(sections[Section.GAME], 0)[0]))
+    game = Game(seed=int(values["seed"]), sink=sink)
+    game.day = values["day"]
+    game.state = GameState[values["state"]]
+
+    version, *key = RNG_KEY.unpack(sections[Section.RNG_KEY])
+    position, has_gauss, gauss = RNG_POSITION.unpack(sections[Section.RNG_POSITION])
+    game.rng.setstate((version, tuple(key) + (position,), gauss if has_gauss else None))
+
+    hero = game.hero
+    values = dict(zip(HERO_FIELDS.names, HERO_FIELDS.unpack(sections[Section.HERO], 0)[0]))
+    _restore_character(hero, values)
+    hero.experience = values["experience"]
+    hero.state = PlayerState[values["state"]]
+
+    payload = sections[Section.INVENTORY]
+    (capacity, size), offset = INVENTORY_FIELDS.unpack(payload, 0)
+    hero.inventory = Inventory(capacity, sink=NULL_SINK)
+    for _ in range(size):
+        fields, offset = ITEM_FIELDS.unpack(payload, offset)
+        item = dict(zip(ITEM_FIELDS.names, fields))
+        hero.inventory.add_item(ITEM_KINDS.get(item["kind"], Item)(item["uuid"], item))
+    hero.inventory.sink = game.sink
+
+    payload = sections[Section.COMBAT]
+    if payload:
+        fields, offset = COMBAT_FIELDS.unpack(payload, 0)
+        combat = dict(zip(COMBAT_FIELDS.names, fields))
+
+        enemies = []
+        for _ in range(combat["size"]):
+            fields, offset = ENEMY_FIELDS.unpack(payload, offset)
+            values = dict(zip(ENEMY_FIELDS.names, fields))
+            enemy_class = ENEMY_KINDS.get(values["kind"], Enemy)
+            enemy = enemy_class(name=values["name"], health=values["health_max"],
+                                damage=values["damage"], icon=values["icon"], rng=game.rng)
+            _restore_character(enemy, values)
+            enemy.policy = (get_policy(values["policy"]) if values["policy"] in POLICY_NAMES
+                            else DEFAULT_POLICY)
+            enemy.potions = values["potions"]
+            enemy.escaped = values["escaped"]
+            enemies.append(enemy)
+
+        game.combat = Combat(game, hero, enemies)
+        game.combat.turn = combat["turn"]
+        game.combat.start_health = combat["start_health"]
+        game.combat.fighting = combat["fighting"]
+
+    return game
+
+
+def _check_header(header: bytes) -> None:
+    if len(header) < HEADER.size:
+        raise ValueError("Truncated save file header")
+
+    magic, version = HEADER.unpack_from(header)
+    if magic != MAGIC:
+        raise ValueError("Not a save file")
+    if version != SCHEMA_VERSION:
+        raise ValueError(f"Unsupported save schema version {version}")
+
+
+def scan(buffer: bytes) -> Tuple[Dict[Section, Tuple[int, int]], int]:
+    """
+    Finds the latest payload of every section in a save file.
+
+    Args:
+        buffer (bytes): The whole file, header included.
+
+    Returns:
+        tuple: The offset and length of every section, and the number of checkpoints.
+    """
+    _check_header(buffer)
+
+    index: Dict[Section, Tuple[int, int]] = {}
+    offset = HEADER.size
+    size = len(buffer)
+    checkpoints = 0
+
+    while offset + CHECKPOINT.size <= size:
+        length, _, count = CHECKPOINT.unpack_from(buffer, offset)
+        end = offset + 4 + length
+        if end > size:
+            break
+
+        position = offset + CHECKPOINT.size
+        for _ in range(count):
+            section, section_length = SECTION.unpack_from(buffer, position)
+            position += SECTION.size
+            index[Section(section)] = (position, section_length)
+            position += section_length
+
+        offset = end
+        checkpoints += 1
+
+    return index, checkpoints
+
+
+class Checkpointer:
+    """
+    Appends checkpoints of a game to a save file, writing only the sections that changed.
+
+    An instance can be set as `Game.checkpoint`, so the game is saved between states and at
+    the start of every combat turn.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Opens a save file, creating it if needed. Checkpoints continue from the latest state
+        already in the file.
+
+        Args:
+            path (str): The path of the save file.
+
+        Raises:
+            ValueError: If the file is not a save file of a supported schema version.
+        """
+        self.path = path
+        self.stream = open(path, "a+b")
+        self.stream.seek(0)
+        buffer = self.stream.read()
+
+        self._last: Dict[Section, bytes] = {}
+        self.sequence = 0
+
+        if not buffer:
+            self.stream.write(HEADER.pack(MAGIC, SCHEMA_VERSION))
+            return
+
+        try:
+            index, self.sequence = scan(buffer)
+        except ValueError:
+            self.stream.close()
+            raise
+
+        self._last = {section: buffer[offset:offset + length]
+                      for section, (offset, length) in index.items()}
+
+    def __call__(self, game: Game) -> int:
+        """
+        Writes a checkpoint of a game.
+
+        Args:
+            game (Game): The game.
+
+        Returns:
+            int: The number of bytes written, 0 if nothing changed.
+        """
+        return self.checkpoint(game)
+
+    def checkpoint(self, game: Game, full: bool = False) -> int:
+        """
+        Writes a checkpoint of a game.
+
+        Args:
+            game (Game): The game.
+            full (bool): Write every section, not only the changed ones.
+
+        Returns:
+            int: The number of bytes written, 0 if nothing changed.
+        """
+        sections = encode_sections(game)
+        changed = {section: payload for section, payload in sections.items()
+                   if full or self._last.get(section) != payload}
+        if not changed:
+            return 0
+
+        body = b"".join(SECTION.pack(section, len(payload)) + payload
+                        for section, payload in changed.items())
+        self.sequence += 1
+        record = CHECKPOINT.pack(CHECKPOINT.size - 4 + len(body), self.sequence,
+                                 len(changed)) + body
+
+        self.stream.write(record)
+        self.stream.flush()
+        self._last.update(changed)
+
+        return len(record)
+
+    def close(self) -> None:
+        """Closes the save file."""
+        self.stream.close()
+
+
+class SavedGame:
+    """
+    A save file, read on first use.
+
+    Nothing is read when the object is created, and only the sections asked for are decoded,
+    so thousands of suspended sessions can be listed and restored one by one.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path (str): The path of the save file.
+        """
+        self.path = path
+        self._buffer: Optional[bytes] = None
+        self._index: Dict[Section, Tuple[int, int]] = {}
+        self._checkpoints = 0
+
+    def _load(self) -> None:
+        if self._buffer is None:
+            with open(self.path, "rb") as stream:
+                self._buffer = stream.read()
+            self._index, self._checkpoints = scan(self._buffer)
+
+    @property
+    def checkpoints(self) -> int:
+        """
+        Gets the number of checkpoints in the file.
+        """
+        self._load()
+        return self._checkpoints
+
+    def section(self, section: Section) -> bytes:
+        """
+        Gets the latest payload of a section.
+
+        Args:
+            section (Section): The section.
+
+        Returns:
+            bytes: The payload.
+
+        Raises:
+            KeyError: If no checkpoint contains the section.
+        """
+        self._load()
+        offset, length = self._index[section]
+        return self._buffer[offset:offset + length]
+
+    def sections(self) -> Dict[Section, bytes]:
+        """
+        Gets the latest payload of every section in the file.
+
+        Returns:
+            dict: The payloads by section.
+        """
+        self._load()
+        return {section: self.section(section) for section in self._index}
+
+    def summary(self) -> dict:
+        """
+        Decodes the game and hero sections only.
+
+        Returns:
+            dict: The day, the game state and the hero's fields.
+        """
+        game = GAME_FIELDS.unpack(self.section(Section.GAME), 0)[0]
+        hero = HERO_FIELDS.unpack(self.section(Section.HERO), 0)[0]
+        return {**dict(zip(GAME_FIELDS.names, game)), "hero": dict(zip(HERO_FIELDS.names, hero))}
+
+    def restore(self, sink: Optional[EventSink] = None) -> Game:
+        """
+        Builds the game of the latest checkpoint.
+
+        Args:
+            sink (EventSink): Receiver for the events of the restored game.
+
+        Returns:
+            Game: The game, ready to continue with `Game.resume_game`.
+        """
+        return decode_game(self.sections(), sink)
+
+
+def saved_games(directory: str) -> Dict[str, SavedGame]:
+    """
+    Lists the save files of a directory without reading them.
+
+    Args:
+        directory (str): The directory holding ".save" files.
+
+    Returns:
+        dict: The saved games by file name, without the extension.
+    """
+    return {name[:-len(".save")]: SavedGame(os.path.join(directory, name))
+            for name in os.listdir(directory) if name.endswith(".save")}
+
+
+def compact(path: str) -> int:
+    """
+    Rewrites a save file as a single full checkpoint of its latest state.
+
+    Args:
+        path (str): The path of the save file.
+
+    Returns:
+        int: The size of the compacted file.
+    """
+    sections = SavedGame(path).sections()
+
+    body = b"".join(SECTION.pack(section, len(payload)) + payload
+                    for section, payload in sections.items())
+    data = (HEADER.pack(MAGIC, SCHEMA_VERSION)
+            + CHECKPOINT.pack(CHECKPOINT.size - 4 + len(body), 1, len(sections)) + body)
+
+    with open(path + ".tmp", "wb") as stream:
+        stream.write(data)
+    os.replace(path + ".tmp", path)
+
+    return len(data)
+
+
+def main() -> None:
+    """
+    Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Inspect a dungeon crawler save file.")
+    parser.add_argument("save")
+    parser.add_argument("--compact", action="store_true",
+                        help="rewrite the file as a single checkpoint")
+    args = parser.parse_args()
+
+    if args.compact:
+        print(f"{compact(args.save)} bytes")
+
+    saved = SavedGame(args.save)
+    print(f"{saved.checkpoints} checkpoints, {os.path.getsize(args.save)} bytes")
+    print(saved.summary())
+
+
+if __name__ == "__main__":
+    main()
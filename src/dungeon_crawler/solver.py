@@ -0,0 +1,472 @@
+"""
+This module solves the whole 10-day run for the decisions that maximize the survival chance.
+
+Between two days the state of a run is (day, health, whether the hero has experience, number
+of super-potions). Every day the player can drink a super-potion, fight or avoid the goblin,
+flee mid-fight and drink a potion found after avoiding a fight; everything else follows from
+the day number. `Solver` computes the survival probability of every state by backward
+induction, from the last day to the first, memoizing each state under a compact integer key.
+
+`OptimalPolicy` plays the solved decisions in the headless engine:
+
+    python -m dungeon_crawler.simulate --policy optimal
+
+Usage:
+    python -m dungeon_crawler.solver                        # survival chance and policy of `config`
+    python -m dungeon_crawler.solver --set GOBLIN_DAMAGE=10 # the same with overridden constants
+"""
+
+import argparse
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+
+from . import config
+from .content import get_registry
+from .enemy import Goblin
+from .engine import Policy
+from .odds import dodged_hit_chances, hit_chances
+from .player import Player
+
+
+@dataclass(frozen=True)
+class Rules:
+    """
+    The constants a run depends on, used as the memoization key of a solution.
+    """
+    health: int
+    damage: int
+    crit_chance: int
+    dodge_chance: int
+    flee_chance: int
+    enemy_health: int
+    enemy_damage: int
+    enemy_crit_chance: int
+    starting_day: int
+    max_days: int
+    spellbook_day: int
+    xp_gain_range: Tuple[int, int]
+    potion_effect_range: Tuple[int, int]
+    potion_find_chance: int
+    superpotion_find_chance: int
+    group_size: Tuple[int, int] = (1, 1)
+
+    @classmethod
+    def from_config(cls) -> "Rules":
+        """
+        Reads the rules from `config`, the stats of a fresh hero and the goblin prototype.
+
+        Returns:
+            Rules: The current rules.
+        """
+        hero = Player()
+        goblin = get_registry().enemies["goblin"].resolved()
+
+        return cls(
+            health=hero.health_max,
+            damage=hero.damage,
+            crit_chance=hero.crit_chance,
+            dodge_chance=hero.dodge_chance,
+            flee_chance=hero.flee_chance,
+            enemy_health=goblin.health,
+            enemy_damage=goblin.damage,
+            enemy_crit_chance=goblin.crit_chance,
+            starting_day=config.GAME_STARTING_DAY,
+            max_days=config.GAME_MAX_DAYS,
+            spellbook_day=config.GAME_SPELLBOOK_DAY,
+            xp_gain_range=tuple(config.HERO_XP_GAIN_RANGE),
+            potion_effect_range=tuple(config.POTION_EFFECT_RANGE),
+            potion_find_chance=config.POTION_FIND_CHANCE,
+            superpotion_find_chance=config.POTION_SUPER_FIND_CHANCE,
+            group_size=tuple(config.GOBLIN_GROUP_SIZE),
+        )
+
+
+def _chance(percent: int) -> float:
+    """
+    Converts a percentage compared against a 1-100 roll into a probability.
+    """
+    return min(max(percent, 0), 100) / 100
+
+
+class Solver:
+    """
+    Backward induction over the states of a run.
+
+    `value` is the survival probability once `day` days are over. The action values of a day
+    (`encounter`, `potion`, `combat`) are computed from the values of the following day, so
+    `solve` fills the days from the last one backwards and no recursion crosses more than a
+    single day.
+    """
+
+    def __init__(self, rules: Rules) -> None:
+        """
+        Args:
+            rules (Rules): The rules of the run.
+
+        Raises:
+            ValueError: If experience gains can be negative, the solver only tracks whether
+                the hero has any experience, or if encounters can have several goblins, it
+                models a single one.
+        """
+        low, high = rules.xp_gain_range
+        if low < 0:
+            raise ValueError("The solver requires non-negative experience gains")
+        if rules.group_size != (1, 1):
+            raise ValueError("The solver requires a single goblin per encounter, "
+                             f"GOBLIN_GROUP_SIZE is {rules.group_size}")
+
+        self.rules = rules
+        self.hero_hits = hit_chances(rules.damage, rules.crit_chance)
+        self.enemy_hits = dodged_hit_chances(rules.enemy_damage, rules.enemy_crit_chance,
+                                             rules.dodge_chance)
+        self.escape = _chance(rules.flee_chance)
+        self.xp_chance = sum(gain > 0 for gain in range(low, high + 1)) / (high - low + 1)
+        self.potion_chance = _chance(rules.potion_find_chance)
+        self.superpotion_chance = _chance(rules.superpotion_find_chance)
+
+        low, high = rules.potion_effect_range
+        self.potion_effects = range(low, high + 1)
+
+        self._spotions = max(rules.max_days - rules.starting_day, 0) + 1
+        self._values: Dict[int, float] = {}
+        self._combat: Dict[int, Tuple[float, float]] = {}
+
+    def __len__(self) -> int:
+        """
+        Returns the number of memoized states.
+        """
+        return len(self._values) + len(self._combat)
+
+    def _key(self, day: int, health: int, experienced: bool, spotions: int) -> int:
+        """
+        Packs a state into a single integer.
+        """
+        return (((day * (self.rules.health + 1) + health) * 2 + experienced)
+                * self._spotions + spotions)
+
+    def has_spellbook(self, day: int) -> bool:
+        """
+        Checks whether the hero owns the spellbook during the encounter of a day, it's found
+        at the end of `config.GAME_SPELLBOOK_DAY`.
+
+        Args:
+            day (int): The current day.
+
+        Returns:
+            bool: Whether the spellbook is in the inventory.
+        """
+        return self.rules.starting_day < self.rules.spellbook_day < day
+
+    def max_spotions(self, day: int) -> int:
+        """
+        Gets the most super-potions the hero can own once `day` days are over.
+
+        Args:
+            day (int): The number of days over.
+
+        Returns:
+            int: One per win after the spellbook was found.
+        """
+        if not self.rules.starting_day < self.rules.spellbook_day:
+            return 0
+
+        return min(max(day - self.rules.spellbook_day, 0), self._spotions - 1)
+
+    def value(self, day: int, health: int, experienced: bool, spotions: int) -> float:
+        """
+        Gets the survival probability of a state between two days.
+
+        Args:
+            day (int): The number of days over.
+            health (int): The hero's health.
+            experienced (bool): Whether the hero has any experience.
+            spotions (int): The number of super-potions.
+
+        Returns:
+            float: The survival probability with optimal play.
+        """
+        if health <= 0:
+            return 0.0
+        if day >= self.rules.max_days:
+            return float(experienced)
+
+        spotions = min(spotions, self._spotions - 1)
+        key = self._key(day, health, experienced, spotions)
+        value = self._values.get(key)
+
+        if value is None:
+            value = max(self.encounter(day + 1, health, experienced, spotions))
+            if spotions:
+                value = max(value, *self.encounter(day + 1, self.rules.health, experienced,
+                                                   spotions - 1))
+            self._values[key] = value
+
+        return value
+
+    def encounter(self, day: int, health: int, experienced: bool,
+                  spotions: int) -> Tuple[float, float]:
+        """
+        Gets the values of fighting and avoiding the goblin of a day.
+
+        Args:
+            day (int): The current day.
+            health (int): The hero's health.
+            experienced (bool): Whether the hero has any experience.
+            spotions (int): The number of super-potions.
+
+        Returns:
+            tuple: The survival probabilities when fighting and when avoiding.
+        """
+        fight = max(self.combat(day, health, self.rules.enemy_health, experienced, spotions))
+        avoid = ((1 - self.potion_chance) * self.value(day, health, experienced, spotions)
+                 + self.potion_chance * max(self.potion(day, health, experienced, spotions)))
+
+        return fight, avoid
+
+    def potion(self, day: int, health: int, experienced: bool,
+               spotions: int) -> Tuple[float, float]:
+        """
+        Gets the values of leaving and drinking a potion found after avoiding a fight.
+
+        Args:
+            day (int): The current day.
+            health (int): The hero's health.
+            experienced (bool): Whether the hero has any experience.
+            spotions (int): The number of super-potions.
+
+        Returns:
+            tuple: The survival probabilities when leaving and when drinking the potion.
+        """
+        spellbook = self.has_spellbook(day)
+        drink = sum(
+            self.value(day, min(health + (abs(effect) if spellbook else effect),
+                                self.rules.health), experienced, spotions)
+            for effect in self.potion_effects
+        ) / len(self.potion_effects)
+
+        return self.value(day, health, experienced, spotions), drink
+
+    def after_win(self, day: int, health: int, experienced: bool, spotions: int) -> float:
+        """
+        Gets the value of a won fight, which rewards experience and maybe a super-potion.
+        """
+        outcomes = [(self.xp_chance, True), (1 - self.xp_chance, experienced)]
+        found = self.superpotion_chance if self.has_spellbook(day) else 0.0
+
+        return sum(
+            chance * ((1 - found) * self.value(day, health, gained, spotions)
+                      + found * self.value(day, health, gained, spotions + 1))
+            for chance, gained in outcomes if chance
+        )
+
+    def combat(self, day: int, health: int, enemy: int, experienced: bool,
+               spotions: int) -> Tuple[float, float]:
+        """
+        Gets the values of attacking and fleeing at the start of a combat turn.
+
+        Args:
+            day (int): The current day.
+            health (int): The hero's health.
+            enemy (int): The enemy's health.
+            experienced (bool): Whether the hero has any experience.
+            spotions (int): The number of super-potions.
+
+        Returns:
+            tuple: The survival probabilities when attacking and when trying to flee.
+        """
+        key = self._key(day, health, experienced, spotions) * (self.rules.enemy_health + 1) + enemy
+        values = self._combat.get(key)
+        if values is not None:
+            return values
+
+        def turn(immediate: float, branches) -> float:
+            # Adds the enemy's answer to every branch where it survived the hero's action. A
+            # dodged attack on a failed escape leads back to this very state, which is solved
+            # as a geometric series.
+            total, loop = immediate, 0.0
+            for chance, enemy_left in branches:
+                for probability, amount in self.enemy_hits:
+                    share = chance * probability
+                    if health - amount <= 0:
+                        continue
+                    if (health - amount, enemy_left) == (health, enemy):
+                        loop += share
+                    else:
+                        total += share * max(self.combat(day, health - amount, enemy_left,
+                                                         experienced, spotions))
+
+            return total / (1 - loop) if loop < 1 else 0.0
+
+        win = 0.0
+        branches = []
+        for probability, amount in self.hero_hits:
+            if enemy - amount <= 0:
+                win += probability
+            else:
+                branches.append((probability, enemy - amount))
+
+        attack = turn(win * self.after_win(day, health, experienced, spotions) if win else 0.0,
+                      branches)
+        flee = turn(self.escape * self.value(day, health, experienced, spotions),
+                    [(1 - self.escape, enemy)])
+
+        values = self._combat[key] = (attack, flee)
+        return values
+
+    def solve(self) -> float:
+        """
+        Fills the values of every reachable state, from the last day backwards.
+
+        Returns:
+            float: The survival probability of a fresh hero with optimal play.
+        """
+        for day in range(self.rules.max_days - 1, self.rules.starting_day - 1, -1):
+            for health in range(1, self.rules.health + 1):
+                for experienced in (False, True):
+                    for spotions in range(self.max_spotions(day) + 1):
+                        self.value(day, health, experienced, spotions)
+
+        return self.survival
+
+    @property
+    def survival(self) -> float:
+        """
+        Gets the survival probability of a fresh hero with optimal play.
+
+        Returns:
+            float: The survival probability.
+        """
+        return self.value(self.rules.starting_day, self.rules.health, False, 0)
+
+
+@lru_cache(maxsize=8)
+def solve(rules: Rules) -> Solver:
+    """
+    Solves a run, once per set of rules.
+
+    Args:
+        rules (Rules): The rules of the run.
+
+    Returns:
+        Solver: The solved run.
+    """
+    solver = Solver(rules)
+    solver.solve()
+    return solver
+
+
+class OptimalPolicy(Policy):
+    """
+    Policy that plays the decisions maximizing the survival chance, for the rules in `config`
+    when the policy is created.
+    """
+
+    def __init__(self, solver: Optional[Solver] = None) -> None:
+        """
+        Args:
+            solver (Solver): A solved run, the current `config` is solved by default.
+        """
+        self.solver = solver or solve(Rules.from_config())
+        self.day = 0
+
+    @staticmethod
+    def state(hero: Player) -> Tuple[int, bool, int]:
+        """
+        Gets the hero's part of a solver state.
+
+        Args:
+            hero (Player): The hero.
+
+        Returns:
+            tuple: The health, whether the hero has experience and the super-potion count.
+        """
+        return hero.health, hero.experience > 0, hero.inventory.count("spotion")
+
+    def use_superpotion(self, hero: Player, day: int) -> bool:
+        health, experienced, spotions = self.state(hero)
+        keep = max(self.solver.encounter(day, health, experienced, spotions))
+        drink = max(self.solver.encounter(day, hero.health_max, experienced, spotions - 1))
+        return drink > keep
+
+    def fight(self, hero: Player, enemy: Goblin, day: int) -> bool:
+        self.day = day
+        health, experienced, spotions = self.state(hero)
+        fight, avoid = self.solver.encounter(day, health, experienced, spotions)
+        return fight >= avoid
+
+    def drink_potion(self, hero: Player, day: int) -> bool:
+        leave, drink = self.solver.potion(day, *self.state(hero))
+        return drink > leave
+
+    def combat_action(self, hero: Player, enemy: Goblin, turn: int) -> str:
+        health, experienced, spotions = self.state(hero)
+        attack, flee = self.solver.combat(self.day, health, enemy.health, experienced, spotions)
+        return "flee" if flee > attack else "attack"
+
+
+def threshold(predicate: Callable[[int], bool], health: int) -> Optional[int]:
+    """
+    Finds the lowest health from which a decision holds up to full health.
+
+    Args:
+        predicate (Callable): The decision for a given health.
+        health (int): The maximum health.
+
+    Returns:
+        int: The lowest such health, None if the decision doesn't hold at full health.
+    """
+    lowest = None
+    for value in range(health, 0, -1):
+        if not predicate(value):
+            break
+        lowest = value
+
+    return lowest
+
+
+def main() -> None:
+    """
+    Command line entry point.
+    """
+    from .simulate import apply_profile, parse_override
+
+    parser = argparse.ArgumentParser(description="Solve a run for the optimal decisions.")
+    parser.add_argument("--set", dest="overrides", type=parse_override, action="append",
+                        default=[], metavar="NAME=VALUE", help="override a config constant")
+    args = parser.parse_args()
+
+    apply_profile(dict(args.overrides))
+
+    rules = Rules.from_config()
+    start = time.perf_counter()
+    try:
+        solver = solve(rules)
+    except ValueError as error:
+        parser.error(str(error))
+    elapsed = time.perf_counter() - start
+
+    print(f"🥳 Survival chance: {solver.survival:.4%}")
+    print(f"🧮 {len(solver)} states solved in {elapsed:.2f}s")
+    print("📅 Lowest health to fight / highest health to flee from a fresh goblin, "
+          "without and with experience:")
+
+    def show(value: Optional[int]) -> str:
+        return "-" if value is None else str(value)
+
+    for day in range(rules.starting_day + 1, rules.max_days + 1):
+        columns = []
+        for experienced in (False, True):
+            fight = threshold(lambda health: solver.encounter(day, health, experienced, 0)[0]
+                              >= solver.encounter(day, health, experienced, 0)[1], rules.health)
+            flee = [health for health in range(1, rules.health + 1)
+                    if solver.combat(day, health, rules.enemy_health, experienced, 0)[1]
+                    > solver.combat(day, health, rules.enemy_health, experienced, 0)[0]]
+            columns.append(f"fight ≥ {show(fight):>3}, flee ≤ {show(max(flee, default=None)):>3}")
+
+        print(f"    {day:>3}  " + "  |  ".join(columns))
+
+
+if __name__ == "__main__":
+    main()
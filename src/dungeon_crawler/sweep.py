@@ -0,0 +1,532 @@
+"""
+Parameter sweeps over the `config` constants, on top of the batch simulation.
+
+Every sweep point is a set of overridden constants, taken from a grid of the given values or
+sampled at random from their ranges. A point plays chunks of games until the confidence interval
+of its survival rate is narrow enough, or until it reaches `--max-runs`, so clear-cut points
+stop after a few hundred games and the budget goes to the close ones.
+
+The points are spread across a process pool. A point has a single chunk in flight at a time
+and plays the same chunks (seeded by the sweep seed and the chunk index) as every other point,
+so its result doesn't depend on the number of workers and two points are compared on the same
+dungeons. Finished points are streamed to a CSV file, or to Parquet if `pyarrow` is installed.
+With `--cache`, chunks already played by an earlier sweep or simulation come from the cache.
+
+A parameter is given as `NAME=VALUES`, with VALUES one of:
+
+    GOBLIN_DAMAGE=10:30:5             every step from 10 to 30, both included
+    GOBLIN_DAMAGE=10:30               any value from 10 to 30, random search only
+    HERO_XP_GAIN_RANGE=[(10,25),(15,30)]  the listed values
+    HERO_DODGE_CHANCE=40              a single value
+
+Usage:
+    python -m dungeon_crawler.sweep sweep.csv --param GOBLIN_DAMAGE=10:30:5 \
+        --param CHARACTER_CRIT_CHANCE=[30,50,70]
+    python -m dungeon_crawler.sweep sweep.csv --random 1000 --param GOBLIN_HEALTH=50:150 \
+        --param HERO_DODGE_CHANCE=0:100 --cache results.db
+"""
+
+import argparse
+import csv
+import itertools
+import os
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from statistics import NormalDist
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from . import config
+from .rng import GameRandom
+from .simulate import (POLICY_NAMES, SimulationReport, parse_override, profile_applied,
+                       run_chunk)
+
+DEFAULT_CHUNK_RUNS = 200
+DEFAULT_MIN_RUNS = 400
+DEFAULT_MAX_RUNS = 20000
+DEFAULT_PRECISION = 0.02
+DEFAULT_CONFIDENCE = 0.95
+PARQUET_ROW_GROUP = 256
+
+RESULT_COLUMNS = ("runs", "survival_rate", "survival_low", "survival_high", "mean_days",
+                  "mean_experience", "experience_p10", "experience_p50", "experience_p90",
+                  "stop")
+
+
+@dataclass(frozen=True)
+class Parameter:
+    """
+    The values a constant takes in a sweep.
+
+    Attributes:
+        name (str): The name of the `config` constant.
+        values (tuple): The listed values, empty for a continuous range.
+        low: The lower bound of a continuous range.
+        high: The upper bound of a continuous range.
+    """
+    name: str
+    values: Tuple = ()
+    low: float = 0
+    high: float = 0
+
+    def grid(self) -> Tuple:
+        """
+        Gets the values of the parameter in a grid search.
+
+        Raises:
+            ValueError: If the parameter is a continuous range.
+        """
+        if not self.values:
+            raise ValueError(f"{self.name} is a range without a step, only a random search "
+                             "can sample it")
+        return self.values
+
+    def sample(self, rng: GameRandom):
+        """
+        Draws a value of the parameter in a random search.
+        """
+        if self.values:
+            return rng.choice(self.values)
+        if isinstance(self.low, int) and isinstance(self.high, int):
+            return rng.randint(self.low, self.high)
+        return rng.uniform(self.low, self.high)
+
+
+def parse_parameter(text: str) -> Parameter:
+    """
+    Parses a `NAME=VALUES` parameter from the command line.
+
+    Args:
+        text (str): The parameter, see the module's documentation for the forms of VALUES.
+
+    Returns:
+        Parameter: The parsed parameter.
+
+    Raises:
+        argparse.ArgumentTypeError: If the parameter is invalid.
+    """
+    name, value = parse_override(text)
+    if not hasattr(config, name):
+        raise argparse.ArgumentTypeError(f"Unknown config constant: {name}")
+
+    if isinstance(value, list):
+        if not value:
+            raise argparse.ArgumentTypeError(f"{name} has no values")
+        return Parameter(name, tuple(value))
+    if not isinstance(value, str) or ":" not in value:
+        return Parameter(name, (value,))
+
+    try:
+        bounds = [float(part) if "." in part else int(part) for part in value.split(":")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected LOW:HIGH[:STEP], got {value!r}") from None
+
+    if len(bounds) == 2 and bounds[0] <= bounds[1]:
+        return Parameter(name, low=bounds[0], high=bounds[1])
+    if len(bounds) == 3 and bounds[0] <= bounds[1] and bounds[2] > 0:
+        low, high, step = bounds
+        count = int((high - low) / step + 1e-9) + 1
+        return Parameter(name, tuple(low + step * index for index in range(count)))
+
+    raise argparse.ArgumentTypeError(f"Expected LOW:HIGH[:STEP] with LOW <= HIGH and STEP > 0, "
+                                     f"got {value!r}")
+
+
+def grid_points(parameters: Sequence[Parameter]) -> Iterator[Dict[str, object]]:
+    """
+    Enumerates every combination of the parameters' values.
+
+    Yields:
+        dict: The constants of a point.
+    """
+    names = [parameter.name for parameter in parameters]
+    for values in itertools.product(*(parameter.grid() for parameter in parameters)):
+        yield dict(zip(names, values))
+
+
+def random_points(parameters: Sequence[Parameter], count: int,
+                  seed: int) -> Iterator[Dict[str, object]]:
+    """
+    Samples points at random, the same ones for a given seed.
+
+    Yields:
+        dict: The constants of a point.
+    """
+    rng = GameRandom(seed).spawn("sweep")
+    for _ in range(count):
+        yield {parameter.name: parameter.sample(rng) for parameter in parameters}
+
+
+@dataclass
+class SweepSettings:
+    """
+    How every point of a sweep is played.
+
+    Attributes:
+        seed (int): The seed of the chunks, shared by all points.
+        policy (str): The name of the engine policy, one of `simulate.POLICY_NAMES`.
+        chunk_runs (int): The games of a chunk, the confidence interval is checked after each.
+        min_runs (int): The games a point plays before it may stop early.
+        max_runs (int): The games after which a point stops anyway.
+        precision (float): The half-width of the confidence interval a point stops at.
+        confidence (float): The confidence level of the interval.
+    """
+    seed: int = 0
+    policy: str = "aggressive"
+    chunk_runs: int = DEFAULT_CHUNK_RUNS
+    min_runs: int = DEFAULT_MIN_RUNS
+    max_runs: int = DEFAULT_MAX_RUNS
+    precision: float = DEFAULT_PRECISION
+    confidence: float = DEFAULT_CONFIDENCE
+
+    @property
+    def z(self) -> float:
+        """
+        Gets the normal quantile of the confidence level.
+        """
+        return NormalDist().inv_cdf(0.5 + self.confidence / 2)
+
+
+@dataclass
+class SweepPoint:
+    """
+    A point of a sweep and the games it played so far.
+
+    Attributes:
+        index (int): The position of the point in the sweep.
+        profile (dict): The overridden constants.
+        report (SimulationReport): The outcome of the games played.
+        chunks (int): The number of chunks played.
+        stop (str): Why the point finished, "precision" or "max-runs", empty while it runs.
+        rules (str): The `cache.rules_digest` of the point, when a cache is used.
+    """
+    index: int
+    profile: Dict[str, object]
+    report: SimulationReport = field(default_factory=SimulationReport)
+    chunks: int = 0
+    stop: str = ""
+    rules: str = ""
+
+    def interval(self, z: float) -> Tuple[float, float]:
+        """
+        Gets the Wilson score interval of the survival rate.
+
+        Args:
+            z (float): The normal quantile of the confidence level.
+
+        Returns:
+            tuple: The lower and upper bounds.
+        """
+        runs = self.report.runs
+        if not runs:
+            return 0.0, 1.0
+
+        rate = self.report.survival_rate
+        center = (rate + z * z / (2 * runs)) / (1 + z * z / runs)
+        spread = z / (1 + z * z / runs) * (rate * (1 - rate) / runs
+                                           + z * z / (4 * runs * runs)) ** 0.5
+        return max(center - spread, 0.0), min(center + spread, 1.0)
+
+    def next_chunk(self, settings: SweepSettings) -> Tuple[int, int]:
+        """
+        Gets the next chunk to play.
+
+        Returns:
+            tuple: The index and the number of games of the chunk.
+        """
+        return self.chunks, min(settings.chunk_runs, settings.max_runs - self.report.runs)
+
+    def add(self, chunk: SimulationReport, settings: SweepSettings) -> bool:
+        """
+        Adds the outcome of the next chunk, and decides whether the point is finished.
+
+        Returns:
+            bool: True if the point is finished.
+        """
+        self.report.merge(chunk)
+        self.chunks += 1
+
+        low, high = self.interval(settings.z)
+        if self.report.runs >= settings.min_runs and (high - low) / 2 <= settings.precision:
+            self.stop = "precision"
+        elif self.report.runs >= settings.max_runs:
+            self.stop = "max-runs"
+
+        return bool(self.stop)
+
+    def row(self, settings: SweepSettings) -> Dict[str, object]:
+        """
+        Gets the line of the point in the results.
+        """
+        report = self.report
+        low, high = self.interval(settings.z)
+        days = sum(day * count for day, count in report.days.items())
+        row = {"point": self.index}
+        row.update({name: _cell(value) for name, value in self.profile.items()})
+        row.update({
+            "runs": report.runs,
+            "survival_rate": round(report.survival_rate, 6),
+            "survival_low": round(low, 6),
+            "survival_high": round(high, 6),
+            "mean_days": round(days / report.runs, 4) if report.runs else 0.0,
+            "mean_experience": round(report.mean_experience, 4),
+            "experience_p10": report.experience_percentile(10),
+            "experience_p50": report.experience_percentile(50),
+            "experience_p90": report.experience_percentile(90),
+            "stop": self.stop,
+        })
+        return row
+
+
+def _cell(value):
+    """
+    Converts a constant into a value a CSV or Parquet column can hold.
+    """
+    return value if isinstance(value, (int, float, str)) else repr(value)
+
+
+def play_point_chunk(profile: Dict[str, object], seed: int, index: int, runs: int,
+                     policy: str) -> SimulationReport:
+    """
+    Plays a chunk of a sweep point, with the point's constants applied for its duration.
+
+    Args:
+        profile (dict): The constants of the point.
+        seed (int): The seed of the sweep.
+        index (int): The index of the chunk.
+        runs (int): The number of games.
+        policy (str): The name of the policy.
+
+    Returns:
+        SimulationReport: The counters of the chunk.
+    """
+    with profile_applied(profile):
+        return run_chunk(seed, index, runs, policy)
+
+
+def sweep(points: Sequence[Dict[str, object]], settings: SweepSettings,
+          workers: Optional[int] = None, cache=None) -> Iterator[SweepPoint]:
+    """
+    Plays the points of a sweep across a process pool.
+
+    Args:
+        points (Sequence[dict]): The constants of every point.
+        settings (SweepSettings): How every point is played.
+        workers (int): The number of worker processes, all cores by default.
+        cache (ResultCache): Cache of chunk reports, every chunk is played if not given.
+
+    Yields:
+        SweepPoint: Every point as soon as it's finished.
+    """
+    workers = workers or os.cpu_count() or 1
+    waiting = deque(SweepPoint(index, dict(profile)) for index, profile in enumerate(points))
+
+    if cache is not None:
+        from .cache import chunk_key, rules_digest
+
+        for point in waiting:
+            with profile_applied(point.profile):
+                point.rules = rules_digest()
+
+    def cached(point: SweepPoint) -> Optional[SimulationReport]:
+        if cache is None:
+            return None
+        data = cache.get(chunk_key(point.rules, settings.seed, *point.next_chunk(settings),
+                                   settings.policy))
+        return SimulationReport.from_dict(data) if data is not None else None
+
+    def store(point: SweepPoint, chunk: SimulationReport) -> None:
+        if cache is not None:
+            cache.put(chunk_key(point.rules, settings.seed, *point.next_chunk(settings),
+                                settings.policy), chunk.to_dict())
+
+    if workers == 1:
+        while waiting:
+            point = waiting.popleft()
+            chunk = cached(point)
+            if chunk is None:
+                chunk = play_point_chunk(point.profile, settings.seed,
+                                         *point.next_chunk(settings), settings.policy)
+                store(point, chunk)
+            if point.add(chunk, settings):
+                yield point
+            else:
+                waiting.append(point)
+        return
+
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    running = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while waiting or running:
+            # Keep every worker busy, a point only has one chunk in flight
+            while waiting and len(running) < 2 * workers:
+                point = waiting.popleft()
+                chunk = cached(point)
+                if chunk is None:
+                    running[pool.submit(play_point_chunk, point.profile, settings.seed,
+                                        *point.next_chunk(settings), settings.policy)] = point
+                elif point.add(chunk, settings):
+                    yield point
+                else:
+                    waiting.append(point)
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                point = running.pop(future)
+                chunk = future.result()
+                store(point, chunk)
+                if point.add(chunk, settings):
+                    yield point
+                else:
+                    waiting.append(point)
+
+
+class CsvWriter:
+    """
+    Streams rows to a CSV file, flushed after every row.
+    """
+
+    def __init__(self, path: str, columns: List[str]) -> None:
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.file, columns)
+        self.writer.writeheader()
+
+    def write(self, row: Dict[str, object]) -> None:
+        self.writer.writerow(row)
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class ParquetWriter:
+    """
+    Streams rows to a Parquet file, one row group per `PARQUET_ROW_GROUP` rows.
+    """
+
+    def __init__(self, path: str, columns: List[str]) -> None:
+        import pyarrow
+        import pyarrow.parquet
+
+        self.pyarrow = pyarrow
+        self.path = path
+        self.columns = columns
+        self.rows: List[Dict[str, object]] = []
+        self.writer = None
+        self.parquet = pyarrow.parquet
+
+    def write(self, row: Dict[str, object]) -> None:
+        self.rows.append(row)
+        if len(self.rows) >= PARQUET_ROW_GROUP:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.rows:
+            return
+
+        table = self.pyarrow.Table.from_pylist(self.rows)
+        if self.writer is None:
+            self.writer = self.parquet.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table.select(self.columns).cast(self.writer.schema))
+        self.rows = []
+
+    def close(self) -> None:
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+
+
+def open_writer(path: str, columns: List[str]):
+    """
+    Opens the results file of a sweep, Parquet if the path ends with `.parquet`.
+
+    Raises:
+        ImportError: If Parquet is asked for and `pyarrow` isn't installed.
+    """
+    if path.endswith(".parquet"):
+        try:
+            return ParquetWriter(path, columns)
+        except ImportError:
+            raise ImportError("Parquet results need pyarrow, install it or write a .csv file") \
+                from None
+    return CsvWriter(path, columns)
+
+
+def main() -> None:
+    """
+    Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Sweep config constants with batch games.")
+    parser.add_argument("output", help="results file, .csv or .parquet")
+    parser.add_argument("--param", dest="parameters", type=parse_parameter, action="append",
+                        required=True, metavar="NAME=VALUES", help="a swept constant")
+    parser.add_argument("--random", type=int, default=0, metavar="POINTS",
+                        help="sample this many random points instead of the whole grid")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the games and samples")
+    parser.add_argument("--policy", choices=POLICY_NAMES, default="aggressive")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes")
+    parser.add_argument("--chunk-runs", type=int, default=DEFAULT_CHUNK_RUNS,
+                        help="games per chunk, the interval is checked after each")
+    parser.add_argument("--min-runs", type=int, default=DEFAULT_MIN_RUNS,
+                        help="games before a point may stop early")
+    parser.add_argument("--max-runs", type=int, default=DEFAULT_MAX_RUNS,
+                        help="games after which a point stops anyway")
+    parser.add_argument("--precision", type=float, default=DEFAULT_PRECISION,
+                        help="half-width of the survival rate interval to stop at")
+    parser.add_argument("--confidence", type=float, default=DEFAULT_CONFIDENCE,
+                        help="confidence level of the interval")
+    parser.add_argument("--cache", default=None, metavar="PATH",
+                        help="SQLite file caching the results of every chunk")
+    args = parser.parse_args()
+
+    names = [parameter.name for parameter in args.parameters]
+    if len(set(names)) != len(names):
+        parser.error("a constant is swept twice")
+    if args.chunk_runs <= 0 or args.max_runs <= 0 or not 0 < args.confidence < 1:
+        parser.error("--chunk-runs and --max-runs must be above 0, --confidence within (0, 1)")
+
+    try:
+        if args.random:
+            points = list(random_points(args.parameters, args.random, args.seed))
+        else:
+            points = list(grid_points(args.parameters))
+        writer = open_writer(args.output, ["point", *names, *RESULT_COLUMNS])
+    except (ValueError, ImportError, OSError) as error:
+        parser.error(str(error))
+
+    settings = SweepSettings(args.seed, args.policy, args.chunk_runs, args.min_runs,
+                             args.max_runs, args.precision, args.confidence)
+
+    cache = None
+    if args.cache:
+        from .cache import ResultCache
+        cache = ResultCache(args.cache)
+
+    started = time.perf_counter()
+    games = 0
+    try:
+        for done, point in enumerate(sweep(points, settings, args.workers, cache), 1):
+            writer.write(point.row(settings))
+            games += point.report.runs
+            low, high = point.interval(settings.z)
+            print(f"✅ [{done}/{len(points)}] point {point.index}: survival "
+                  f"{point.report.survival_rate:.1%} ±{(high - low) / 2:.1%} after "
+                  f"{point.report.runs} games", file=sys.stderr, flush=True)
+    finally:
+        writer.close()
+        if cache is not None:
+            cache.close()
+
+    elapsed = time.perf_counter() - started
+    reused = f", {cache.hits} chunks from the cache" if cache is not None else ""
+    print(f"🏁 {len(points)} points, {games} games in {elapsed:.1f}s{reused}, results in "
+          f"{args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+This module defines the vectorized enemy policies, see `ai`.
+
+`decide_batch` reads the stats of every enemy of a group into arrays (`Features`) and scores the
+actions of all of them in a single pass: `UtilityPolicy` with utility curves, and
+`BehaviorTreePolicy` with a behavior tree whose nodes run on every lane at once.
+"""
+
+from typing import Callable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from . import config
+from .ai import ACTIONS, ATTACK, FLEE, HEAL, EnemyPolicy
+
+FAILURE = -1
+SUCCESS = -2
+
+
+class Features(NamedTuple):
+    """
+    The stats policies decide on, one lane per enemy.
+
+    Attributes:
+        health (np.ndarray): The health of every enemy.
+        health_max (np.ndarray): Their maximum health.
+        damage (np.ndarray): Their base damage.
+        potions (np.ndarray): The potions they still carry.
+        hero_health (float): The hero's health.
+        hero_health_max (float): The hero's maximum health.
+    """
+    health: np.ndarray
+    health_max: np.ndarray
+    damage: np.ndarray
+    potions: np.ndarray
+    hero_health: float
+    hero_health_max: float
+
+    @classmethod
+    def of(cls, enemies: Sequence, hero) -> "Features":
+        """
+        Reads the stats of a group of enemies.
+
+        Args:
+            enemies (Sequence[Enemy]): The enemies.
+            hero (Character): The hero they fight.
+
+        Returns:
+            Features: The arrays of stats.
+        """
+        count = len(enemies)
+        return cls(
+            health=np.fromiter((enemy.health for enemy in enemies), float, count),
+            health_max=np.fromiter((max(enemy.health_max, 1) for enemy in enemies), float,
+                                   count),
+            damage=np.fromiter((enemy.damage for enemy in enemies), float, count),
+            potions=np.fromiter((enemy.potions for enemy in enemies), float, count),
+            hero_health=float(hero.health),
+            hero_health_max=float(max(hero.health_max, 1)),
+        )
+
+    @property
+    def health_ratio(self) -> np.ndarray:
+        """
+        Gets the health of every enemy as a fraction of their maximum.
+        """
+        return self.health / self.health_max
+
+    def low_health(self) -> np.ndarray:
+        """
+        Gets the enemies below `config.ENEMY_LOW_HEALTH` percent of their maximum health.
+        """
+        return self.health_ratio * 100 < config.ENEMY_LOW_HEALTH
+
+
+class BatchedPolicy(EnemyPolicy):
+    """
+    Base class for the policies that score a whole group at once.
+    """
+
+    def decide_batch(self, enemies: Sequence, hero) -> List[str]:
+        return [ACTIONS[index] for index in self.choose(Features.of(enemies, hero))]
+
+    def choose(self, features: Features) -> np.ndarray:
+        """
+        Picks the action of every lane.
+
+        Args:
+            features (Features): The stats of the enemies.
+
+        Returns:
+            np.ndarray: The index in `ACTIONS` of every enemy's action.
+        """
+        raise NotImplementedError()
+
+
+class UtilityPolicy(BatchedPolicy):
+    """
+    Scores every action with a utility curve and picks the best one.
+
+    Attacking is worth more the closer a hit brings the hero to death, healing is worth more the
+    more health the enemy lost, and fleeing grows quickly once the enemy is badly hurt, so a
+    wounded goblin drinks its potions first and runs once it has none left. Ties go to the
+    first action of `ACTIONS`.
+    """
+
+    name = "utility"
+
+    attack_base = 0.5
+    heal_weight = 1.2
+    flee_weight = 0.8
+
+    def scores(self, features: Features) -> np.ndarray:
+        """
+        Scores the actions of every lane.
+
+        Args:
+            features (Features): The stats of the enemies.
+
+        Returns:
+            np.ndarray: A (lanes, actions) array of utilities, in the order of `ACTIONS`.
+        """
+        missing = 1 - features.health_ratio
+        lethality = np.minimum(features.damage / max(features.hero_health, 1), 1)
+
+        scores = np.empty((features.health.size, len(ACTIONS)))
+        scores[:, 0] = self.attack_base + (1 - self.attack_base) * lethality
+        scores[:, 1] = np.where(features.potions > 0, self.heal_weight * missing, 0)
+        scores[:, 2] = self.flee_weight * missing ** 2
+        return scores
+
+    def choose(self, features: Features) -> np.ndarray:
+        return self.scores(features).argmax(axis=1)
+
+
+class Node:
+    """
+    Base class for the nodes of a behavior tree.
+
+    A node runs on many lanes at once and tells for each of them whether it failed, succeeded
+    without picking an action, or picked one.
+    """
+
+    def run(self, features: Features, lanes: np.ndarray) -> np.ndarray:
+        """
+        Runs the node.
+
+        Args:
+            features (Features): The stats of the enemies.
+            lanes (np.ndarray): True for the lanes the node runs on.
+
+        Returns:
+            np.ndarray: For every lane, `FAILURE`, `SUCCESS` or the index of the action picked.
+                Lanes the node didn't run on are `FAILURE`.
+        """
+        raise NotImplementedError()
+
+
+class ConditionNode(Node):
+    """
+    Succeeds where a predicate holds.
+    """
+
+    def __init__(self, predicate: Callable[[Features], np.ndarray]) -> None:
+        """
+        Args:
+            predicate (Callable): Takes the features and returns a mask of the lanes where the
+                condition holds.
+        """
+        self.predicate = predicate
+
+    def run(self, features: Features, lanes: np.ndarray) -> np.ndarray:
+        holds = np.broadcast_to(self.predicate(features), lanes.shape)
+        return np.where(lanes & holds, SUCCESS, FAILURE)
+
+
+class ActionNode(Node):
+    """
+    Picks an action.
+    """
+
+    def __init__(self, action: str) -> None:
+        """
+        Args:
+            action (str): The name of the action, one of `ACTIONS`.
+        """
+        self.index = ACTIONS.index(action)
+
+    def run(self, features: Features, lanes: np.ndarray) -> np.ndarray:
+        return np.where(lanes, self.index, FAILURE)
+
+
+class SequenceNode(Node):
+    """
+    Runs its children in order while they succeed, and stops at the first one that fails or
+    picks an action.
+    """
+
+    def __init__(self, *children: Node) -> None:
+        self.children = children
+
+    def run(self, features: Features, lanes: np.ndarray) -> np.ndarray:
+        result = np.full(lanes.shape, FAILURE)
+        running = lanes.copy()
+
+        for child in self.children:
+            if not running.any():
+                break
+            outcome = child.run(features, running)
+            done = running & (outcome != SUCCESS)
+            result[done] = outcome[done]
+            running &= ~done
+
+        result[running] = SUCCESS
+        return result
+
+
+class SelectorNode(Node):
+    """
+    Runs its children in order until one of them doesn't fail.
+    """
+
+    def __init__(self, *children: Node) -> None:
+        self.children = children
+
+    def run(self, features: Features, lanes: np.ndarray) -> np.ndarray:
+        result = np.full(lanes.shape, FAILURE)
+        pending = lanes.copy()
+
+        for child in self.children:
+            if not pending.any():
+                break
+            outcome = child.run(features, pending)
+            done = pending & (outcome != FAILURE)
+            result[done] = outcome[done]
+            pending &= ~done
+
+        return result
+
+
+def default_tree() -> Node:
+    """
+    Builds the default behavior tree: a badly hurt enemy drinks a potion if it has one, or runs
+    if it can't kill the hero with its next hit, and attacks otherwise.
+
+    Returns:
+        Node: The root of the tree.
+    """
+    return SelectorNode(
+        SequenceNode(ConditionNode(Features.low_health),
+                     ConditionNode(lambda features: features.potions > 0),
+                     ActionNode(HEAL)),
+        SequenceNode(ConditionNode(Features.low_health),
+                     ConditionNode(lambda features: features.damage < features.hero_health),
+                     ActionNode(FLEE)),
+        ActionNode(ATTACK),
+    )
+
+
+class BehaviorTreePolicy(BatchedPolicy):
+    """
+    Walks a behavior tree, every node of which is evaluated for the whole group at once. Lanes
+    the tree doesn't pick an action for attack.
+    """
+
+    name = "tree"
+
+    def __init__(self, root: Optional[Node] = None) -> None:
+        """
+        Args:
+            root (Node): The root of the tree, `default_tree()` by default.
+        """
+        self.root = root or default_tree()
+
+    def choose(self, features: Features) -> np.ndarray:
+        lanes = np.ones(features.health.size, dtype=bool)
+        picked = self.root.run(features, lanes)
+        return np.where(picked >= 0, picked, 0)
+
+
+BATCHED_POLICIES = {policy.name: policy for policy in (UtilityPolicy, BehaviorTreePolicy)}
@@ -2,19 +2,17 @@
 Utility functions for the game.
 """
 
-import os
+from .console import get_console, read, write
 
 
 def clear() -> None:
     """
-    Clears the terminal screen.
-
-    Uses 'cls' command for Windows and 'clear' for other platforms.
+    Clears the screen of the current session.
     """
-    os.system("cls" if os.name == "nt" else "clear")
+    get_console().clear()
 
 
-def get_yes_no(prompt: str) -> bool:
+async def get_yes_no(prompt: str) -> bool:
     """
     Prompts the user for a yes/no response.
 
@@ -25,9 +23,9 @@ def get_yes_no(prompt: str) -> bool:
         bool: True if the user responds with 'Y' or presses ENTER, False otherwise.
     """
     while True:
-        answer = input(prompt).lower()
+        answer = (await read(prompt)).lower()
 
         if answer in ("y", "n", ""):
             return answer in ("y", "")
 
-        print("\n❌ Invalid choice. Please enter 'Y' or 'N'.")
+        write("\n❌ Invalid choice. Please enter 'Y' or 'N'.")
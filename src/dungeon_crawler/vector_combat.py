@@ -0,0 +1,210 @@
+"""
+This module resolves many hero-vs-enemy fights at once with NumPy.
+
+Every fight of the batch is a lane in a set of arrays (health, turn counters, outcome masks).
+Each round rolls crits, dodges and flee attempts for all lanes still fighting in a single call,
+following the same rules as `Combat.fight`:
+
+* The hero acts first. An attack crits when a 1-100 roll is at most `crit_chance` and deals
+  `round(damage * 1.5)` on a crit. Enemies never dodge.
+* A flee attempt succeeds when a 1-100 roll is at most `flee_chance`, a failed one wastes the turn.
+* The enemy attacks back if it is still alive. The hero dodges when a 1-100 roll is at least
+  `dodge_chance`, as in `Player.pre_damage`.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from .enemy import Enemy
+from .player import Player
+
+ROLL_LOW = 1
+ROLL_HIGH = 101
+
+
+@dataclass
+class FightBatch:
+    """
+    Outcome of a batch of fights, one entry per fight.
+
+    Attributes:
+        won (np.ndarray): True where the enemy was defeated.
+        fled (np.ndarray): True where the hero escaped.
+        turns (np.ndarray): The turn during which each fight ended.
+        damage_taken (np.ndarray): Health lost by the hero.
+    """
+    won: np.ndarray
+    fled: np.ndarray
+    turns: np.ndarray
+    damage_taken: np.ndarray
+
+    @property
+    def lost(self) -> np.ndarray:
+        """
+        Gets the fights the hero died in.
+
+        Returns:
+            np.ndarray: True where the hero was killed.
+        """
+        return ~(self.won | self.fled)
+
+    def summary(self) -> dict:
+        """
+        Summarizes the outcome distribution of the batch.
+
+        Returns:
+            dict: Win, flee and loss rates plus the mean turns and damage taken.
+        """
+        return {
+            "fights": int(self.won.size),
+            "win_rate": float(self.won.mean()),
+            "flee_rate": float(self.fled.mean()),
+            "loss_rate": float(self.lost.mean()),
+            "mean_turns": float(self.turns.mean()),
+            "mean_damage_taken": float(self.damage_taken.mean()),
+        }
+
+
+def crit_damage(damage: int) -> int:
+    """
+    Computes the damage of a critical hit, rounded as in `Character.resolve_attack`.
+
+    Args:
+        damage (int): The base damage.
+
+    Returns:
+        int: The critical damage.
+    """
+    return round(damage * 1.5)
+
+
+def resolve_fights(count: int, hero: Player, enemy: Enemy,
+                   hero_health: Optional[np.ndarray] = None, flee_below: int = 0,
+                   rng: Optional[np.random.Generator] = None) -> FightBatch:
+    """
+    Resolves `count` independent fights between copies of the hero and the enemy.
+
+    The characters are only read for their stats and are left untouched.
+
+    Args:
+        count (int): The number of fights to resolve.
+        hero (Player): The hero whose stats are used in every fight.
+        enemy (Enemy): The enemy whose stats are used in every fight.
+        hero_health (np.ndarray): Optional starting health per fight, the hero's current
+            health by default.
+        flee_below (int): The hero tries to flee instead of attacking while their health is
+            below this value. 0 means the hero always attacks.
+        rng (np.random.Generator): The random generator, a fresh unseeded one by default.
+
+    Returns:
+        FightBatch: The outcome of every fight.
+    """
+    rng = rng or np.random.default_rng()
+
+    if hero_health is None:
+        hero_hp = np.full(count, hero.health, dtype=np.int64)
+    else:
+        hero_hp = np.asarray(hero_health, dtype=np.int64).copy()
+
+    start_hp = hero_hp.copy()
+    enemy_hp = np.full(count, enemy.health, dtype=np.int64)
+
+    won = np.zeros(count, dtype=bool)
+    fled = np.zeros(count, dtype=bool)
+    turns = np.zeros(count, dtype=np.int64)
+
+    hero_hit = (hero.damage, crit_damage(hero.damage))
+    enemy_hit = (enemy.damage, crit_damage(enemy.damage))
+
+    # Indices of the fights that are still going on
+    active = np.flatnonzero((hero_hp > 0) & (enemy_hp > 0))
+    turn = 0
+
+    while active.size:
+        turn += 1
+        size = active.size
+
+        # Hero's turn
+        fleeing = hero_hp[active] < flee_below
+        escaped = fleeing & (rng.integers(ROLL_LOW, ROLL_HIGH, size) <= hero.flee_chance)
+
+        crit = rng.integers(ROLL_LOW, ROLL_HIGH, size) <= hero.crit_chance
+        damage = np.where(crit, hero_hit[1], hero_hit[0])
+        enemy_hp[active] -= np.where(fleeing, 0, damage)
+
+        defeated = enemy_hp[active] <= 0
+
+        # Enemy's turn, only where it survived and the hero didn't escape
+        strikes = ~(defeated | escaped)
+        crit = rng.integers(ROLL_LOW, ROLL_HIGH, size) <= enemy.crit_chance
+        dodged = rng.integers(ROLL_LOW, ROLL_HIGH, size) >= hero.dodge_chance
+        damage = np.where(crit, enemy_hit[1], enemy_hit[0])
+        hero_hp[active] -= np.where(strikes & ~dodged, damage, 0)
+
+        killed = strikes & (hero_hp[active] <= 0)
+
+        won[active] = defeated
+        fled[active] = escaped
+        turns[active] = turn
+
+        active = active[~(defeated | escaped | killed)]
+
+    return FightBatch(won=won, fled=fled, turns=turns, damage_taken=start_hp - hero_hp)
+
+
+def resolve_fight_scalar(hero: Player, enemy: Enemy, flee_below: int = 0) -> tuple:
+    """
+    Resolves a single fight one roll at a time, as the reference for `resolve_fights`.
+
+    Args:
+        hero (Player): The hero, whose health is changed by the fight.
+        enemy (Enemy): The enemy, whose health is changed by the fight.
+        flee_below (int): The hero tries to flee while their health is below this value.
+
+    Returns:
+        tuple: Whether the hero won, whether they fled, the final turn and the damage taken.
+    """
+    start_hp = hero.health
+    turn = 0
+
+    while enemy.alive() and hero.alive():
+        turn += 1
+
+        if hero.health < flee_below:
+            if hero.attempt_flee():
+                return False, True, turn, start_hp - hero.health
+        else:
+            hero.resolve_attack(enemy)
+
+        if enemy.alive():
+            enemy.resolve_attack(hero)
+
+    return not enemy.alive(), False, turn, start_hp - hero.health
+
+
+def compare_with_scalar(count: int, hero_factory, enemy_factory, flee_below: int = 0,
+                        seed: Optional[int] = None) -> tuple:
+    """
+    Resolves the same matchup with both resolvers to compare their outcome distributions.
+
+    Args:
+        count (int): The number of fights per resolver.
+        hero_factory: Callable returning a fresh hero.
+        enemy_factory: Callable returning a fresh enemy.
+        flee_below (int): The hero tries to flee while their health is below this value.
+        seed (int): Seed of the vectorized resolver's generator.
+
+    Returns:
+        tuple: The summaries of the vectorized and the scalar batches.
+    """
+    vector = resolve_fights(count, hero_factory(), enemy_factory(), flee_below=flee_below,
+                            rng=np.random.default_rng(seed))
+
+    outcomes = [resolve_fight_scalar(hero_factory(), enemy_factory(), flee_below)
+                for _ in range(count)]
+    won, fled, turns, damage = (np.array(column) for column in zip(*outcomes))
+    scalar = FightBatch(won=won, fled=fled, turns=turns, damage_taken=damage)
+
+    return vector.summary(), scalar.summary()